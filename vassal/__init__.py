@@ -1 +1,4 @@
-from vassal.ssa import ssa
\ No newline at end of file
+from vassal.ssa import ssa
+from vassal.rolling import rolling
+from vassal.batch import batch
+from vassal.gapfill import gapfill
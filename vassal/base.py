@@ -3,22 +3,31 @@
 """
 
 import abc
+from inspect import signature
+
 import numpy as np
 import pandas as pd
 # Get performance algorithm from numpy scipy and sklearn
 from numpy.linalg import svd as nplapack
 from scipy.linalg import svd as splapack
-from scipy.sparse import csc_matrix
+from scipy.linalg import eigh
+from scipy.sparse.linalg import aslinearoperator
 from scipy.sparse.linalg import svds as sparpack
-from sklearn.utils.extmath import randomized_svd
 # svd_flip is used to solve sign ambiguities in performance results
 from sklearn.utils.extmath import svd_flip
 
+from vassal import cache as svdcache
+from vassal import costmodel, tracing
 from vassal.dtypes import (
     is_1darray_like,
     is_valid_group_dict,
     nested2d_to_flatlist,
     arraylike_to_nparray)
+from vassal.linalg import (
+    DeflatedOperator,
+    eigh_to_svd,
+    randomized_svd,
+    weighted_correlation)
 
 
 class ResolutionOrderError(ValueError):
@@ -26,6 +35,45 @@ class ResolutionOrderError(ValueError):
     pass
 
 
+class MemoryBudgetError(ValueError):
+    """Raised when a decomposition cannot fit in the memory budget."""
+    pass
+
+
+def _same_cache_key(key1, key2):
+    """Compare cache keys, arrays by identity and other items by equality"""
+
+    if len(key1) != len(key2):
+        return False
+
+    for item1, item2 in zip(key1, key2):
+
+        if isinstance(item1, np.ndarray) or isinstance(item2, np.ndarray):
+            same = item1 is item2
+        else:
+            same = item1 == item2
+
+        if not same:
+            return False
+
+    return True
+
+
+def _svds(x, k, ncv=None, tol=0, v0=None, maxiter=None):
+    """Leading singular triplets of an operator with ARPACK, sorted"""
+
+    u, s, v = sparpack(x, k=k, ncv=ncv, tol=tol, which='LM', v0=v0,
+                       maxiter=maxiter, return_singular_vectors=True)
+
+    # with this implementation vectors needs to be flipped to match lapack
+    # other format and sign ambiguities have to be solved to force
+    # deterministic output with svd_flip
+
+    u, v = svd_flip(u[:, ::-1], v[::-1, :])
+
+    return u, s[::-1], v
+
+
 class BaseSSA(object):
     """Base class of SSA object
     
@@ -34,8 +82,8 @@ class BaseSSA(object):
     
     Existing SVD algorithm in python are wrapped to this base class to ensure
     consisency in the outputs generated by the algoritm: Singular vectors are 
-    assign to the object as np.matrix type while singular values are 1d 
-    np.array.
+    assign to the object as 2d np.ndarray while singular values are 1d 
+    np.ndarray, all of them of the floating type `dtype`.
     
     Common methods to any SSA derived class are implemented here except plot
     methods that are defined in plot.py
@@ -45,9 +93,15 @@ class BaseSSA(object):
     __metaclass__ = abc.ABCMeta
 
     __valid_types = ['pdseries', 'nparray']
+
+    # number of components first computed by a lazy decomposition
+    _LAZY_K = 10
     __default_groups = ['ssa_original', 'ssa_reconstruction', 'ssa_residuals']
 
-    def __init__(self, ts, svdmethod, usetype):
+    # floating types of the computations
+    _VALID_DTYPES = (np.dtype(np.float32), np.dtype(np.float64))
+
+    def __init__(self, ts, svdmethod, usetype, dtype=np.float64):
         """Base class init method
         """
 
@@ -56,6 +110,9 @@ class BaseSSA(object):
         self._tsindex = None  # pandas index of time series
         self._tsname = None  # pandas series name
         self._usergroups = None  # user defined groups for reconstruction
+        self._cache = {}  # intermediate results, see self._cached
+        self._lazy = None  # solver options of a lazy decomposition
+        self.profile = tracing.Profile()  # traced stages, see vassal.tracing
 
         # reference singular value decomposition results
         # 0: Unitary matrix having left singular vectors as columns
@@ -69,75 +126,73 @@ class BaseSSA(object):
             raise ValueError('usetype in one of: {}.'.format(
                 self.__valid_types.join(', ')))
 
-        # check if time series is one dimensional
-
-        if not is_1darray_like(ts):
-            raise TypeError('Arguments \'ts\' should be 1 dimensional.')
-
-        # check if time series is type pd.Series. If so, store attributes.
-
-        if isinstance(ts, pd.Series):
-            self._tsindex = ts.index
-            self._tsname = ts.name
+        with tracing.stage(self, 'validate', (ts,)):
 
-        if self._tsindex is None and usetype == 'pdseries':
-            self._tsindex = range(len(ts))
+            # check the time series dimension and get its values
 
-        # check if time series is real
+            tsarr = self._ts_to_array(ts)
 
-        tsarr = arraylike_to_nparray(ts)
-
-        if not np.isrealobj(tsarr):
-            raise TypeError('Times series elements should be real numbers.')
-
-        # store attributes
+            # check if time series is type pd.Series or pd.DataFrame. If so,
+            # store attributes.
 
-        self.ts = tsarr  # time series values
-        self.usetype = usetype  # type to use when requesting data
-        self._n_ts = len(ts)  # length
+            if isinstance(ts, pd.Series):
+                self._tsindex = ts.index
+                self._tsname = ts.name
 
-        # map the user selected performance method to self.decompose
+            elif isinstance(ts, pd.DataFrame):
+                self._tsindex = ts.index
+                self._tsname = ts.columns
 
-        self.decompose = self._SVD_METHODS_MAP[svdmethod]
+            if self._tsindex is None and usetype == 'pdseries':
+                self._tsindex = range(len(ts))
 
-    def __getitem__(self, item):
+            # check if time series is real
 
-        if not isinstance(item, str):
-            raise TypeError('Item index should be type str.')
+            if not np.isrealobj(tsarr):
+                raise TypeError(
+                    'Times series elements should be real numbers.')
 
-        if self._usergroups and item in self._usergroups.keys():
-            grpidx = self.groups[item]
-            ts = self._reconstruct_group(grpidx)
+            # values are converted once to the floating type of the
+            # computations, which flows through embedding, SVD and
+            # reconstruction
 
-        elif item == 'ssa_original':
+            dtype = np.dtype(dtype)
 
-            ts = self.ts
+            if dtype not in self._VALID_DTYPES:
+                raise ValueError('dtype should be either float32 or float64, '
+                                 'got {}.'.format(dtype))
 
-        elif item == 'ssa_reconstruction':
+            tsarr = np.ascontiguousarray(tsarr, dtype=dtype)
 
-            # Get number of components
+            tracing.annotate(output=tsarr)
 
-            n = self._n_components
+        # store attributes
 
-            # Reconstruct all the components
+        self.ts = tsarr  # time series values
+        self.usetype = usetype  # type to use when requesting data
+        self.dtype = dtype  # floating type of the computations
+        self._n_ts = len(ts)  # length
 
-            ts = self._reconstruct_group(range(n))
+        # check the user selected performance method used by self.decompose
 
+        if svdmethod not in self._SVD_METHODS_MAP:
+            raise ValueError('svdmethod should be one of: {}.'.format(
+                ', '.join(self._SVD_METHODS_MAP)))
 
-        elif item == 'ssa_residuals':
+        self.svdmethod = svdmethod
+        self.svdplan = None  # decision of svdmethod='auto', see decompose
 
-            # Get residuals components indexes
+    def __getitem__(self, item):
 
-            residx = self.groups['ssa_residuals']
+        grpidx = self._group_index(item)
 
-            # Reconstruct residual components
+        if grpidx is None:
 
-            ts = self._reconstruct_group(residx)
+            ts = self.ts
 
         else:
 
-            # item is not in the group names
-            raise IndexError("Unknown group name '{}'.".format(item))
+            ts = self._reconstruct_group(grpidx)
 
         return self._format_output_ts(ts)
 
@@ -216,6 +271,15 @@ class BaseSSA(object):
         """Returns the number of singular values"""
         return len(self.svd[1])
 
+    @property
+    def _svdsolver(self):
+        """SVD method actually used, the one selected if svdmethod='auto'"""
+
+        if self.svdmethod == 'auto' and self.svdplan is not None:
+            return self.svdplan['svdmethod']
+
+        return self.svdmethod
+
     @property
     def _SVD_METHODS_MAP(self):
         """Map user-selected performance method to the proper wrapper
@@ -224,7 +288,9 @@ class BaseSSA(object):
             'nplapack': self._nplapack_wrapper,
             'splapack': self._splapack_wrapper,
             'sparpack': self._sparpack_wrapper,
-            'skrandom': self._skrandom_wrapper
+            'skrandom': self._skrandom_wrapper,
+            'auto': self._auto_wrapper,
+            'eigen': self._eigen_wrapper
         }
         return svdmap
 
@@ -240,13 +306,352 @@ class BaseSSA(object):
         pass
 
     @abc.abstractmethod
-    def _reconstruct_group(self, grpidx):
-        """Group definition abstract method"""
+    def _reconstruct_components(self, idx, combine=True):
+        """Eigentriples reconstruction abstract method
+
+        Return the sum of the reconstructed components listed in idx as a 1d
+        array if combine is True, else each component as rows of a 2d array.
+        """
+        pass
+
+    @abc.abstractmethod
+    def _hankel_weights(self):
+        """Weights of the time series indexes in the trajectory matrix"""
         pass
 
+    def _ts_to_array(self, ts):
+        """Check the time series dimension and return its values"""
+
+        if not is_1darray_like(ts):
+            raise TypeError('Arguments \'ts\' should be 1 dimensional.')
+
+        return arraylike_to_nparray(ts)
+
+    def _crossproduct_matrix(self):
+        """Return the cross-product A A^T of the matrix A to be decomposed
+
+        Derived classes may override it with a faster computation.
+        """
+
+        a = np.asarray(self._svdmatrix(), dtype=self.dtype)
+
+        return np.dot(a, a.T)
+
+    def _svdoperator(self):
+        """Return the matrix to be decomposed as a linear operator
+
+        Used by the truncated solvers which only need matrix-vector products.
+        Derived classes may override it with a matrix-free operator.
+        """
+        return aslinearoperator(np.asarray(self._svdmatrix(),
+                                           dtype=self.dtype))
+
     # --------------------------------------------------------------------------
     # Public methods
 
+    @tracing.traced('svd')
+    def decompose(self, *args, **kwargs):
+        """Decompose the trajectory matrix
+
+        Apply the SVD method selected with `svdmethod` at initialization.
+
+        Parameters
+        ----------
+        elementary : bool, optional
+            If True, all the elementary reconstructed components are computed
+            in one batched pass and cached, so that reconstructing any group
+            only sums rows. Otherwise, they are computed the first time
+            to_frame or wcorr is called. Default is False.
+        lazy : bool, optional
+            If True, only the leading components are computed, `k` of them
+            or 10 by default. When reconstruct, wcorr, right_vectors or the
+            plots refer to a higher index, the decomposition is extended by
+            deflation: the next components are the leading ones of the
+            trajectory operator projected on the orthogonal complement of
+            the known left singular vectors. The number of components at
+            least doubles at each extension. Requires 'sparpack' or
+            'skrandom'. Default is False.
+        budget : int, optional
+            Memory limit of the decomposition in bytes, see self.plan. Dense
+            methods asked for full matrices are downgraded to economy
+            factors if needed, and MemoryBudgetError is raised if the
+            decomposition still exceeds the budget. Default is None, no
+            limit.
+        keep_right : bool, optional
+            If False, the right singular vectors are not stored, self.svd
+            holds None in their place and self.right_vectors recovers them
+            on demand from the left ones. The dense methods 'nplapack' and
+            'splapack' then never compute them: the left singular vectors
+            and the singular values are those of the eigendecomposition of
+            the cross-product matrix, see self._eigen_wrapper, or of the
+            economy SVD if the matrix to decompose has more rows than
+            columns. Default is True.
+        cache : DecompositionCache or bool, optional
+            Cache of decompositions, see `vassal.cache`. A decomposition of
+            the same values with the same class, window, SVD method and
+            arguments is restored from the cache without running the SVD,
+            its arrays being read-only. Randomized decompositions without
+            a random_state are not cached. Default is None, the cache set by
+            vassal.cache.enable if any. If False, no cache is used.
+        *args, **kwargs
+            Arguments passed to the wrapper of the SVD method, see
+            self._nplapack_wrapper, self._splapack_wrapper,
+            self._sparpack_wrapper, self._skrandom_wrapper and
+            self._auto_wrapper.
+
+        Returns
+        -------
+        svd : list
+            Left singular vectors, singular values and right singular vectors.
+
+        """
+
+        elementary = kwargs.pop('elementary', False)
+        lazy = kwargs.pop('lazy', False)
+        budget = kwargs.pop('budget', None)
+        keep_right = kwargs.pop('keep_right', True)
+        cache = kwargs.pop('cache', None)
+
+        if lazy:
+
+            if self.svdmethod not in ('sparpack', 'skrandom', 'auto'):
+                raise ValueError('Lazy decomposition requires svdmethod '
+                                 '\'sparpack\', \'skrandom\' or \'auto\'.')
+
+            if not args and kwargs.get('k') is None:
+                kwargs['k'] = min(self._LAZY_K,
+                                  min(self._svdoperator().shape) - 1)
+
+            # options reused by the extensions, starting vectors excepted
+
+            self._lazy = {key: value for key, value in kwargs.items()
+                          if key not in ('k', 'ncv', 'v0', 'q0')}
+
+        else:
+
+            self._lazy = None
+
+        # the budget is enforced before any allocation, 'auto' selects a
+        # method fitting in it
+
+        if self.svdmethod == 'auto':
+            if budget is not None:
+                kwargs['budget'] = budget
+            if not keep_right:
+                kwargs['keep_right'] = False
+
+        elif budget is not None:
+            args, kwargs = (), self._plan(args, kwargs, budget,
+                                          keep_right)['options']
+
+        if cache is None:
+            cache = svdcache.get_default()
+
+        key = None
+
+        if cache is not None and cache is not False:
+            key = cache.key(self, args, dict(kwargs, keep_right=keep_right))
+
+        entry = cache.get(key) if key is not None else None
+
+        if entry is not None:
+
+            self.svd = svd = list(entry[0])
+            self.svdplan = entry[1].get('svdplan')
+
+            tracing.annotate(cache='hit')
+
+        else:
+
+            wrapper = self._SVD_METHODS_MAP[self.svdmethod]
+
+            if not keep_right and self.svdmethod in costmodel.DENSE_METHODS:
+                svd = self._left_wrapper(wrapper, *args, **kwargs)
+            else:
+                svd = wrapper(*args, **kwargs)
+
+            # an unseeded randomized SVD is a new draw at each call
+
+            if key is not None and not self._unseeded(args, kwargs):
+                cache.put(key, svd, {'svdplan': self.svdplan})
+
+        if not keep_right:
+            self.svd = svd = [self.svd[0], self.svd[1], None]
+
+        tracing.annotate(svdmethod=self._svdsolver)
+
+        if elementary:
+            self._elementary_components()
+
+        return svd
+
+    def _unseeded(self, args, kwargs):
+        """Return True if the SVD applied is randomized without a seed"""
+
+        if self._svdsolver != 'skrandom':
+            return False
+
+        if self.svdmethod == 'skrandom':
+            kwargs = signature(self._skrandom_wrapper).bind(
+                *args, **kwargs).arguments
+
+        return kwargs.get('random_state') is None
+
+    def plan(self, *args, **kwargs):
+        """Plan a decomposition without running it
+
+        The size of the matrix to decompose, the number of components, the
+        operation count and the peak memory of the SVD method are estimated
+        with the model of `vassal.costmodel`, see costmodel.flops and
+        costmodel.memory. With `budget`, the plan is downgraded as decompose
+        would do it.
+
+        Parameters
+        ----------
+        *args, **kwargs
+            Arguments of decompose.
+
+        Returns
+        -------
+        plan : dict
+            'svdmethod' applied, 'shape' of the matrix to decompose, number
+            of components 'k', 'full_matrices' for dense methods, estimated
+            'flops' and peak 'memory' in bytes, 'stored' bytes of the kept
+            factors, 'budget', list of 'downgrades' applied to fit in it and
+            'options' passed to the wrapper of the SVD method.
+
+        Raises
+        ------
+        MemoryBudgetError
+            If the decomposition cannot fit in the budget.
+
+        Examples
+        --------
+
+        >>> from vassal.ssa import BasicSSA
+        >>> myssa = BasicSSA(np.random.rand(2000), window=100)
+        >>> plan = myssa.plan(budget=10 ** 7)
+        >>> plan['full_matrices'], plan['downgrades']
+        (False, ['full_matrices=False'])
+        >>> plan['memory'] <= 10 ** 7
+        True
+
+        """
+
+        kwargs.pop('elementary', None)
+        kwargs.pop('cache', None)
+        budget = kwargs.pop('budget', None)
+        keep_right = kwargs.pop('keep_right', True)
+
+        lazy = kwargs.pop('lazy', False)
+
+        if lazy and not args and kwargs.get('k') is None:
+            kwargs['k'] = min(self._LAZY_K,
+                              min(self._svdoperator().shape) - 1)
+
+        return self._plan(args, kwargs, budget, keep_right, lazy)
+
+    def right_vectors(self, components=None):
+        """Return the right singular vectors
+
+        Stored right singular vectors are returned if available. Otherwise,
+        e.g. with svdmethod='eigen', they are recovered from the left
+        singular vectors as :math:`v_i = A^T u_i / s_i`, A being the matrix
+        that was decomposed.
+
+        Parameters
+        ----------
+        components : None, int or array-like, optional
+            Components to return: all of them if None (default), the
+            `components` first ones if int, or the listed indexes.
+
+        Returns
+        -------
+        v : np.ndarray
+            Right singular vectors as rows.
+
+        """
+
+        if components is None:
+            idx = list(range(self._n_components))
+        elif isinstance(components, int):
+            idx = list(range(components))
+        else:
+            idx = list(components)
+
+        self._ensure_components(max(idx, default=-1) + 1)
+
+        n = self._n_components
+
+        if not set(idx).issubset(range(n)):
+            raise IndexError('Components are out of range.')
+
+        if self.svd[2] is not None:
+            return np.asarray(self.svd[2])[idx]
+
+        u = np.asarray(self.svd[0])[:, idx]
+        s = self.svd[1][idx]
+
+        # null singular values have no defined right vector, zeros are used
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            v = self._svdoperator().rmatmat(u) / s
+
+        v[:, s == 0] = 0.
+
+        return v.T
+
+    def warm_start_kwargs(self, svd, n_iter=None):
+        """Return decompose arguments warm-starting from a previous svd
+
+        When the series changes little, e.g. for overlapping windows or
+        between gap filling iterations, its subspace is close to the one of
+        the previous decomposition `svd` and the truncated solvers converge
+        faster starting from it:
+
+        * 'sparpack': the ARPACK starting vector `v0` combines the previous
+          leading singular vectors, weighted by the singular values. ARPACK
+          still restarts until convergence, so few products are saved,
+        * 'skrandom': the range finder starts from the previous left
+          singular vectors projected on the new trajectory matrix, `q0`, and
+          runs `n_iter` power iterations, a single one by default.
+
+        Parameters
+        ----------
+        svd : list
+            Previous decomposition, as self.svd, with the same window.
+        n_iter : int, optional
+            Number of power iterations of 'skrandom'. Default is 1.
+
+        Returns
+        -------
+        kwargs : dict
+            Arguments of decompose, empty if svdmethod is not 'sparpack' or
+            'skrandom'.
+
+        """
+
+        if self.svdmethod not in ('sparpack', 'skrandom'):
+            return {}
+
+        u = np.asarray(svd[0])[:, :len(svd[1])]
+        s = svd[1]
+
+        op = self._svdoperator()
+
+        if self.svdmethod == 'sparpack':
+
+            # ARPACK iterates in the smallest dimension
+
+            v0 = np.dot(u, s / s.max())
+
+            if op.shape[0] > op.shape[1]:
+                v0 = op.rmatvec(v0)
+
+            return {'v0': v0}
+
+        return {'q0': op.rmatmat(u), 'n_iter': 1 if n_iter is None else n_iter}
+
     def reconstruct(self, groups=None, append=False, overwrite=False):
         """Reconstruct components based on eigentriples indexes. 
         
@@ -300,6 +705,10 @@ class BaseSSA(object):
 
         flat_grpidx = nested2d_to_flatlist(groups.values())
 
+        self._ensure_components(max(flat_grpidx, default=-1) + 1)
+
+        n = self._n_components
+
         if not all([i < n for i in flat_grpidx]):
             raise IndexError('Group indexes cannot exceed the highest '
                              'component index {}.'.format(n - 1))
@@ -336,6 +745,12 @@ class BaseSSA(object):
     def to_frame(self):
         """Return DataFrame with all signals"""
         # TODO: np.array equivalent
+
+        # compute all the elementary components at once, groups sum rows
+
+        if self.svd[1] is not None:
+            self._elementary_components()
+
         df = pd.DataFrame()
         for name in self.groups.keys():
             df[name] = self.__getitem__(name)
@@ -344,6 +759,311 @@ class BaseSSA(object):
     # --------------------------------------------------------------------------
     # Private methods
 
+    @tracing.traced('reconstruct')
+    def _reconstruct_group(self, idx):
+        """Reconstruct the time series of a group of eigentriples
+
+        Rows of the elementary components are summed if they are cached,
+        otherwise the group is reconstructed directly.
+        """
+
+        if isinstance(idx, int):
+            idx = [idx]
+
+        elementary = self._cached('elementary', self._elementary_key())
+
+        if elementary is not None:
+            return elementary[list(idx)].sum(axis=0)
+
+        return self._reconstruct_components(idx)
+
+    def _extended_index(self, values, p):
+        """Return the pandas index extended with the index of values"""
+
+        tsindex = self._tsindex
+
+        if tsindex is None:
+
+            newindex = None
+
+        elif isinstance(values, pd.Series):
+
+            newindex = pd.Index(tsindex).append(values.index)
+
+        elif isinstance(tsindex, range):
+
+            newindex = range(tsindex.start, tsindex.stop + p * tsindex.step,
+                             tsindex.step)
+
+        elif isinstance(tsindex, pd.RangeIndex):
+
+            newindex = pd.RangeIndex(tsindex.start,
+                                     tsindex.stop + p * tsindex.step,
+                                     tsindex.step, name=tsindex.name)
+
+        elif isinstance(tsindex, pd.DatetimeIndex) and tsindex.freq:
+
+            newindex = tsindex.append(pd.date_range(
+                tsindex[-1], periods=p + 1, freq=tsindex.freq)[1:])
+
+        else:
+
+            raise TypeError('Argument \'values\' should be a pd.Series to '
+                            'extend the time series index.')
+
+        return newindex
+
+    def _elementary_components(self):
+        """Return all the elementary reconstructed components
+
+        The components are computed in one batched pass and cached until the
+        next decomposition.
+
+        Returns
+        -------
+        elementary : np.ndarray
+            Array of shape (r, N), row i being the time series reconstructed
+            from eigentriple i.
+
+        """
+
+        n = self._n_components
+
+        return self._cached(
+            'elementary', self._elementary_key(),
+            lambda: self._reconstruct_components(range(n), combine=False))
+
+    def _elementary_key(self):
+        """Cache key of the elementary components"""
+        return self.svd[0], self.ts, getattr(self, 'window', None)
+
+    def _plan(self, args, kwargs, budget=None, keep_right=True, lazy=False):
+        """Plan a decomposition with the wrapper arguments, see self.plan"""
+
+        shape = self._svdoperator().shape
+        itemsize = self.dtype.itemsize
+        method = self.svdmethod
+
+        if method == 'auto':
+
+            options = dict(kwargs)
+            options.pop('budget', None)
+            k = args[0] if args else options.get('k')
+            methods = costmodel.TRUNCATED_METHODS if lazy else None
+
+            method = costmodel.plan(shape, k=k, methods=methods,
+                                    budget=budget,
+                                    itemsize=itemsize)['svdmethod']
+
+            if method in costmodel.DENSE_METHODS:
+                options['full_matrices'] = False
+
+        else:
+
+            bound = signature(self._SVD_METHODS_MAP[method]).bind(*args,
+                                                                   **kwargs)
+            bound.apply_defaults()
+            options = dict(bound.arguments)
+
+        m, n = shape
+        full = options.get('full_matrices', False)
+
+        # without right vectors, dense methods run the economy SVD or the
+        # cross-product eigendecomposition, see self._left_wrapper
+
+        model = method
+
+        if not keep_right and method in costmodel.DENSE_METHODS:
+            full = False
+            if 'full_matrices' in options:
+                options['full_matrices'] = False
+            if m <= n:
+                model = 'eigen'
+
+        if method in ('eigh', 'eigh_topk') and m != n:
+            raise ValueError(
+                'svdmethod \'{}\' requires a symmetric matrix to decompose, '
+                'got shape {}.'.format(method, shape))
+
+        # number of components computed
+
+        if method in ('sparpack', 'skrandom'):
+            k = options.get('k') or min(shape) - 1
+        elif method == 'eigh_topk':
+            k = options.get('k') or m
+        elif method in ('eigh', 'eigen') or model == 'eigen':
+            k = m
+        else:
+            k = max(m, n) if full else min(m, n)
+
+        def estimate():
+            peak = costmodel.memory(model, shape, k, full, itemsize)
+            if method in ('eigh', 'eigh_topk', 'eigen'):
+                rows = m if keep_right and method != 'eigen' else 0
+                stored = k * (m + 1 + rows)
+            elif full:
+                stored = m * m + min(m, n) + (n * n if keep_right else 0)
+            else:
+                stored = k * (m + 1 + (n if keep_right else 0))
+            return peak, itemsize * stored
+
+        peak, stored = estimate()
+
+        downgrades = []
+
+        if budget is not None and peak > budget and full:
+            full = options['full_matrices'] = False
+            k = min(m, n)
+            downgrades.append('full_matrices=False')
+            peak, stored = estimate()
+
+        if budget is not None and peak > budget:
+            raise MemoryBudgetError(
+                'svdmethod {!r} needs about {} bytes to decompose a {} '
+                'matrix, over the budget of {} bytes. Use \'sparpack\' or '
+                '\'skrandom\' with fewer components.'.format(
+                    method, peak, shape, budget))
+
+        return {'svdmethod': method,
+                'shape': tuple(shape),
+                'k': int(k),
+                'full_matrices': full if method in costmodel.DENSE_METHODS
+                else None,
+                'flops': costmodel.flops(model, shape, k, full),
+                'memory': int(peak),
+                'stored': int(stored),
+                'budget': budget,
+                'downgrades': downgrades,
+                'options': options}
+
+    def _ensure_components(self, n):
+        """Extend a lazy decomposition to at least n components
+
+        Does nothing if the decomposition is not lazy, or if n components are
+        computed already or cannot be computed.
+        """
+
+        if self._lazy is None or self.svd[1] is None:
+            return
+
+        r = self._n_components
+
+        x = self._svdoperator()
+        nmax = min(x.shape) - 1
+
+        if n <= r or r >= nmax:
+            return
+
+        # the number of components at least doubles so that successive
+        # requests cost a few extensions
+
+        k = min(max(n, 2 * r), nmax) - r
+
+        u0 = np.asarray(self.svd[0])[:, :r]
+        deflated = tracing.counting(DeflatedOperator(x, u0))
+
+        solver = _svds if self._svdsolver == 'sparpack' else randomized_svd
+
+        accepted = signature(solver).parameters
+        options = {key: value for key, value in self._lazy.items()
+                   if key in accepted}
+
+        with tracing.stage(self, 'svd_extend', svdmethod=self._svdsolver,
+                           k=k):
+
+            if solver is _svds:
+                u, s, v = _svds(deflated, k, **options)
+            else:
+                options.setdefault('random_state', np.random.RandomState())
+                u, s, v = randomized_svd(deflated, n_components=k, **options)
+
+            tracing.annotate(output=[u, s, v],
+                             iterations=getattr(deflated, 'products', None))
+
+        if self.svd[2] is not None:
+            v = np.vstack([self.svd[2][:r], v])
+        else:
+            v = None
+
+        self.svd = [np.hstack([u0, u]), np.concatenate([self.svd[1][:r], s]),
+                    v]
+
+    def _group_index(self, item):
+        """Return the eigentriple indexes of a group name
+
+        None is returned for 'ssa_original' which is not a reconstruction.
+        """
+
+        if not isinstance(item, str):
+            raise TypeError('Item index should be type str.')
+
+        if self._usergroups and item in self._usergroups.keys():
+
+            grpidx = self.groups[item]
+
+        elif item == 'ssa_original':
+
+            grpidx = None
+
+        elif item == 'ssa_reconstruction':
+
+            # All the components
+
+            grpidx = range(self._n_components)
+
+        elif item == 'ssa_residuals':
+
+            # Get residuals components indexes
+
+            grpidx = self.groups['ssa_residuals']
+
+        else:
+
+            # item is not in the group names
+            raise IndexError("Unknown group name '{}'.".format(item))
+
+        return grpidx
+
+    def _cached(self, name, key, builder=None):
+        """Return a cached intermediate result, building it if needed.
+
+        Results are stored by `name` along with the `key` they were built for.
+        Arrays in `key` are compared by identity and any other item by
+        equality, so that replacing ``self.ts`` or changing ``self.window``
+        invalidates the cached value while in-place modifications are not
+        tracked.
+
+        Parameters
+        ----------
+        name : str
+            Name of the cached result.
+        key : tuple
+            Objects the result depends on.
+        builder : callable or None
+            Function without arguments computing the result. If None, the
+            cache is only looked up and None is returned on a miss.
+
+        Returns
+        -------
+        value : object
+            The cached or newly built result.
+
+        """
+
+        entry = self._cache.get(name)
+
+        if entry is not None and _same_cache_key(entry[0], key):
+            return entry[1]
+
+        if builder is None:
+            return None
+
+        value = builder()
+
+        self._cache[name] = (key, value)
+
+        return value
+
     def _format_output_ts(self, ts):
 
         # if usetype == pdseries, conversion to pd.Series type
@@ -353,13 +1073,25 @@ class BaseSSA(object):
 
         return ts
 
+    @tracing.traced('wcorr')
     def wcorr(self, components=None):
         """Compute the weighted correlation matrix
 
-        See equation in ref [1], paragraph separability
+        See equation in ref [1], paragraph separability. The weight of each
+        time index is the number of times it appears in the trajectory
+        matrix, and the matrix is computed as a single weighted Gram product.
+
+        Parameters
+        ----------
+        components : None, int or array-like, optional
+            Components to correlate: all of them if None (default), the
+            `components` first ones if int, or the listed indexes.
 
         Returns
         -------
+        wcorr : np.ndarray
+            Symmetric matrix of shape (n, n), n being the number of selected
+            components.
 
         References
         ----------
@@ -394,70 +1126,30 @@ class BaseSSA(object):
             raise TypeError('components should be either None, int or '
                             'array-like.')
 
-        # check if components exists
-
-        if not set(comp_idx).issubset(range(ncp)):
-            raise IndexError('Components are out of range.')
-
-        # retrieve the maximum number of components
-
-        ncp_max = len(comp_idx)
+        # extend a lazy decomposition and check if components exists
 
-        # get the original matrix
+        comp_idx = list(comp_idx)
 
-        x = self._embedseries()
-        row, col = x.shape
+        self._ensure_components(max(comp_idx, default=-1) + 1)
 
-        # series length
-
-        nts = self._n_ts
-
-        w_k = np.min((col, row, nts - col)) * np.ones(nts)
-
-        # intialize w-corr upper right matrix
-
-        wcorr_ur = np.zeros(shape=(ncp_max, ncp_max))
-
-        # reconstruction of selected components
-
-        tsn = np.array([self._reconstruct_group(i) for i in range(ncp_max)])
-
-        # diag offsets
-
-        offsets = range(ncp_max)
-
-        # we compute wcorr using an indices based lagged convolution
-        # doing so we compute the upper right correlation matrix
-        # then we perform the symmetry
-
-        for offset in offsets:
-            lagged_tsn = np.array([tsn[offset:, :], tsn[:ncp_max - offset, :]])
-
-            # weighted sum for components i j lagged by offset
-            # see reference for equation
-
-            wsum_ij = np.sum(w_k * np.product(lagged_tsn, axis=0), axis=1)
-            sqrtwsum_i = np.sqrt(np.sum(w_k * lagged_tsn[0] ** 2, axis=1))
-            sqrtwsum_j = np.sqrt(np.sum(w_k * lagged_tsn[1] ** 2, axis=1))
-
-            rho = wsum_ij / (sqrtwsum_i * sqrtwsum_j)
-
-            # wcorr offset diagonal axis 0 coordinate
-
-            drng = np.array(offsets[:len(rho)])
-            wcorr_ur[drng, drng + offset] = rho
+        ncp = self._n_components
 
-        # get lower left symmetry
+        if not set(comp_idx).issubset(range(ncp)):
+            raise IndexError('Components are out of range.')
 
-        wcorr_ll = wcorr_ur.T.copy()
+        # reconstruction of selected components, from the elementary
+        # components if they are cached
 
-        # remove diagonal values of lower left triangular matrix
+        elementary = self._cached('elementary', self._elementary_key())
 
-        np.fill_diagonal(wcorr_ll, 0.)
+        if elementary is not None:
+            tsn = elementary[comp_idx]
+        else:
+            tsn = self._reconstruct_components(comp_idx, combine=False)
 
-        # restore symmetry by addition of upperright and lower left
+        # weighted Gram matrix of the components
 
-        wcorr = wcorr_ur + wcorr_ll
+        wcorr = weighted_correlation(tsn, self._hankel_weights())
 
         return wcorr
 
@@ -497,7 +1189,7 @@ class BaseSSA(object):
 
         # saving performance
 
-        self.svd = [np.matrix(u), s, np.matrix(v)]
+        self.svd = [u, s, v]
 
         return self.svd
 
@@ -534,9 +1226,10 @@ class BaseSSA(object):
             
 
         """
-        # Matrix to be decomposed
+        # Matrix to be decomposed, copied into a Fortran ordered buffer that
+        # LAPACK is allowed to overwrite
 
-        x = self._svdmatrix()
+        x = np.asfortranarray(self._svdmatrix())
 
         # Decomposition
 
@@ -546,7 +1239,7 @@ class BaseSSA(object):
                            check_finite=check_finite,
                            lapack_driver=lapack_driver)
 
-        self.svd = [np.matrix(u), s, np.matrix(v)]
+        self.svd = [u, s, v]
 
         return self.svd
 
@@ -554,7 +1247,8 @@ class BaseSSA(object):
         """Wrapper for scipy.sparse.linalg.svds
 
         Apply Singular Value Decomposition to the embedding matrix of shape 
-        (`M`, `N`) using the `scipy.sparse.linalg.svds`_ algorithm.
+        (`M`, `N`) using the `scipy.sparse.linalg.svds`_ algorithm on the
+        matrix-free operator returned by self._svdoperator.
 
         Parameters
         ----------
@@ -580,34 +1274,32 @@ class BaseSSA(object):
         https://docs.scipy.org/doc/scipy/reference/generated/scipy.linalg.performance.html
 
         """
-        # Matrix to be decomposed
+        # Matrix-free operator of the matrix to be decomposed
 
-        x = csc_matrix(self._svdmatrix())
+        x = tracing.counting(self._svdoperator())
 
         # Default k value is full performance
 
         if k is None:
             k = min(x.shape) - 1
 
-        u, s, v = sparpack(x, k=k, ncv=ncv, tol=tol, which='LM', v0=v0,
-                           maxiter=maxiter, return_singular_vectors=True)
-
-        # with this implementation vectors needs to be flipped to match lapack
-        # other format and sign ambiguities have to be solved to force
-        # deterministic output with svd_flip
+        u, s, v = _svds(x, k, ncv=ncv, tol=tol, v0=v0, maxiter=maxiter)
 
-        u, v = svd_flip(u[:, ::-1], v[::-1, :])
+        tracing.annotate(iterations=getattr(x, 'products', None))
 
-        self.svd = [np.matrix(u), s[::-1], np.matrix(v)]
+        self.svd = [u, s, v]
 
         return self.svd
 
     def _skrandom_wrapper(self, k=None, n_oversamples=10, n_iter='auto',
-                          power_iteration_normalizer='auto', random_state=None):
+                          power_iteration_normalizer='auto', random_state=None,
+                          q0=None):
         """Wrapper to sklearn.utils.extmath.randomized_svd
         
         Apply Singular Value Decomposition to the embedding matrix of shape 
         (`M`, `N`) using the `sklearn.utils.extmath.randomized_svd`_ algorithm. 
+        The algorithm is ported in `vassal.linalg.randomized_svd` so that it
+        runs on the matrix-free operator returned by self._svdoperator.
             
         Parameters
         ----------
@@ -640,6 +1332,12 @@ class BaseSSA(object):
             generator; If RandomState instance, random_state is the random number
             generator; If None, the random number generator is the RandomState
             instance used by `np.random`.
+        q0 : ndarray, optional
+            Initial block of the range finder, of shape (`N`, p), to
+            warm-start the decomposition from a previous subspace, e.g. the
+            product of the transposed matrix with approximate left singular
+            vectors. Random columns complete it. Default is None, a random
+            block.
             
         See Also
         -------
@@ -653,9 +1351,9 @@ class BaseSSA(object):
 
         """
 
-        # Matrix to be decomposed
+        # Matrix-free operator of the matrix to be decomposed
 
-        x = csc_matrix(self._svdmatrix())
+        x = tracing.counting(self._svdoperator())
 
         # if k is None get the maximum
 
@@ -665,16 +1363,270 @@ class BaseSSA(object):
         if random_state is None:
             random_state = np.random.RandomState()
 
-        # Sklearn randomized performance decomposition
+        # Randomized performance decomposition, operator based port of
+        # sklearn algorithm
 
         u, s, v = randomized_svd(x, n_components=k, n_oversamples=n_oversamples,
                                  n_iter=n_iter,
                                  power_iteration_normalizer=power_iteration_normalizer,
-                                 transpose=False, flip_sign=True,
-                                 random_state=random_state)
+                                 random_state=random_state, q0=q0)
+
+        tracing.annotate(iterations=getattr(x, 'products', None))
 
         # store output
 
-        self.svd = [np.matrix(u), s, np.matrix(v)]
+        self.svd = [u, s, v]
+
+        return self.svd
+
+    def _auto_wrapper(self, k=None, **kwargs):
+        """Select and apply the fastest SVD method
+
+        The time and memory of 'nplapack', 'splapack', 'sparpack' and
+        'skrandom' are estimated with the calibrated cost model of
+        `vassal.costmodel`, and the fastest method fitting in the available
+        memory is applied. The decision is recorded in self.svdplan.
+
+        Parameters
+        ----------
+        k : int, optional
+            Number of components needed. If None, the full spectrum is
+            computed by a dense method.
+        budget : int, optional
+            Memory limit in bytes, the available physical memory by default.
+            If given, MemoryBudgetError is raised when no method fits in it.
+        keep_right : bool, optional
+            If False, dense methods do not compute the right singular
+            vectors, see self._left_wrapper. Default is True.
+        **kwargs
+            Options passed to the selected wrapper if it accepts them, e.g.
+            random_state or tol.
+
+        """
+
+        budget = kwargs.pop('budget', None)
+        keep_right = kwargs.pop('keep_right', True)
+
+        shape = self._svdoperator().shape
+
+        if self._lazy is not None:
+            methods = costmodel.TRUNCATED_METHODS
+        else:
+            methods = None
+
+        self.svdplan = costmodel.plan(shape, k=k, methods=methods,
+                                      budget=budget,
+                                      itemsize=self.dtype.itemsize)
+
+        if budget is not None and self.svdplan['memory'] > budget:
+            raise MemoryBudgetError(
+                'No SVD method can decompose a {} matrix within the budget '
+                'of {} bytes.'.format(shape, budget))
+
+        method = self.svdplan['svdmethod']
+        wrapper = self._SVD_METHODS_MAP[method]
+
+        accepted = signature(wrapper).parameters
+        options = {key: value for key, value in kwargs.items()
+                   if key in accepted}
+
+        if method in costmodel.DENSE_METHODS:
+
+            options.setdefault('full_matrices', False)
+
+            if keep_right:
+                u, s, v = wrapper(**options)
+            else:
+                u, s, v = self._left_wrapper(wrapper, **options)
+
+            # keep the components needed only
+
+            if k is not None:
+                self.svd = [u[:, :k], s[:k], None if v is None else v[:k]]
+
+        else:
+
+            wrapper(k=k, **options)
+
+        return self.svd
+
+    def _left_wrapper(self, wrapper, *args, **kwargs):
+        """Left singular vectors and singular values of a dense method
+
+        The right singular vectors are never computed. If the matrix to
+        decompose of shape (`M`, `N`) has `M` <= `N`, e.g. the trajectory
+        matrix of a window shorter than half the series, its cross-product
+        matrix of shape (`M`, `M`) is eigendecomposed with
+        self._eigen_wrapper. Otherwise `wrapper` computes the economy SVD,
+        whose right factor of shape (`N`, `N`) is the smaller one, and it is
+        dropped.
+
+        Parameters
+        ----------
+        wrapper : callable
+            Wrapper of the dense SVD method, self._nplapack_wrapper or
+            self._splapack_wrapper.
+        *args, **kwargs
+            Arguments of `wrapper`. `full_matrices` is ignored.
+
+        """
+
+        m, n = self._svdoperator().shape
+
+        if m <= n:
+            return self._eigen_wrapper()
+
+        bound = signature(wrapper).bind(*args, **kwargs)
+        bound.arguments['full_matrices'] = False
+
+        u, s, v = wrapper(**bound.arguments)
+
+        self.svd = [u, s, None]
+
+        return self.svd
+
+    def _eigh_wrapper(self, check_finite=False, driver=None):
+        """Wrapper for scipy.linalg.eigh
+
+        Registered as svdmethod 'eigh' by classes decomposing a symmetric
+        matrix only.
+
+        Apply a symmetric eigendecomposition to the matrix of shape (`M`, `M`)
+        to be decomposed, e.g. the lag-covariance matrix of Toeplitz SSA,
+        using the `scipy.linalg.eigh`_ algorithm. The eigendecomposition is
+        converted to SVD outputs sorted by decreasing singular values, with
+        the sign convention of the other wrappers.
+
+        Parameters
+        ----------
+        check_finite : bool, optional
+            Whether to check that the input matrix contains only finite
+            numbers. Default is False.
+        driver : str, optional
+            LAPACK driver to be used, see `scipy.linalg.eigh`_. Default is
+            None, the driver selected by scipy.
+
+        See Also
+        --------
+
+        .. _`scipy.linalg.eigh`:
+           https://docs.scipy.org/doc/scipy/reference/generated/scipy.linalg.eigh.html
+
+        """
+
+        # Symmetric matrix to be decomposed, as a buffer that LAPACK is
+        # allowed to overwrite
+
+        x = self._symmetric_svdmatrix()
+
+        w, u = eigh(x, overwrite_a=True, check_finite=check_finite,
+                    driver=driver)
+
+        u, s, v = eigh_to_svd(w, u)
+
+        self.svd = [u, s, v]
+
+        return self.svd
+
+    def _eigh_topk_wrapper(self, k=None, check_finite=False, driver=None):
+        """Wrapper for scipy.linalg.eigh restricted to the top k eigenpairs
+
+        Same as self._eigh_wrapper except that only the `k` largest
+        eigenvalues and their eigenvectors are computed, using the
+        `subset_by_index` option of `scipy.linalg.eigh`_.
+
+        Parameters
+        ----------
+        k : int, optional
+            Number of eigenpairs to compute. Default is None, the full
+            spectrum.
+        check_finite : bool, optional
+            Whether to check that the input matrix contains only finite
+            numbers. Default is False.
+        driver : str, optional
+            LAPACK driver to be used, one of 'evr' or 'evx' for subsets.
+            Default is None, the driver selected by scipy.
+
+        See Also
+        --------
+
+        .. _`scipy.linalg.eigh`:
+           https://docs.scipy.org/doc/scipy/reference/generated/scipy.linalg.eigh.html
+
+        """
+
+        x = self._symmetric_svdmatrix()
+
+        m = x.shape[0]
+
+        if k is None:
+            k = m
+
+        if not 1 <= k <= m:
+            raise ValueError('k should be in range [1, {}], got {}.'.format(
+                m, k))
+
+        w, u = eigh(x, overwrite_a=True, check_finite=check_finite,
+                    driver=driver, subset_by_index=[m - k, m - 1])
+
+        u, s, v = eigh_to_svd(w, u)
+
+        self.svd = [u, s, v]
+
+        return self.svd
+
+    def _eigen_wrapper(self, check_finite=False, driver=None):
+        """Full SVD via eigendecomposition of the cross-product matrix
+
+        Equivalent of the 'eigen' method of the Rssa package. The singular
+        values and left singular vectors of the matrix A to be decomposed are
+        obtained from the eigendecomposition of A A^T with
+        `scipy.linalg.eigh`_. Right singular vectors are not stored: self.svd
+        holds None in their place and they are recovered on demand with
+        self.right_vectors.
+
+        For BasicSSA the (L, L) cross-product matrix is computed in
+        O(N log N + L^2) and its eigendecomposition costs O(L^3) whatever the
+        series length, which is fast for long series with small windows.
+
+        Parameters
+        ----------
+        check_finite : bool, optional
+            Whether to check that the input matrix contains only finite
+            numbers. Default is False.
+        driver : str, optional
+            LAPACK driver to be used, see `scipy.linalg.eigh`_. Default is
+            None, the driver selected by scipy.
+
+        See Also
+        --------
+
+        .. _`scipy.linalg.eigh`:
+           https://docs.scipy.org/doc/scipy/reference/generated/scipy.linalg.eigh.html
+
+        """
+
+        x = self._crossproduct_matrix()
+
+        w, u = eigh(x, overwrite_a=True, check_finite=check_finite,
+                    driver=driver)
+
+        # eigenvalues of A A^T are the squared singular values of A
+
+        u, w, _ = eigh_to_svd(w, u)
+
+        self.svd = [u, np.sqrt(w), None]
+
+        return self.svd
+
+    def _symmetric_svdmatrix(self):
+        """Return a copy of the matrix to be decomposed, checked square"""
+
+        x = np.array(self._svdmatrix(), dtype=self.dtype)
+
+        if x.shape[0] != x.shape[1]:
+            raise ValueError(
+                'svdmethod \'{}\' requires a symmetric matrix to decompose, '
+                'got shape {}.'.format(self.svdmethod, x.shape))
 
-        return self.svd
\ No newline at end of file
+        return x
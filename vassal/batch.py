@@ -0,0 +1,479 @@
+"""Batch Singular Spectrum Analysis of many time series
+
+"""
+
+import os
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from threadpoolctl import threadpool_limits
+
+from vassal.dtypes import is_valid_group_dict, nested2d_to_flatlist
+from vassal.linalg import autocovariance, hankelize_outer
+from vassal.ssa import ssa
+
+BatchResult = namedtuple('BatchResult', ['singular_values', 'reconstructions',
+                                         'groups', 'errors'])
+BatchResult.__doc__ = """Results of `vassal.batch`
+
+singular_values : np.ndarray
+    Singular values of each series, shape (B, r), padded with NaN.
+reconstructions : np.ndarray or list of np.ndarray
+    Reconstructed groups of each series, shape (B, G, N) if all the series
+    have the same length, else list of B arrays of shape (G, N_i). Rows of
+    failed series are NaN.
+groups : list of str
+    Names of the G reconstructed groups.
+errors : dict
+    Error message of each failed series, by series position.
+"""
+
+
+# Approximate size of the trajectory tensors of a stacked chunk, in bytes
+
+_STACKED_CHUNK_BYTES = 2 ** 26
+
+
+def batch(series, kind='basic', svdmethod='nplapack', groups=None,
+          n_jobs=None, decompose_kw=None, mode='pool', **kwargs):
+    """Decompose and reconstruct many time series across a process pool
+
+    Every series is analyzed with the same settings, as
+    ``ssa(ts, kind, svdmethod, **kwargs)`` followed by decompose and
+    reconstruct. Input values and results are exchanged with the worker
+    processes through shared memory, only series positions are pickled.
+    Workers are limited to one BLAS thread each so that the pool saturates
+    the cores without oversubscription. A failing series is reported in the
+    errors of the result and does not abort the batch.
+
+    For many short series of equal length, the per-object overhead
+    dominates the SVD itself. The 'stacked' mode skips the SSA objects: the
+    series are embedded in one (B, L, K) strided trajectory tensor,
+    decomposed by a single stacked LAPACK call and all the groups are
+    hankelized in batch. It supports 'basic' and 'toeplitz' kinds with the
+    full 'nplapack' SVD.
+
+    Parameters
+    ----------
+    series : 2d array-like or iterable of 1d array-like
+        The time series, one per row for 2d arrays.
+    kind : str, optional
+        Kind of SSA, see `vassal.ssa`. Default is 'basic'.
+    svdmethod : str, optional
+        SVD method, see `vassal.ssa`. Default is 'nplapack'.
+    groups : dict, optional
+        User defined groups passed to the reconstruct method. If None,
+        only 'ssa_reconstruction' is computed.
+    n_jobs : int, optional
+        Number of worker processes. Default is None, the number of CPUs. If
+        1, series are processed in the calling process.
+    decompose_kw : dict, optional
+        Arguments passed to the decompose method, ignored in 'stacked'
+        mode.
+    mode : str, optional
+        'pool' (default) to process SSA objects in worker processes, or
+        'stacked' to decompose equal-length series with stacked arrays in
+        the calling process.
+    **kwargs
+        Arguments passed to the SSA class, e.g. window.
+
+    Returns
+    -------
+    result : BatchResult
+        Singular values, reconstructions, group names and errors, in input
+        order.
+
+    Examples
+    --------
+
+    >>> np.random.seed(0)
+    >>> x = np.random.rand(4, 100)
+    >>> result = batch(x, groups={'trend': 0}, n_jobs=1, window=10)
+    >>> result.groups
+    ['ssa_reconstruction', 'trend', 'ssa_residuals']
+    >>> result.reconstructions.shape
+    (4, 3, 100)
+    >>> stacked = batch(x, groups={'trend': 0}, mode='stacked', window=10)
+    >>> np.allclose(stacked.reconstructions, result.reconstructions)
+    True
+
+    """
+
+    if mode not in ('pool', 'stacked'):
+        raise ValueError('mode should be \'pool\' or \'stacked\', got '
+                         '{!r}.'.format(mode))
+
+    values, offsets = _pack(series)
+    nseries = len(offsets) - 1
+    lengths = np.diff(offsets)
+
+    names = ['ssa_reconstruction']
+
+    if groups:
+        names += list(groups) + ['ssa_residuals']
+
+    # maximum number of singular values over the series
+
+    window = kwargs.get('window')
+    nsv = [_n_singular_values(n, window, kind) for n in lengths]
+    rmax = max(nsv) if nsv else 0
+
+    if mode == 'stacked':
+        return _batch_stacked(values, lengths, kind, svdmethod, groups,
+                              names, rmax, **kwargs)
+
+    params = dict(kind=kind, svdmethod=svdmethod, groups=groups, names=names,
+                  decompose_kw=decompose_kw or {}, kwargs=kwargs)
+
+    shapes = {'values': values.shape,
+              'offsets': offsets.shape,
+              'singular_values': (nseries, rmax),
+              'reconstructions': (len(names) * len(values),)}
+
+    if n_jobs is None:
+        n_jobs = os.cpu_count() or 1
+
+    if n_jobs == 1 or nseries <= 1:
+
+        arrays = {'values': values, 'offsets': offsets}
+        arrays.update({name: np.full(shapes[name], np.nan)
+                       for name in ('singular_values', 'reconstructions')})
+
+        errors = _process(arrays, range(nseries), params)
+
+    else:
+
+        arrays, errors = _process_pool(values, offsets, shapes, params,
+                                       n_jobs)
+
+    errors = dict(errors)
+
+    # compact outputs, series i occupies a (G, N_i) block
+
+    rcflat = arrays['reconstructions']
+    blocks = [rcflat[len(names) * offsets[i]:len(names) * offsets[i + 1]]
+              .reshape(len(names), lengths[i]) for i in range(nseries)]
+
+    if nseries and np.all(lengths == lengths[0]):
+        reconstructions = rcflat.reshape(nseries, len(names), lengths[0])
+    else:
+        reconstructions = blocks
+
+    return BatchResult(arrays['singular_values'], reconstructions, names,
+                       errors)
+
+
+def _n_singular_values(n, window, kind):
+    """Return the number of singular values of a full decomposition"""
+
+    if not n:
+        return 0
+
+    window = window or n // 2
+
+    if kind == 'toeplitz':
+        return window
+
+    return min(window, n - window + 1)
+
+
+def _batch_stacked(values, lengths, kind, svdmethod, groups, names, rmax,
+                   window=None, **kwargs):
+    """Decompose equal-length series with stacked arrays"""
+
+    if kind not in ('basic', 'toeplitz'):
+        raise ValueError('Stacked mode supports \'basic\' and \'toeplitz\' '
+                         'kinds, got {!r}.'.format(kind))
+
+    if svdmethod != 'nplapack':
+        raise ValueError('Stacked mode supports the \'nplapack\' svdmethod '
+                         'only, got {!r}.'.format(svdmethod))
+
+    if kwargs:
+        raise TypeError('Unexpected arguments for stacked mode: {}.'.format(
+            ', '.join(sorted(kwargs))))
+
+    nseries = len(lengths)
+
+    if nseries and np.any(lengths != lengths[0]):
+        raise ValueError('Stacked mode requires series of equal length.')
+
+    n = int(lengths[0]) if nseries else 0
+    window = window or n // 2
+
+    if nseries and not 1 <= window <= n:
+        raise ValueError('Window should be in range [1, {}], got {}.'.format(
+            n, window))
+
+    grpidx = _stacked_group_indexes(groups, names, rmax)
+
+    x = values.reshape(nseries, n)
+
+    singular_values = np.full((nseries, rmax), np.nan)
+    reconstructions = np.full((nseries, len(names), n), np.nan)
+
+    # series with non finite values fail as in ssa
+
+    finite = np.isfinite(x).all(axis=1)
+    errors = {i: 'ValueError: Argument \'ts\' should only contain finite '
+                 'values.' for i in np.flatnonzero(~finite)}
+
+    rows = np.flatnonzero(finite)
+
+    # chunks bound the size of the stacked factors
+
+    chunksize = max(1, _STACKED_CHUNK_BYTES // (8 * max(window, 1) * n + 1))
+
+    for start in range(0, len(rows), chunksize):
+
+        chunk = rows[start:start + chunksize]
+
+        s, rc = _decompose_stacked(x[chunk], window, kind, grpidx)
+
+        singular_values[chunk] = s
+        reconstructions[chunk] = rc
+
+    return BatchResult(singular_values, reconstructions, names, errors)
+
+
+def _stacked_group_indexes(groups, names, r):
+    """Return the component indexes of each group name"""
+
+    grpidx = {'ssa_reconstruction': list(range(r))}
+
+    if groups:
+
+        if not is_valid_group_dict(groups):
+            raise ValueError(
+                'Invalid group dict. Keys should be type str and values type '
+                'either int or list of int.')
+
+        flat_grpidx = nested2d_to_flatlist(groups.values())
+
+        if not all([i < r for i in flat_grpidx]):
+            raise IndexError('Group indexes cannot exceed the highest '
+                             'component index {}.'.format(r - 1))
+
+        for name, idx in groups.items():
+            grpidx[name] = list(np.atleast_1d(idx))
+
+        grpidx['ssa_residuals'] = [i for i in range(r)
+                                   if i not in flat_grpidx]
+
+    return [grpidx[name] for name in names]
+
+
+def _decompose_stacked(x, window, kind, grpidx):
+    """Singular values and group reconstructions of stacked series
+
+    Parameters
+    ----------
+    x : np.ndarray
+        Series of shape (B, N).
+    window : int
+        The window length.
+    kind : str
+        'basic' or 'toeplitz'.
+    grpidx : list of list of int
+        Component indexes of each of the G groups.
+
+    Returns
+    -------
+    s : np.ndarray
+        Singular values, shape (B, r).
+    rc : np.ndarray
+        Reconstructions, shape (B, G, N).
+
+    """
+
+    nseries, n = x.shape
+
+    if kind == 'basic':
+
+        # (B, K, L) strided view, transposed to the (B, L, K) trajectories
+
+        traj = np.swapaxes(sliding_window_view(x, window, axis=-1), -1, -2)
+        u, s, vt = np.linalg.svd(traj, full_matrices=False)
+
+        # right factors of the elementary matrices, (B, K, r)
+
+        w = np.swapaxes(vt, -1, -2) * s[:, None, :]
+
+    else:
+
+        # stacked Toeplitz covariance matrices, (B, L, L)
+
+        c = np.array([autocovariance(ts, window) for ts in x])
+        lags = np.abs(np.subtract.outer(np.arange(window), np.arange(window)))
+        u, s, __ = np.linalg.svd(c[:, lags], full_matrices=False)
+
+        # trajectories of the zero padded series, (B, N, L)
+
+        padded = np.concatenate([x, np.zeros((nseries, window - 1))], axis=1)
+        traj = sliding_window_view(padded, window, axis=-1)
+
+        w = u
+        u = np.matmul(traj, u)
+
+    rc = hankelize_outer(u, w, groups=grpidx)[..., :n]
+
+    return s, rc
+
+
+def _pack(series):
+    """Concatenate the series in a flat float64 array with offsets"""
+
+    if isinstance(series, np.ndarray) and series.ndim == 2:
+        values = np.ascontiguousarray(series, dtype=np.float64).ravel()
+        lengths = np.full(series.shape[0], series.shape[1])
+
+    else:
+        series = [np.asarray(ts, dtype=np.float64) for ts in series]
+        values = np.concatenate(series) if series else np.zeros(0)
+        lengths = np.array([len(ts) for ts in series], dtype=int)
+
+    offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+
+    return values, offsets
+
+
+def _process_pool(values, offsets, shapes, params, n_jobs):
+    """Process the series with a pool of workers sharing memory"""
+
+    nseries = len(offsets) - 1
+    blocks = {}
+
+    try:
+
+        # shared memory blocks, inputs are copied once
+
+        for name, shape in shapes.items():
+            dtype = offsets.dtype if name == 'offsets' else np.float64
+            nbytes = max(int(np.prod(shape)) * np.dtype(dtype).itemsize, 1)
+            blocks[name] = (shared_memory.SharedMemory(create=True,
+                                                       size=nbytes),
+                            shape, dtype)
+
+        arrays = _attach(blocks)
+        arrays['values'][:] = values
+        arrays['offsets'][:] = offsets
+        arrays['singular_values'][:] = np.nan
+        arrays['reconstructions'][:] = np.nan
+
+        specs = {name: (shm.name, shape, np.dtype(dtype).str)
+                 for name, (shm, shape, dtype) in blocks.items()}
+
+        # a few chunks per worker balance the load
+
+        nchunks = min(nseries, 4 * n_jobs)
+        chunks = np.array_split(np.arange(nseries), nchunks)
+
+        errors = []
+
+        with ProcessPoolExecutor(max_workers=n_jobs,
+                                 initializer=_init_worker) as pool:
+            futures = [pool.submit(_process_shared, specs, chunk.tolist(),
+                                   params) for chunk in chunks]
+            for future in futures:
+                errors += future.result()
+
+        # copy results out of the shared memory before releasing it
+
+        outputs = {name: arrays[name].copy()
+                   for name in ('singular_values', 'reconstructions')}
+
+        del arrays
+
+    finally:
+
+        for shm, __, __ in blocks.values():
+            shm.close()
+            shm.unlink()
+
+    return outputs, errors
+
+
+def _attach(blocks):
+    """Return numpy arrays backed by shared memory blocks"""
+    return {name: np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+            for name, (shm, shape, dtype) in blocks.items()}
+
+
+def _init_worker():
+    """Limit each worker to one BLAS thread"""
+
+    global _THREADPOOL_LIMITS
+
+    _THREADPOOL_LIMITS = threadpool_limits(limits=1)
+
+
+def _process_shared(specs, indexes, params):
+    """Worker entry point, attach shared memory and process series"""
+
+    blocks = {name: (shared_memory.SharedMemory(name=shmname), shape, dtype)
+              for name, (shmname, shape, dtype) in specs.items()}
+
+    try:
+        arrays = _attach(blocks)
+        errors = _process(arrays, indexes, params)
+        del arrays
+    finally:
+        for shm, __, __ in blocks.values():
+            shm.close()
+
+    return errors
+
+
+def _process(arrays, indexes, params):
+    """Decompose and reconstruct series, writing results in arrays"""
+
+    values = arrays['values']
+    offsets = arrays['offsets']
+    singular_values = arrays['singular_values']
+    reconstructions = arrays['reconstructions']
+
+    names = params['names']
+    ngroups = len(names)
+
+    errors = []
+
+    for i in indexes:
+
+        start, stop = offsets[i], offsets[i + 1]
+
+        try:
+
+            ssaobject = ssa(values[start:stop], kind=params['kind'],
+                            svdmethod=params['svdmethod'], usetype='nparray',
+                            **params['kwargs'])
+
+            # groups are reconstructed from their eigentriples, the r x N
+            # elementary components are not built
+
+            ssaobject.decompose(**params['decompose_kw'])
+
+            if params['groups']:
+                ssaobject.reconstruct(params['groups'])
+
+            rc = np.array([ssaobject[name] for name in names])
+
+        except Exception as error:
+            errors.append((i, '{}: {}'.format(type(error).__name__, error)))
+            continue
+
+        s = ssaobject.svd[1][:singular_values.shape[1]]
+        singular_values[i, :len(s)] = s
+
+        reconstructions[ngroups * start:ngroups * stop] = rc.ravel()
+
+    return errors
+
+
+if __name__ == '__main__':
+    import doctest
+
+    doctest.testmod()
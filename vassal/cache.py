@@ -0,0 +1,327 @@
+"""Content-addressed cache of decompositions
+
+Decompositions are stored under a hash of the series values, the SSA class,
+the window, the SVD method and the solver arguments, so that decomposing
+identical series with identical parameters again skips the SVD. A cache has
+an in-process LRU tier bounded in bytes and an optional on-disk tier of .npy
+files, loaded with memory mapping.
+
+Caching is opt-in: pass a cache to decompose, or set a default cache with
+`enable`.
+
+Examples
+--------
+
+>>> from vassal.ssa import BasicSSA
+>>> cache = DecompositionCache()
+>>> ts = np.random.rand(100)
+>>> svd = BasicSSA(ts, window=10).decompose(cache=cache)
+>>> svd = BasicSSA(ts.copy(), window=10).decompose(cache=cache)
+>>> cache.hits, cache.misses
+(1, 1)
+
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+# Default cache used by decompose, see enable
+
+_DEFAULT = None
+
+# Default size of the in-memory tier, in bytes
+
+MAX_BYTES = 2 ** 28
+
+
+def enable(max_bytes=MAX_BYTES, directory=None):
+    """Set and return the default cache of decompositions
+
+    Parameters
+    ----------
+    max_bytes : int, optional
+        Size limit of the in-memory tier, 256 MiB by default.
+    directory : str, optional
+        Directory of the on-disk tier. Default is None, no disk tier.
+
+    """
+
+    global _DEFAULT
+
+    _DEFAULT = DecompositionCache(max_bytes, directory)
+
+    return _DEFAULT
+
+
+def disable():
+    """Unset the default cache of decompositions"""
+
+    global _DEFAULT
+
+    _DEFAULT = None
+
+
+def get_default():
+    """Return the default cache of decompositions, None if disabled"""
+    return _DEFAULT
+
+
+class _Uncacheable(Exception):
+    """Raised by the key builder for arguments without a stable content"""
+    pass
+
+
+def _update(digest, value):
+    """Hash the content of a decomposition parameter"""
+
+    if isinstance(value, np.ndarray):
+        value = np.ascontiguousarray(value)
+        digest.update('ndarray{}{}'.format(value.dtype.str,
+                                           value.shape).encode())
+        digest.update(value.view(np.uint8).reshape(-1))
+
+    elif isinstance(value, (list, tuple)):
+        digest.update('{}{}'.format(type(value).__name__,
+                                    len(value)).encode())
+        for item in value:
+            _update(digest, item)
+
+    elif value is None or isinstance(value, (bool, int, float, str,
+                                             np.integer, np.floating)):
+        digest.update('{}:{!r};'.format(type(value).__name__,
+                                        value).encode())
+
+    else:
+        # e.g. a RandomState, whose output depends on its state
+        raise _Uncacheable()
+
+
+def _untuple(value):
+    """Convert the lists of JSON metadata back to tuples"""
+
+    if isinstance(value, dict):
+        return {name: _untuple(item) for name, item in value.items()}
+
+    if isinstance(value, list):
+        return tuple(_untuple(item) for item in value)
+
+    return value
+
+
+class DecompositionCache(object):
+    """LRU cache of decompositions with an optional on-disk tier
+
+    Parameters
+    ----------
+    max_bytes : int, optional
+        Size limit of the in-memory tier, 256 MiB by default. Least
+        recently used decompositions are evicted beyond it.
+    directory : str, optional
+        Directory of the on-disk tier. Each decomposition is stored in a
+        sub-directory named after its key, as u.npy, s.npy, v.npy and
+        meta.json, and loaded with memory mapping. Default is None, no disk
+        tier.
+
+    Attributes
+    ----------
+    hits : int
+        Lookups found in memory.
+    disk_hits : int
+        Lookups found on disk only.
+    misses : int
+        Lookups not found.
+
+    """
+
+    def __init__(self, max_bytes=MAX_BYTES, directory=None):
+
+        self.max_bytes = max_bytes
+        self.directory = directory
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self._entries = OrderedDict()  # key: (svd, meta, nbytes)
+        self._nbytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def nbytes(self):
+        """Bytes of the decompositions held in memory"""
+        return self._nbytes
+
+    def stats(self):
+        """Return the counters and the size of the cache as a dict"""
+        return {'hits': self.hits, 'disk_hits': self.disk_hits,
+                'misses': self.misses, 'entries': len(self),
+                'nbytes': self.nbytes}
+
+    def key(self, ssaobject, args=(), kwargs=None):
+        """Return the key of a decomposition, None if it cannot be cached
+
+        The key is a SHA-256 hash of the series values and type, of the SSA
+        class and window, of the SVD method and of the arguments of its
+        wrapper. Arguments without a stable content, e.g. a RandomState,
+        make the decomposition uncacheable.
+        """
+
+        digest = hashlib.sha256()
+
+        try:
+            _update(digest, [type(ssaobject).__name__,
+                             getattr(ssaobject, 'window', None),
+                             ssaobject.svdmethod, ssaobject.ts, list(args)])
+            for name in sorted(kwargs or {}):
+                _update(digest, [name, kwargs[name]])
+        except _Uncacheable:
+            return None
+
+        return digest.hexdigest()
+
+    def get(self, key):
+        """Return the (svd, meta) entry of a key, None on a miss"""
+
+        with self._lock:
+
+            entry = self._entries.get(key)
+
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0], entry[1]
+
+        entry = self._load(key)
+
+        with self._lock:
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self.disk_hits += 1
+            self._insert(key, *entry)
+
+        return entry
+
+    def put(self, key, svd, meta=None):
+        """Store a decomposition [u, s, v], v being possibly None
+
+        Parameters
+        ----------
+        key : str
+            Key of the decomposition, see self.key.
+        svd : list of np.ndarray
+            The decomposition, arrays are stored read-only.
+        meta : dict, optional
+            JSON serializable details restored with the decomposition, with
+            tuples in place of lists when read from disk.
+
+        """
+
+        svd = [None if x is None else np.array(x) for x in svd]
+
+        for x in svd:
+            if x is not None:
+                x.setflags(write=False)
+
+        meta = dict(meta or {})
+
+        with self._lock:
+            self._insert(key, svd, meta)
+
+        if self.directory is not None:
+            self._save(key, svd, meta)
+
+    def clear(self, disk=False):
+        """Empty the in-memory tier, and the on-disk one if disk is True"""
+
+        with self._lock:
+            self._entries.clear()
+            self._nbytes = 0
+
+        if disk and self.directory is not None:
+            for name in os.listdir(self.directory):
+                path = os.path.join(self.directory, name)
+                if os.path.isdir(path):
+                    shutil.rmtree(path, ignore_errors=True)
+
+    def _insert(self, key, svd, meta):
+        """Insert an entry in memory and evict the least recently used"""
+
+        nbytes = sum(x.nbytes for x in svd if x is not None)
+
+        if key in self._entries:
+            self._nbytes -= self._entries.pop(key)[2]
+
+        if nbytes > self.max_bytes:
+            return
+
+        self._entries[key] = (svd, meta, nbytes)
+        self._nbytes += nbytes
+
+        while self._nbytes > self.max_bytes:
+            __, (__, __, evicted) = self._entries.popitem(last=False)
+            self._nbytes -= evicted
+
+    def _save(self, key, svd, meta):
+        """Write an entry to disk atomically, ignoring write failures"""
+
+        path = os.path.join(self.directory, key)
+
+        if os.path.isdir(path):
+            return
+
+        tmppath = None
+
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            tmppath = tempfile.mkdtemp(dir=self.directory, prefix='.tmp')
+            for name, x in zip('usv', svd):
+                if x is not None:
+                    np.save(os.path.join(tmppath, name + '.npy'), x)
+            with open(os.path.join(tmppath, 'meta.json'), 'w') as metafile:
+                json.dump(meta, metafile)
+            os.rename(tmppath, path)
+        except OSError:
+            if tmppath is not None:
+                shutil.rmtree(tmppath, ignore_errors=True)
+
+    def _load(self, key):
+        """Read an entry from disk with memory mapping, None if missing"""
+
+        if self.directory is None:
+            return None
+
+        path = os.path.join(self.directory, key)
+
+        try:
+            with open(os.path.join(path, 'meta.json')) as metafile:
+                meta = json.load(metafile)
+            svd = []
+            for name in 'usv':
+                filename = os.path.join(path, name + '.npy')
+                if os.path.exists(filename):
+                    svd.append(np.load(filename, mmap_mode='r'))
+                else:
+                    svd.append(None)
+        except (OSError, ValueError):
+            return None
+
+        return svd, _untuple(meta)
+
+
+if __name__ == '__main__':
+    import doctest
+
+    doctest.testmod()
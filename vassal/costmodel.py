@@ -0,0 +1,382 @@
+"""Cost model of the SVD methods used by svdmethod='auto'
+
+The time of each SVD method is modeled as ``a * flops + b``, the operation
+count `flops` depending on the shape of the matrix to decompose and on the
+number of components. The coefficients are fitted by a small benchmark run
+once per machine, cached in a JSON file of the directory given by the
+VASSAL_CACHE_DIR environment variable, ~/.cache/vassal by default.
+
+"""
+
+import json
+import os
+import platform
+import tempfile
+import time
+
+import numpy as np
+
+# Methods modeled, dense ones compute the full spectrum
+
+DENSE_METHODS = ('nplapack', 'splapack')
+TRUNCATED_METHODS = ('sparpack', 'skrandom')
+
+# Version of the model, cached coefficients of other versions are discarded
+
+_MODEL_VERSION = 1
+
+# Calibration problems: series lengths and numbers of components
+
+_CALIBRATION_LENGTHS = (200, 400, 800)
+_CALIBRATION_K = 10
+
+# Coefficients loaded or calibrated in the process
+
+_COEFFICIENTS = {}
+
+
+def cost_model_path():
+    """Return the path of the cached cost model"""
+
+    directory = os.environ.get('VASSAL_CACHE_DIR') or os.path.join(
+        os.path.expanduser('~'), '.cache', 'vassal')
+
+    return os.path.join(directory, 'costmodel.json')
+
+
+def _machine_key():
+    """Identify the machine and libraries the coefficients are valid for"""
+    return '{}-{}-{}-numpy{}'.format(platform.node(), platform.machine(),
+                                     os.cpu_count(), np.__version__)
+
+
+def flops(method, shape, k=None, full_matrices=False):
+    """Return the modeled operation count of a SVD method
+
+    Parameters
+    ----------
+    method : str
+        SVD method name.
+    shape : tuple of int
+        Shape (m, n) of the matrix to decompose.
+    k : int, optional
+        Number of components, required by truncated methods.
+    full_matrices : bool, optional
+        Whether dense methods compute the full unitary factors. Default is
+        False.
+
+    Returns
+    -------
+    flops : float
+        Operation count, up to a constant factor fitted by calibration.
+
+    """
+
+    m, n = shape
+    p, q = min(m, n), max(m, n)
+
+    # matrix-free products cost a FFT of length about m + n
+
+    fft = (m + n) * np.log2(m + n)
+
+    if method in DENSE_METHODS:
+        if full_matrices:
+            return float(m) * n * p + float(q) * q * p
+        return float(m) * n * p
+
+    if method == 'sparpack':
+        ncv = min(p, 2 * k + 1)
+        return ncv * (2 * fft + ncv * p)
+
+    if method == 'skrandom':
+        ncol = min(p, k + 10)
+        n_iter = 7 if k < .1 * p else 4
+        return ncol * (n_iter + 1) * (2 * fft + ncol * q)
+
+    # eigendecompositions of a (m, m) matrix, the cross-product one for
+    # 'eigen'
+
+    if method == 'eigh':
+        return float(m) ** 3
+
+    if method == 'eigh_topk':
+        return float(m) ** 2 * (m / 2. + (k or m))
+
+    if method == 'eigen':
+        return float(m) * m * n + float(m) ** 3
+
+    raise ValueError('Unknown svdmethod {!r}.'.format(method))
+
+
+def memory(method, shape, k=None, full_matrices=False, itemsize=8):
+    """Return the estimated peak memory of a SVD method, in bytes
+
+    Parameters
+    ----------
+    method : str
+        SVD method name.
+    shape : tuple of int
+        Shape (m, n) of the matrix to decompose.
+    k : int, optional
+        Number of components, required by truncated methods.
+    full_matrices : bool, optional
+        Whether dense methods compute the full unitary factors. Default is
+        False.
+    itemsize : int, optional
+        Bytes of an element, 8 for float64 (default) and 4 for float32.
+
+    Examples
+    --------
+
+    >>> memory('nplapack', (1000, 1000), full_matrices=True)
+    32000000
+
+    """
+
+    m, n = shape
+    p = min(m, n)
+
+    # sizes of the factors: (m, m) and (n, n) or (m, p) and (p, n)
+
+    if full_matrices:
+        factors = m * m + n * n
+    else:
+        factors = p * (m + n)
+
+    if method == 'nplapack':
+        # dense copy, factors and LAPACK workspace
+        return itemsize * (2 * m * n + factors)
+
+    if method == 'splapack':
+        # the Fortran ordered copy is overwritten by LAPACK
+        return itemsize * (m * n + factors + p * p)
+
+    if method == 'sparpack':
+        ncv = min(p, 2 * k + 1)
+        return itemsize * (ncv * (m + n) + 4 * (m + n))
+
+    if method == 'skrandom':
+        ncol = min(p, k + 10)
+        return itemsize * (3 * ncol * (m + n) + 4 * (m + n))
+
+    if method in ('eigh', 'eigen'):
+        # symmetric matrix, its copy or intermediate sums, eigenvectors and
+        # LAPACK workspace
+        return itemsize * 5 * m * m
+
+    if method == 'eigh_topk':
+        return itemsize * (2 * m * m + m * (k or m))
+
+    raise ValueError('Unknown svdmethod {!r}.'.format(method))
+
+
+def available_memory():
+    """Return the available physical memory in bytes, None if unknown"""
+
+    try:
+        return os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE')
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def calibrate(path=None):
+    """Fit the cost model coefficients with a small local benchmark
+
+    Each method decomposes the trajectory matrices of random series of a
+    few hundred values, which takes about a second. The coefficients are
+    written to `path`, cost_model_path() by default, if it is writable.
+
+    Returns
+    -------
+    coefficients : dict
+        (a, b) coefficients of each method, time being a * flops + b
+        seconds.
+
+    """
+
+    # local import, vassal.ssa imports the base module using this one
+
+    from vassal.ssa import BasicSSA
+
+    rng = np.random.RandomState(0)
+    coefficients = {}
+
+    for method in DENSE_METHODS + TRUNCATED_METHODS:
+
+        features, times = [], []
+
+        for n in _CALIBRATION_LENGTHS:
+
+            ssaobject = BasicSSA(rng.rand(n), svdmethod=method,
+                                 usetype='nparray')
+            shape = ssaobject._svdoperator().shape
+
+            if method in DENSE_METHODS:
+                k, kwargs = None, {'full_matrices': False}
+            else:
+                k, kwargs = _CALIBRATION_K, {'k': _CALIBRATION_K}
+
+            # the default cache of decompositions would serve the runs after
+            # the first one without running the SVD
+
+            kwargs['cache'] = False
+
+            # best of a few runs, the first one warms up caches
+
+            elapsed = []
+
+            for __ in range(3):
+                start = time.perf_counter()
+                ssaobject.decompose(**kwargs)
+                elapsed.append(time.perf_counter() - start)
+
+            features.append(flops(method, shape, k))
+            times.append(min(elapsed))
+
+        # least squares fit of time = a * flops + b with a, b >= 0
+
+        design = np.column_stack([features, np.ones(len(features))])
+        a, b = np.linalg.lstsq(design, times, rcond=None)[0]
+
+        if a <= 0:
+            a, b = np.dot(features, times) / np.dot(features, features), 0.
+
+        coefficients[method] = (float(a), float(max(b, 0.)))
+
+    _save(coefficients, path or cost_model_path())
+
+    _COEFFICIENTS[_machine_key()] = coefficients
+
+    return coefficients
+
+
+def _save(coefficients, path):
+    """Write the coefficients atomically, ignoring unwritable locations"""
+
+    content = {'version': _MODEL_VERSION, 'machine': _machine_key(),
+               'coefficients': coefficients}
+
+    try:
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        handle, tmppath = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(handle, 'w') as tmpfile:
+            json.dump(content, tmpfile, indent=2)
+        os.replace(tmppath, path)
+    except OSError:
+        pass
+
+
+def _load(path):
+    """Read coefficients valid for this machine, None otherwise"""
+
+    try:
+        with open(path) as cachefile:
+            content = json.load(cachefile)
+    except (OSError, ValueError):
+        return None
+
+    if (content.get('version') != _MODEL_VERSION or
+            content.get('machine') != _machine_key()):
+        return None
+
+    return {method: tuple(ab)
+            for method, ab in content['coefficients'].items()}
+
+
+def coefficients():
+    """Return the cost model coefficients, calibrating them if needed"""
+
+    key = _machine_key()
+
+    if key not in _COEFFICIENTS:
+
+        loaded = _load(cost_model_path())
+
+        if loaded is None:
+            calibrate()
+        else:
+            _COEFFICIENTS[key] = loaded
+
+    return _COEFFICIENTS[key]
+
+
+def plan(shape, k=None, methods=None, budget=None, itemsize=8):
+    """Select the fastest SVD method of a matrix
+
+    Parameters
+    ----------
+    shape : tuple of int
+        Shape (m, n) of the matrix to decompose.
+    k : int, optional
+        Number of components needed. If None, the full spectrum is needed
+        and only dense methods are considered.
+    methods : sequence of str, optional
+        Candidate methods, all the modeled methods by default.
+    budget : int, optional
+        Memory limit in bytes, the available physical memory by default.
+        Methods over budget are discarded unless all of them are.
+    itemsize : int, optional
+        Bytes of an element, 8 for float64 (default) and 4 for float32.
+
+    Returns
+    -------
+    plan : dict
+        The selected 'svdmethod', its estimated 'cost' in seconds and
+        'memory' in bytes, and the 'estimates' of every candidate as
+        (seconds, bytes).
+
+    Examples
+    --------
+
+    >>> plan((50, 951), k=2, methods=['nplapack'])['svdmethod']
+    'nplapack'
+
+    """
+
+    if methods is None:
+        methods = DENSE_METHODS + TRUNCATED_METHODS
+
+    p = min(shape)
+
+    # truncated methods need 1 <= k < min(shape)
+
+    if k is None or not 1 <= k < p:
+        candidates = [m for m in methods if m in DENSE_METHODS]
+    else:
+        candidates = list(methods)
+
+    if not candidates:
+        raise ValueError('No SVD method can compute {} components of a {} '
+                         'matrix among {}.'.format(k, shape, list(methods)))
+
+    model = coefficients()
+
+    estimates = {}
+
+    for method in candidates:
+        a, b = model[method]
+        estimates[method] = (float(a * flops(method, shape, k) + b),
+                             int(memory(method, shape, k,
+                                        itemsize=itemsize)))
+
+    if budget is None:
+        budget = available_memory()
+
+    feasible = [m for m in candidates
+                if budget is None or estimates[m][1] <= budget]
+
+    selected = min(feasible or candidates, key=lambda m: estimates[m][0])
+
+    return {'svdmethod': selected,
+            'k': k,
+            'shape': tuple(shape),
+            'cost': estimates[selected][0],
+            'memory': estimates[selected][1],
+            'estimates': estimates}
+
+
+if __name__ == '__main__':
+    import doctest
+
+    doctest.testmod()
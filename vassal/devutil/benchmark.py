@@ -0,0 +1,360 @@
+"""
+Benchmark suite of the SSA pipeline
+
+Times and peak memory of the embedding, of every SVD method, of the
+reconstruction, of the hankelization, of wcorr and of to_frame are measured
+for BasicSSA and ToeplitzSSA over a grid of series lengths and windows. The
+hankelization is also measured with the per anti-diagonal reference
+implementation it replaced.
+
+Run the suite and write the results as JSON::
+
+    python -m vassal.devutil.benchmark run -o results.json
+
+Compare two runs, the exit status is 1 if a stage regressed::
+
+    python -m vassal.devutil.benchmark compare before.json after.json
+
+"""
+
+import argparse
+import datetime
+import json
+import platform
+import sys
+
+import numpy as np
+import scipy
+
+from vassal.devutil.performance import Timer
+from vassal.ssa import BasicSSA, ToeplitzSSA
+
+KINDS = {'basic': BasicSSA, 'toeplitz': ToeplitzSSA}
+
+# Default grid, windows are given as fractions of the series length
+
+LENGTHS = (500, 1000, 2000)
+WINDOWS = (0.1, 0.5)
+
+# Number of components computed by the truncated methods and reconstructed
+
+N_COMPONENTS = 10
+
+# SVD methods taking the number of components
+
+_TRUNCATED_METHODS = ('sparpack', 'skrandom', 'eigh_topk')
+
+# 'auto' runs the other methods and calibrates a cost model, it is skipped
+
+_SKIPPED_METHODS = ('auto',)
+
+
+def measure(func, setup=None, repeat=5, warmup=1):
+    """Measure the times and the peak memory of a function
+
+    Parameters
+    ----------
+    func : callable
+        Function to measure, called with the output of `setup` if any.
+    setup : callable, optional
+        Function called before each call, not measured. It should return
+        fresh objects when `func` caches its results.
+    repeat : int, optional
+        Number of timed repeats. Default is 5.
+    warmup : int, optional
+        Number of discarded calls. Default is 1.
+
+    Returns
+    -------
+    result : dict
+        'times' of one call in each repeat in seconds, their 'min', 'median'
+        and 'iqr', the number of 'loops' of each repeat and the
+        'peak_memory' in bytes of an extra call traced by tracemalloc, see
+        vassal.devutil.performance.Timer.
+
+    Examples
+    --------
+
+    >>> result = measure(lambda: np.ones(10 ** 6), repeat=3)
+    >>> len(result['times'])
+    3
+    >>> result['peak_memory'] >= 8 * 10 ** 6
+    True
+
+    """
+
+    timer = Timer(repeat=repeat, warmup=warmup, trace_memory=True)
+
+    result = timer.timeit(func, setup=setup).to_dict()
+
+    del result['name'], result['warmup']
+
+    return result
+
+
+def _svd_kwargs(method, window, n):
+    """Return the arguments of an SVD method"""
+
+    if method in _TRUNCATED_METHODS:
+        return {'k': min(N_COMPONENTS, window - 1, n - window)}
+
+    return {}
+
+
+def _reference_hankelize(x):
+    """Average the anti-diagonals one at a time, the reference of
+    hankelization timings"""
+    return np.array([np.mean(x[::-1, :].diagonal(i))
+                     for i in range(-x.shape[0] + 1, x.shape[1])])
+
+
+def _stages(kind, n, window, rng):
+    """Yield the stage names and the (func, setup) pairs to measure"""
+
+    cls = KINDS[kind]
+    ts = rng.rand(n)
+
+    def fresh(svdmethod='nplapack'):
+        return cls(ts, window=window, svdmethod=svdmethod)
+
+    # decompositions bypass the default cache, hits would time nothing
+
+    def decomposed():
+        ssaobject = fresh()
+        ssaobject.decompose(cache=False)
+        return ssaobject
+
+    k = min(N_COMPONENTS, window)
+    idx = list(range(k))
+
+    yield '_embedseries', (lambda obj: obj._embedseries(), fresh)
+
+    # methods of the class only, e.g. the symmetric eigensolvers of
+    # ToeplitzSSA are not run on BasicSSA
+
+    for method in fresh()._SVD_METHODS_MAP:
+
+        if method in _SKIPPED_METHODS:
+            continue
+
+        kwargs = _svd_kwargs(method, window, n)
+
+        kwargs['cache'] = False
+
+        yield 'svd:' + method, (
+            lambda obj, kwargs=kwargs: obj.decompose(**kwargs),
+            lambda method=method: fresh(method))
+
+    yield '_reconstruct_group', (lambda obj: obj._reconstruct_group(idx),
+                                 decomposed)
+
+    x = np.asarray(fresh()._embedseries())
+
+    yield '_hankelmatrix_to_ts', (lambda: cls._hankelmatrix_to_ts(x), None)
+
+    yield '_hankelmatrix_to_ts:reference', (lambda: _reference_hankelize(x),
+                                            None)
+
+    yield 'wcorr', (lambda obj: obj.wcorr(k), decomposed)
+
+    yield 'to_frame', (lambda obj: obj.to_frame(), decomposed)
+
+
+def run(lengths=LENGTHS, windows=WINDOWS, kinds=tuple(KINDS), repeat=5,
+        stages=None, seed=0, verbose=False):
+    """Run the benchmark suite
+
+    Parameters
+    ----------
+    lengths : sequence of int, optional
+        Series lengths.
+    windows : sequence of float or int, optional
+        Windows, as fractions of the series length if lower than 1.
+    kinds : sequence of str, optional
+        SSA kinds, among 'basic' and 'toeplitz'.
+    repeat : int, optional
+        Number of timed runs of each stage. Default is 5.
+    stages : sequence of str, optional
+        Stages to measure, all of them by default.
+    seed : int, optional
+        Seed of the random series. Default is 0.
+    verbose : bool, optional
+        Print each result as it is measured. Default is False.
+
+    Returns
+    -------
+    results : dict
+        'metadata' of the run and list of 'results', one dict per kind,
+        length, window and stage. A stage raising an exception reports its
+        'error' instead of times.
+
+    """
+
+    rng = np.random.RandomState(seed)
+    results = []
+
+    for kind in kinds:
+
+        for n in lengths:
+
+            for window in windows:
+
+                if window < 1:
+                    window = int(window * n)
+
+                window = int(window)
+
+                for stage, (func, setup) in _stages(kind, n, window, rng):
+
+                    if stages is not None and stage not in stages:
+                        continue
+
+                    entry = {'kind': kind, 'n': n, 'window': window,
+                             'stage': stage}
+
+                    try:
+                        entry.update(measure(func, setup, repeat))
+                    except Exception as error:
+                        entry['error'] = '{}: {}'.format(
+                            type(error).__name__, error)
+
+                    if verbose:
+                        print(_format_entry(entry))
+
+                    results.append(entry)
+
+    return {'metadata': _metadata(repeat), 'results': results}
+
+
+def _metadata(repeat):
+    """Describe the machine and the library versions of a run"""
+    return {'date': datetime.datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'scipy': scipy.__version__,
+            'platform': platform.platform(),
+            'machine': platform.machine(),
+            'repeat': repeat}
+
+
+def _format_entry(entry):
+    """Format a result as a line of text"""
+
+    head = '{kind:>8} {n:>7} {window:>6} {stage:<30}'.format(**entry)
+
+    if 'error' in entry:
+        return '{} {}'.format(head, entry['error'])
+
+    return '{} {:>12.6f} s {:>12.1f} kB'.format(head, entry['median'],
+                                                entry['peak_memory'] / 1024.)
+
+
+def _key(entry):
+    return entry['kind'], entry['n'], entry['window'], entry['stage']
+
+
+def compare(before, after, threshold=1.2):
+    """Compare the median times and peak memory of two runs
+
+    Parameters
+    ----------
+    before, after : dict
+        Results of two runs, see run.
+    threshold : float, optional
+        Ratio of the medians, or of the peak memory, above which a stage
+        has regressed. Default is 1.2.
+
+    Returns
+    -------
+    rows : list of dict
+        'kind', 'n', 'window', 'stage', 'time_ratio', 'memory_ratio' and
+        'regression' of each stage measured in both runs.
+
+    Examples
+    --------
+
+    >>> entry = {'kind': 'basic', 'n': 100, 'window': 10, 'stage': 'wcorr'}
+    >>> before = {'results': [dict(entry, median=1., peak_memory=10)]}
+    >>> after = {'results': [dict(entry, median=2., peak_memory=10)]}
+    >>> compare(before, after)[0]['regression']
+    True
+
+    """
+
+    reference = {_key(entry): entry for entry in before['results']
+                 if 'error' not in entry}
+
+    rows = []
+
+    for entry in after['results']:
+
+        ref = reference.get(_key(entry))
+
+        if ref is None or 'error' in entry:
+            continue
+
+        time_ratio = entry['median'] / ref['median'] if ref['median'] else \
+            float('inf')
+        memory_ratio = (entry['peak_memory'] / ref['peak_memory']
+                        if ref['peak_memory'] else 1.)
+
+        rows.append({'kind': entry['kind'], 'n': entry['n'],
+                     'window': entry['window'], 'stage': entry['stage'],
+                     'time_ratio': time_ratio, 'memory_ratio': memory_ratio,
+                     'regression': bool(time_ratio > threshold or
+                                        memory_ratio > threshold)})
+
+    return rows
+
+
+def main(argv=None):
+    """Command line entry point"""
+
+    parser = argparse.ArgumentParser(
+        prog='python -m vassal.devutil.benchmark',
+        description='Benchmark the SSA pipeline.')
+    commands = parser.add_subparsers(dest='command')
+    commands.required = True
+
+    runparser = commands.add_parser('run', help='run the benchmark suite')
+    runparser.add_argument('-o', '--output', help='JSON output file')
+    runparser.add_argument('--lengths', type=int, nargs='+', default=LENGTHS)
+    runparser.add_argument('--windows', type=float, nargs='+',
+                           default=WINDOWS,
+                           help='windows, fractions of the length if < 1')
+    runparser.add_argument('--kinds', nargs='+', default=list(KINDS),
+                           choices=list(KINDS))
+    runparser.add_argument('--stages', nargs='+')
+    runparser.add_argument('--repeat', type=int, default=5)
+
+    cmpparser = commands.add_parser('compare', help='compare two runs')
+    cmpparser.add_argument('before')
+    cmpparser.add_argument('after')
+    cmpparser.add_argument('--threshold', type=float, default=1.2)
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'run':
+
+        results = run(args.lengths, args.windows, args.kinds, args.repeat,
+                      args.stages, verbose=True)
+
+        if args.output:
+            with open(args.output, 'w') as output:
+                json.dump(results, output, indent=2)
+
+        return 0
+
+    with open(args.before) as before, open(args.after) as after:
+        rows = compare(json.load(before), json.load(after), args.threshold)
+
+    for row in rows:
+        print('{kind:>8} {n:>7} {window:>6} {stage:<30} time x{time_ratio:.2f}'
+              ' memory x{memory_ratio:.2f}{flag}'.format(
+                  flag='  REGRESSION' if row['regression'] else '', **row))
+
+    return int(any(row['regression'] for row in rows))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
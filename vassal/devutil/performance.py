@@ -1,9 +1,25 @@
 """
-Decorators for performance analysis
+Timing harness for performance analysis
+
+Timer measures a function with time.perf_counter_ns: a few warmup calls are
+discarded, fast functions are called in loops long enough to be measured
+accurately and the per-call times of several repeats are summarized by
+their median, interquartile range and minimum. The garbage collector can be
+disabled during the measure and the peak memory traced with tracemalloc.
+
+A Timer is used either as a decorator, the decorated function returning a
+TimingResult, as a context manager timing a block once, or through its
+timeit method.
 
 """
 
+import gc
 import time
+import tracemalloc
+from collections import namedtuple
+
+import numpy as np
+
 
 class options(object):
     """
@@ -26,6 +42,310 @@ class options(object):
         cls.__PRINT_PRECISION__ = decimals
 
 
+class TimingResult(namedtuple('TimingResult', ['name', 'times', 'loops',
+                                               'warmup', 'peak_memory'])):
+    """Result of a Timer measure
+
+    Attributes
+    ----------
+    name : str
+        Name of the measured function or block.
+    times : tuple of float
+        Time of one call in seconds, for each repeat.
+    loops : int
+        Number of calls of each repeat.
+    warmup : int
+        Number of discarded calls.
+    peak_memory : int or None
+        Peak memory allocated by one call in bytes, None if not traced.
+
+    """
+
+    __slots__ = ()
+
+    @property
+    def repeat(self):
+        """Number of repeats"""
+        return len(self.times)
+
+    @property
+    def min(self):
+        """Minimum time of a call, the least noisy estimate"""
+        return min(self.times)
+
+    @property
+    def median(self):
+        """Median time of a call"""
+        return float(np.median(self.times))
+
+    @property
+    def iqr(self):
+        """Interquartile range of the time of a call"""
+        q1, q3 = np.percentile(self.times, [25, 75])
+        return float(q3 - q1)
+
+    def to_dict(self):
+        """Return the result and its statistics as a dict"""
+        return {'name': self.name, 'times': list(self.times),
+                'loops': self.loops, 'warmup': self.warmup,
+                'peak_memory': self.peak_memory, 'min': self.min,
+                'median': self.median, 'iqr': self.iqr}
+
+    def __str__(self):
+        text = '{}: median {:.6g} s, IQR {:.3g} s, min {:.6g} s ({} x {} ' \
+               'loops)'.format(self.name, self.median, self.iqr, self.min,
+                               self.repeat, self.loops)
+        if self.peak_memory is not None:
+            text += ', peak {} B'.format(self.peak_memory)
+        return text
+
+
+class Timer(object):
+    """Measure the time and memory of a function or of a block
+
+    Parameters
+    ----------
+    repeat : int, optional
+        Number of measured repeats. Default is 5.
+    warmup : int, optional
+        Number of calls discarded before measuring. Default is 1.
+    loops : int, optional
+        Number of calls of each repeat. If None (default), it is calibrated
+        by doubling until a repeat lasts at least `min_time`.
+    min_time : float, optional
+        Minimum duration of a repeat in seconds used by the calibration.
+        Default is 0.01.
+    disable_gc : bool, optional
+        Disable the garbage collector while measuring. Default is False.
+    trace_memory : bool, optional
+        Trace the peak memory of an extra call with tracemalloc, which
+        slows allocations down and is not timed. If tracemalloc is tracing
+        already, e.g. in a vassal.tracing.enabled(memory=True) block, it is
+        left running and the peak is counted from the memory traced at the
+        start of the measure. Default is False.
+    name : str, optional
+        Name of the result, the function name by default.
+
+    Examples
+    --------
+
+    As a decorator, the decorated function returns a TimingResult:
+
+    >>> @Timer(repeat=3, loops=10)
+    ... def f():
+    ...     return sum(range(100))
+    >>> result = f()
+    >>> result.name, result.repeat, result.loops
+    ('f', 3, 10)
+    >>> result.min <= result.median
+    True
+
+    As a context manager, the block runs once:
+
+    >>> with Timer(trace_memory=True, name='ones') as timer:
+    ...     x = np.ones(10 ** 6)
+    >>> timer.result.peak_memory >= 8 * 10 ** 6
+    True
+
+    """
+
+    def __init__(self, repeat=5, warmup=1, loops=None, min_time=0.01,
+                 disable_gc=False, trace_memory=False, name=None):
+
+        if repeat < 1:
+            raise ValueError('repeat should be positive, got {}.'.format(
+                repeat))
+
+        self.repeat = repeat
+        self.warmup = warmup
+        self.loops = loops
+        self.min_time = min_time
+        self.disable_gc = disable_gc
+        self.trace_memory = trace_memory
+        self.name = name
+        self.result = None  # TimingResult of the last measure
+
+        self._gcenabled = None
+        self._start = None
+        self._tracestate = None
+
+    def __call__(self, func):
+        """Decorate func to measure it, returning a TimingResult"""
+
+        def wrapper(*args, **kwargs):
+            return self.timeit(func, *args, **kwargs)
+
+        wrapper.__name__ = getattr(func, '__name__', 'wrapper')
+        wrapper.__doc__ = func.__doc__
+
+        return wrapper
+
+    def __enter__(self):
+
+        if self.trace_memory:
+            self._tracestate = _trace_start()
+
+        self._gcenabled = gc.isenabled()
+
+        if self.disable_gc:
+            gc.disable()
+
+        self._start = time.perf_counter_ns()
+
+        return self
+
+    def __exit__(self, *exc_info):
+
+        elapsed = (time.perf_counter_ns() - self._start) * 1e-9
+
+        if self._gcenabled:
+            gc.enable()
+
+        peak = None
+
+        if self.trace_memory:
+            peak = _trace_stop(self._tracestate)
+
+        self.result = TimingResult(self.name or 'block', (elapsed,), 1, 0,
+                                   peak)
+
+        return False
+
+    def timeit(self, func, *args, setup=None, **kwargs):
+        """Measure func called with args and kwargs
+
+        Parameters
+        ----------
+        func : callable
+            Function to measure.
+        *args, **kwargs
+            Arguments of func.
+        setup : callable, optional
+            Function called without arguments before each call, not
+            measured, its output being passed to func as first argument. It
+            provides fresh objects when func caches its results. Each call
+            is then timed alone and `loops` is 1.
+
+        Returns
+        -------
+        result : TimingResult
+            Times of one call in each repeat.
+
+        """
+
+        if setup is None:
+            def call():
+                return func(*args, **kwargs)
+        else:
+            def call():
+                arg = setup()
+                start = time.perf_counter_ns()
+                func(arg, *args, **kwargs)
+                return time.perf_counter_ns() - start
+
+        gcenabled = gc.isenabled()
+
+        try:
+
+            if self.disable_gc:
+                gc.disable()
+
+            for __ in range(self.warmup):
+                call()
+
+            if setup is not None:
+                loops = 1
+                times = [call() * 1e-9 for __ in range(self.repeat)]
+            else:
+                loops = self.loops or self._calibrate(call)
+                times = [self._time_loops(call, loops) / loops
+                         for __ in range(self.repeat)]
+
+        finally:
+            if gcenabled:
+                gc.enable()
+
+        peak = self._peak_memory(func, args, kwargs, setup) \
+            if self.trace_memory else None
+
+        self.result = TimingResult(
+            self.name or getattr(func, '__name__', 'function'), tuple(times),
+            loops, self.warmup, peak)
+
+        return self.result
+
+    def _calibrate(self, call):
+        """Return the number of loops lasting at least min_time"""
+
+        loops = 1
+
+        while True:
+            if self._time_loops(call, loops) >= self.min_time or \
+                    loops >= 2 ** 20:
+                return loops
+            loops *= 2
+
+    @staticmethod
+    def _time_loops(call, loops):
+        """Return the time of loops calls in seconds"""
+
+        start = time.perf_counter_ns()
+
+        for __ in range(loops):
+            call()
+
+        return (time.perf_counter_ns() - start) * 1e-9
+
+    @staticmethod
+    def _peak_memory(func, args, kwargs, setup):
+        """Return the peak memory of a call traced by tracemalloc"""
+
+        if setup is not None:
+            args = (setup(),) + tuple(args)
+
+        state = _trace_start()
+
+        try:
+            func(*args, **kwargs)
+        finally:
+            peak = _trace_stop(state)
+
+        return peak
+
+
+def _trace_start():
+    """Start tracing memory, tracemalloc is started unless it is running
+
+    Returns
+    -------
+    state : tuple
+        Whether tracemalloc was started and the memory traced at start.
+
+    """
+
+    started = not tracemalloc.is_tracing()
+
+    if started:
+        tracemalloc.start()
+    else:
+        tracemalloc.reset_peak()
+
+    return started, tracemalloc.get_traced_memory()[0]
+
+
+def _trace_stop(state):
+    """Return the peak memory since _trace_start, stopping tracemalloc if
+    it was started there"""
+
+    started, memory0 = state
+
+    __, peak = tracemalloc.get_traced_memory()
+
+    if started:
+        tracemalloc.stop()
+
+    return peak - memory0
+
 
 def timerprinter(func):
     """Decorate the function to run it once and print the time.
@@ -52,10 +372,10 @@ def timerprinter(func):
     """
 
     def wrapper(*args, **kwargs):
-        before = time.time()
+        before = time.perf_counter_ns()
         result = func(*args, **kwargs)
-        after = time.time()
-        elapsed = round(after - before, options.__PRINT_PRECISION__)
+        after = time.perf_counter_ns()
+        elapsed = round((after - before) * 1e-9, options.__PRINT_PRECISION__)
         print('Run {0.__name__} once in: {1} s'.format(func, elapsed))
         return result
 
@@ -89,13 +409,14 @@ def ntimerprinter(n):
 
         def wrapper(*args, **kwargs):
 
-            before = time.time()
+            before = time.perf_counter_ns()
 
             for _ in range(n):
                 result = func(*args, **kwargs)
 
-            after = time.time()
-            elapsed = round(after - before, options.__PRINT_PRECISION__)
+            after = time.perf_counter_ns()
+            elapsed = round((after - before) * 1e-9,
+                            options.__PRINT_PRECISION__)
 
             print('Run {0.__name__} {1} times in: {2} s'.format(func, n,
                                                                     elapsed))
@@ -119,7 +440,7 @@ def timercomputer(func):
     Returns
     -------
         time : float
-            time in ms
+            time in s
             
     Examples
     --------
@@ -132,45 +453,26 @@ def timercomputer(func):
     
     """
     def wrapper(*args, **kwargs):
-        before = time.time()
+        before = time.perf_counter_ns()
         _ = func(*args, **kwargs)
-        after = time.time()
-        elapsed = after - before
-        return elapsed
+        after = time.perf_counter_ns()
+        return (after - before) * 1e-9
 
     return wrapper
 
 
-def ntimercomputer(func):
-    """Decorate the function to run it once and return elapsed time
-
-    The time is returned and the function output is disregarded. 
-
-    Parameters
-    ----------
-    func: callable
-        The function to be decorated
-
-    Returns
-    -------
-        time : float
-            time elapsed in ms for 1 run. 
-    """
-    pass
-
-
 def ntimercomputer(n):
-    """
-    
+    """Decorate the function to run it n times and return the elapsed times
+
     Parameters
     ----------
-    func: callable
-        The function to be decorated
+    n: int
+        Number of runs
 
     Returns
     -------
     timelist : list of float
-        list of time elapsed for n run. 
+        list of time elapsed for n run, in s.
         
     Examples
     --------
@@ -188,11 +490,10 @@ def ntimercomputer(n):
             timelist = []
 
             for _ in range(n):
-                before = time.time()
+                before = time.perf_counter_ns()
                 result = func(*args, **kwargs)
-                after = time.time()
-                elapsed = after - before
-                timelist.append(elapsed)
+                after = time.perf_counter_ns()
+                timelist.append((after - before) * 1e-9)
 
             return timelist
 
@@ -68,9 +68,15 @@ def is_1darray_like(data):
     """
     test = True
 
+    # Arrays and pandas objects are tested on their dimensions, iterating over
+    # a pd.Series would use its index labels as positions
+
+    if isinstance(data, (np.ndarray, pd.Series, pd.DataFrame)):
+        test = data.ndim == 1
+
     # Test fails if data has no attribute __getitem__
 
-    if not hasattr(data, '__getitem__'):
+    elif not hasattr(data, '__getitem__'):
         test = False
 
     else:
@@ -0,0 +1,248 @@
+"""Base class for SSA forecast methods
+
+"""
+
+import numpy as np
+import pandas as pd
+
+from vassal.base import ResolutionOrderError
+from vassal.linalg import hankelize_outer, linear_orbit, lrr_coefficients
+
+
+class ForecastSSA(object):
+    """Forecast methods of SSA classes analyzing one dimensional series
+
+    The methods use the decomposition and the reconstruction of the SSA
+    object they are mixed in.
+    """
+
+    # --------------------------------------------------------------------------
+    # Forecasting methods
+
+    def forecast(self, steps, groups=None, method='recurrent'):
+        """Forecast reconstructed groups from the stored eigentriples
+
+        The linear recurrence relation (LRR) of each group is derived once
+        from the left singular vectors and cached until the next
+        decomposition. All the groups and horizons are computed in one
+        vectorized pass:
+
+        * 'recurrent': the LRR is applied to the reconstructed series. Blocks
+          of L - 1 values are obtained at once with a power of the companion
+          matrix of the LRR, and blocks are iterated by repeated doubling.
+        * 'vector': lag vectors are extended in the signal subspace, where
+          the vector forecasting operator is a r x r matrix. Its iterates are
+          computed by repeated doubling and diagonal averaged with FFTs.
+
+        Parameters
+        ----------
+        steps : int
+            Number of values to forecast.
+        groups : str or list of str, optional
+            Group names, see self.groups. If None, the user defined groups
+            if any, 'ssa_reconstruction' otherwise.
+        method : str, optional
+            'recurrent' (default) or 'vector'.
+
+        Returns
+        -------
+        forecast : np.array, pd.Series or pd.DataFrame
+            Forecast values of shape (steps,) if `groups` is a str, else
+            (steps, n_groups), with one column per group.
+
+        References
+        ----------
+
+        [1] Golyandina, Nina, and Anatoly Zhigljavsky. "Singular Spectrum
+        Analysis for Time Series." Springer, 2013. Section 3.2.
+
+        Examples
+        --------
+
+        >>> from vassal.ssa import BasicSSA
+        >>> ts = np.sin(np.arange(100) / 5.)
+        >>> myssa = BasicSSA(ts, window=20, usetype='nparray')
+        >>> u, s, v = myssa.decompose()
+        >>> myssa.reconstruct({'sine': [0, 1]})
+        >>> np.allclose(myssa.forecast(3, 'sine'), np.sin(np.arange(100, 103) / 5.))
+        True
+
+        """
+
+        if self.svd[1] is None:
+            raise ResolutionOrderError(
+                'forecast method cannot be called before decompose method.')
+
+        if method not in ('recurrent', 'vector'):
+            raise ValueError('method should be either \'recurrent\' or '
+                             '\'vector\', got {!r}.'.format(method))
+
+        if not isinstance(steps, (int, np.integer)) or steps < 1:
+            raise ValueError('steps should be a positive integer.')
+
+        # group names and indexes
+
+        if groups is None:
+            names = list(self._usergroups or ['ssa_reconstruction'])
+        elif isinstance(groups, str):
+            names = [groups]
+        else:
+            names = list(groups)
+
+        grpidx = [self._forecast_group_index(name) for name in names]
+
+        if method == 'recurrent':
+            values = self._recurrent_forecast(grpidx, steps)
+        else:
+            values = self._vector_forecast(grpidx, steps)
+
+        # format output
+
+        if isinstance(groups, str):
+            values = values[0]
+        else:
+            values = values.T
+
+        if self.usetype == 'pdseries':
+
+            index = self._forecast_index(steps)
+
+            if isinstance(groups, str):
+                values = pd.Series(values, name=groups, index=index)
+            else:
+                values = pd.DataFrame(values, columns=names, index=index)
+
+        return values
+
+    # --------------------------------------------------------------------------
+    # Private methods
+
+    def _forecast_group_index(self, name):
+        """Return the eigentriple indexes of a group to forecast"""
+
+        idx = self._group_index(name)
+
+        if idx is None:
+            raise ValueError('\'ssa_original\' cannot be forecast, use '
+                             '\'ssa_reconstruction\' instead.')
+
+        if isinstance(idx, (int, np.integer)):
+            idx = [idx]
+
+        return tuple(idx)
+
+    def _forecast_subspaces(self, grpidx):
+        """Return the left singular vectors of groups, padded with zeros
+
+        Zero columns leave the LRR and the forecasting operators unchanged,
+        they let groups of different sizes be stacked in an array of shape
+        (n_groups, L, r_max).
+        """
+
+        u = np.asarray(self.svd[0])
+        rmax = max(len(idx) for idx in grpidx)
+
+        ug = np.zeros((len(grpidx), u.shape[0], rmax), dtype=u.dtype)
+
+        for g, idx in enumerate(grpidx):
+            ug[g, :, :len(idx)] = u[:, list(idx)]
+
+        return ug
+
+    def _lrr(self, grpidx):
+        """Return the cached subspaces and LRR coefficients of groups"""
+
+        def builder():
+            ug = self._forecast_subspaces(grpidx)
+            return ug, lrr_coefficients(ug)
+
+        return self._cached('lrr', (self.svd[0], tuple(grpidx)), builder)
+
+    def _recurrent_forecast(self, grpidx, steps):
+        """Recurrent forecast of groups, shape (n_groups, steps)"""
+
+        ug, r = self._lrr(grpidx)
+        d = r.shape[-1]
+
+        if d == 0:
+            raise ValueError('Forecasting requires a window larger than 1.')
+
+        def builder():
+
+            # companion matrix of the LRR, its d-th power maps the d last
+            # values to the d next ones
+
+            companion = np.zeros((len(grpidx), d, d), dtype=r.dtype)
+            companion[:, :-1, 1:] = np.eye(d - 1)
+            companion[:, -1] = r
+
+            return np.linalg.matrix_power(companion, d)
+
+        block = self._cached('lrr_companion', (r,), builder)
+
+        last = np.array([self._reconstruct_group(list(idx))[-d:]
+                         for idx in grpidx])
+
+        nblocks = -(-steps // d)
+        first = np.matmul(block, last[..., None])[..., 0]
+
+        blocks = linear_orbit(block, first, nblocks)
+
+        return blocks.reshape(len(grpidx), -1)[:, :steps]
+
+    def _vector_forecast(self, grpidx, steps):
+        """Vector forecast of groups, shape (n_groups, steps)"""
+
+        ug, r = self._lrr(grpidx)
+        m = ug.shape[1]
+
+        nabla = ug[:, :-1]
+        nu2 = np.sum(ug[:, -1] ** 2, axis=-1)
+
+        def vec(y):
+            """Vector forecasting operator applied to the columns of y
+
+            The L - 1 last values of each column are projected on the span of
+            nabla and completed by the LRR prediction.
+            """
+
+            tail = y[:, 1:]
+
+            proj = np.matmul(nabla, np.matmul(np.swapaxes(nabla, 1, 2), tail))
+            proj += (1. - nu2)[:, None, None] * r[..., None] * \
+                np.matmul(r[:, None], tail)
+
+            return np.concatenate([proj, np.matmul(r[:, None], tail)], axis=1)
+
+        # the operator maps the signal subspace into itself, where it is the
+        # r x r matrix ug^T vec(ug)
+
+        a = self._cached('lrr_vector', (r,), lambda: np.matmul(
+            np.swapaxes(ug, 1, 2), vec(ug)))
+
+        # the first forecast lag vector follows the last reconstructed one
+
+        last = np.array([self._reconstruct_group(list(idx))[-m:]
+                         for idx in grpidx])
+
+        coef = np.matmul(np.swapaxes(ug, 1, 2), vec(last[..., None]))[..., 0]
+
+        # lag vectors K + 1, ..., K + steps + L - 1, the anti-diagonals of the
+        # forecast values are complete
+
+        orbit = linear_orbit(a, coef, steps + m - 1)
+
+        return hankelize_outer(ug, orbit)[:, m - 1:m - 1 + steps]
+
+    def _forecast_index(self, steps):
+        """Return the pandas index of forecast values"""
+
+        try:
+            index = self._extended_index(None, steps)
+        except TypeError:
+            index = None
+
+        if index is None:
+            return pd.RangeIndex(self._n_ts, self._n_ts + steps)
+
+        return index[-steps:]
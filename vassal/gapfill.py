@@ -0,0 +1,168 @@
+"""Iterative Singular Spectrum Analysis gap filling
+
+"""
+
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from vassal.dtypes import is_1darray_like, arraylike_to_nparray
+from vassal.ssa import ssa
+
+
+def gapfill(ts, components=2, kind='basic', svdmethod='sparpack', k=None,
+            threshold=1e-5, max_iter=100, warm_start=True, **kwargs):
+    """Fill the missing values of a time series by iterative SSA
+
+    Missing values (NaN or inf) are first linearly interpolated. Then, at
+    each iteration, the series is decomposed with a truncated solver, the
+    selected components are reconstructed and only the missing values are
+    replaced by the reconstruction. Iterations stop when the root mean
+    square change of the missing values, relative to the standard deviation
+    of the observed values, falls below `threshold`.
+
+    The series changes at missing positions only between iterations, so
+    that its subspace changes little: with `warm_start`, each decomposition
+    starts from the previous singular vectors, see
+    BaseSSA.warm_start_kwargs. Each iteration decomposes a new SSA object
+    of the updated series.
+
+    Parameters
+    ----------
+    ts : arraylike
+        One dimensional array-like object (np.array, list, pd.Series)
+        holding the time series values, missing values being NaN or inf.
+    components : int or list of int, optional
+        The `components` first components if int (default is 2), else the
+        indexes of the components used to fill the gaps.
+    kind : str, optional
+        Kind of SSA, see `vassal.ssa`. Default is 'basic'.
+    svdmethod : str, optional
+        SVD method, 'sparpack' (default) or 'skrandom'.
+    k : int, optional
+        Number of components computed by the truncated solver. Default is
+        the number needed by `components`.
+    threshold : float, optional
+        Convergence threshold. Default is 1e-5.
+    max_iter : int, optional
+        Maximum number of iterations. Default is 100.
+    warm_start : bool, optional
+        Whether to warm-start each decomposition from the previous one.
+        Default is True.
+    **kwargs
+        Arguments passed to the SSA class (e.g. window, usetype, dtype) or to
+        decompose (e.g. tol, random_state).
+
+    Returns
+    -------
+    filled : np.array or pd.Series
+        The time series with filled values, same type as `ts`.
+    ssaobject : BaseSSA
+        SSA object of the filled time series, decomposed at the last
+        iteration.
+
+    Examples
+    --------
+
+    >>> t = np.arange(500)
+    >>> ts = np.sin(t / 10.) + t / 100.
+    >>> gaps = ts.copy()
+    >>> gaps[100:120] = np.nan
+    >>> filled, myssa = gapfill(gaps, components=4, window=50)
+    >>> print(np.abs(filled - ts).max() < 1e-3)
+    True
+
+    """
+
+    if svdmethod not in ('sparpack', 'skrandom'):
+        raise ValueError('svdmethod should be either \'sparpack\' or '
+                         '\'skrandom\', got {!r}.'.format(svdmethod))
+
+    if not is_1darray_like(ts):
+        raise TypeError('Argument \'ts\' should be 1 dimensional.')
+
+    values = arraylike_to_nparray(ts).astype(float)
+
+    if isinstance(components, (int, np.integer)):
+        idx = list(range(components))
+    else:
+        idx = list(components)
+
+    if k is None:
+        k = max(idx) + 1
+
+    # first guess of the missing values
+
+    missing = ~np.isfinite(values)
+    observed = np.flatnonzero(~missing)
+
+    if len(observed) == 0:
+        raise ValueError('Time series has no finite value.')
+
+    position = np.arange(len(values))
+    values[missing] = np.interp(position[missing], observed, values[observed])
+
+    scale = np.std(values[observed]) or 1.
+
+    # split SSA class arguments from decompose arguments
+
+    initkw = {key: kwargs.pop(key) for key in ('window', 'usetype', 'dtype')
+              if key in kwargs}
+
+    def decompose(series, previous):
+        """Decompose a new SSA object of series, warm-started from previous"""
+
+        if isinstance(ts, pd.Series):
+            series = pd.Series(series, index=ts.index, name=ts.name)
+
+        ssaobject = ssa(series, kind=kind, svdmethod=svdmethod, **initkw)
+
+        decomposekw = dict(kwargs, k=k)
+
+        if warm_start and previous is not None:
+            decomposekw.update(ssaobject.warm_start_kwargs(
+                previous.svd, kwargs.get('n_iter')))
+
+        ssaobject.decompose(**decomposekw)
+
+        return ssaobject
+
+    ssaobject = decompose(values, None)
+
+    if missing.any():
+
+        for iteration in range(max_iter):
+
+            # update the missing values only, in a new array decomposed by a
+            # new SSA object
+
+            reconstruction = ssaobject._reconstruct_components(idx)
+
+            delta = np.sqrt(np.mean(
+                (reconstruction[missing] - values[missing]) ** 2)) / scale
+
+            values = values.copy()
+            values[missing] = reconstruction[missing]
+
+            ssaobject = decompose(values, ssaobject)
+
+            if delta < threshold:
+                break
+
+        else:
+            warnings.warn('Gap filling did not converge after {} iterations.'
+                          .format(max_iter), RuntimeWarning)
+
+    if isinstance(ts, pd.Series):
+        filled = pd.Series(values, index=ts.index, name=ts.name)
+    else:
+        filled = values
+
+    return filled, ssaobject
+
+
+if __name__ == '__main__':
+    import doctest
+
+    doctest.testmod()
@@ -0,0 +1,1196 @@
+"""Linear algebra kernels for SSA objects
+
+Embedding, diagonal averaging and matrix-free operators shared by the SSA
+classes.
+Trajectory matrices are exposed as read-only strided views of the time series
+so that embedding costs O(1) memory and time, and as FFT based linear
+operators for the truncated SVD solvers.
+
+"""
+
+from functools import lru_cache
+
+import numpy as np
+from numpy.lib.stride_tricks import as_strided, sliding_window_view
+from scipy.fft import rfft, irfft, rfftn, irfftn, next_fast_len
+from scipy.linalg import lu, qr, svd
+from scipy.sparse.linalg import LinearOperator
+from sklearn.utils import check_random_state
+from sklearn.utils.extmath import svd_flip
+
+
+# -------------------------------------------------------------------------------
+# Embedding
+
+def hankel_view(ts, window):
+    """Return the Hankel trajectory matrix of a time series as a strided view
+
+    The trajectory matrix :math:`X` of shape (`window`, `K`), where
+    `K` = len(`ts`) - `window` + 1, is such that ``X[i, j] == ts[i + j]``. No
+    data is copied: the matrix is a read-only view of `ts`.
+
+    Parameters
+    ----------
+    ts : np.ndarray
+        One dimensional array holding the time series values.
+    window : int
+        The window length, 1 <= window <= len(ts).
+
+    Returns
+    -------
+    x : np.ndarray
+        Read-only view of shape (window, K).
+
+    Examples
+    --------
+
+    >>> hankel_view(np.arange(5), 3)
+    array([[0, 1, 2],
+           [1, 2, 3],
+           [2, 3, 4]])
+
+    """
+
+    ts = np.asarray(ts)
+
+    if ts.ndim != 1:
+        raise ValueError('Argument \'ts\' should be 1 dimensional.')
+
+    n = len(ts)
+
+    if not 1 <= window <= n:
+        raise ValueError('Window should be in range [1, {}], got {}.'.format(
+            n, window))
+
+    k = n - window + 1
+    stride = ts.strides[0]
+
+    return as_strided(ts, shape=(window, k), strides=(stride, stride),
+                      writeable=False)
+
+
+def hankel2d_matrix(ts, window):
+    """Return the Hankel-block-Hankel trajectory matrix of a 2d field
+
+    For a field :math:`F` of shape (`Nx`, `Ny`) and a window (`Lx`, `Ly`),
+    the trajectory matrix :math:`X` of shape (`Lx` * `Ly`, `Kx` * `Ky`),
+    where `Kx` = `Nx` - `Lx` + 1 and `Ky` = `Ny` - `Ly` + 1, is such that
+    ``X[i1 * Ly + i2, j1 * Ky + j2] == F[i1 + j1, i2 + j2]``. Unlike the 1d
+    case, the matrix cannot be a strided view and is copied.
+
+    Parameters
+    ----------
+    ts : np.ndarray
+        Two dimensional array holding the field values.
+    window : tuple of int
+        The window shape (Lx, Ly), 1 <= Lx <= Nx and 1 <= Ly <= Ny.
+
+    Returns
+    -------
+    x : np.ndarray
+        Matrix of shape (Lx * Ly, Kx * Ky).
+
+    Examples
+    --------
+
+    >>> hankel2d_matrix(np.arange(6).reshape(2, 3), (1, 2))
+    array([[0, 1, 3, 4],
+           [1, 2, 4, 5]])
+
+    """
+
+    ts = np.asarray(ts)
+    lx, ly = check_window2d(ts, window)
+
+    # (Kx, Ky, Lx, Ly) view of the windows, rows being window positions
+
+    x = sliding_window_view(ts, (lx, ly))
+    kx, ky = x.shape[:2]
+
+    return x.transpose(2, 3, 0, 1).reshape(lx * ly, kx * ky)
+
+
+def check_window2d(ts, window):
+    """Validate a 2d window, return it as a tuple"""
+
+    if ts.ndim != 2:
+        raise ValueError('Argument \'ts\' should be 2 dimensional.')
+
+    try:
+        lx, ly = window
+    except (TypeError, ValueError):
+        raise ValueError('Window should be a pair of integers, got '
+                         '{!r}.'.format(window))
+
+    nx, ny = ts.shape
+
+    if not (1 <= lx <= nx and 1 <= ly <= ny):
+        raise ValueError('Window should be in range [1, {}] x [1, {}], got '
+                         '{}.'.format(nx, ny, tuple(window)))
+
+    return int(lx), int(ly)
+
+
+def _float_dtype(dtype):
+    """Return dtype if it is a floating type, float64 otherwise"""
+
+    if np.issubdtype(dtype, np.floating):
+        return np.dtype(dtype)
+
+    return np.dtype(np.float64)
+
+
+# -------------------------------------------------------------------------------
+# Diagonal averaging
+
+@lru_cache(maxsize=16)
+def antidiagonal_counts(m, n):
+    """Return the number of elements on each anti-diagonal of a (m, n) matrix
+
+    Examples
+    --------
+
+    >>> antidiagonal_counts(3, 4)
+    array([1, 2, 3, 3, 2, 1])
+
+    """
+
+    t = np.arange(m + n - 1)
+    counts = np.minimum(np.minimum(t + 1, m + n - 1 - t), min(m, n))
+
+    # the array is shared between calls
+
+    counts.setflags(write=False)
+
+    return counts
+
+
+def hankelize(x):
+    """Average the anti-diagonals of one or many matrices
+
+    Diagonal averaging (hankelization) maps a matrix of shape (`m`, `n`) to
+    the series of length `m` + `n` - 1 whose element `t` is the mean of the
+    elements ``x[i, j]`` with ``i + j == t``. Each row along the shorter side
+    is added to a shifted slice of the sums, in O(m + n) extra memory, and
+    the sums are divided by the precomputed counts. The min(m, n) slice
+    additions are faster than one ``np.bincount`` over a m * n index, which
+    would also have to be stored, see the '_hankelmatrix_to_ts' stages of
+    `vassal.devutil.benchmark`.
+
+    Parameters
+    ----------
+    x : array-like
+        Matrix of shape (m, n) or stack of matrices of shape (..., m, n).
+
+    Returns
+    -------
+    ts : np.ndarray
+        Averaged series of shape (m + n - 1,) or (..., m + n - 1).
+
+    Examples
+    --------
+
+    >>> hankelize(np.array([[0., 1., 2.], [1., 2., 3.]]))
+    array([0., 1., 2., 3.])
+
+    """
+
+    x = np.asarray(x)
+
+    *batch, m, n = x.shape
+    nb = int(np.prod(batch))
+    nd = m + n - 1
+
+    # anti-diagonals of x and x^T are the same, loop over the shorter side
+
+    if m > n:
+        x = np.swapaxes(x, -1, -2)
+
+    rows = x.reshape((nb,) + x.shape[-2:])
+    p, q = rows.shape[-2:]
+
+    sums = np.zeros((nb, nd))
+
+    for i in range(p):
+        sums[:, i:i + q] += rows[:, i, :]
+
+    ts = sums.reshape(tuple(batch) + (nd,)) / antidiagonal_counts(m, n)
+
+    return ts.astype(_float_dtype(x.dtype), copy=False)
+
+
+def hankelize_outer(a, b, combine=True, groups=None):
+    """Average the anti-diagonals of rank-one matrices without forming them
+
+    The anti-diagonal sums of the outer product ``a_i b_i^T`` are the linear
+    convolution of `a_i` and `b_i`. They are computed with FFTs in
+    O(N log N) time and O(N) memory, N = m + n - 1, instead of O(m n).
+
+    Parameters
+    ----------
+    a : array-like
+        Left factors as columns, shape (..., m, r).
+    b : array-like
+        Right factors as columns, shape (..., n, r). Leading dimensions of
+        `a` and `b` are broadcast.
+    combine : bool, optional
+        If True (default), return the diagonal average of the sum of the
+        rank-one matrices. The sum is done in the frequency domain. If False,
+        return the diagonal average of each rank-one matrix.
+    groups : list of list of int, optional
+        If given, return the diagonal average of the sum of each group of
+        rank-one matrices, sharing the forward FFTs between groups.
+
+    Returns
+    -------
+    ts : np.ndarray
+        Array of shape (..., m + n - 1) if combine is True, else
+        (..., r, m + n - 1), or (..., G, m + n - 1) for G groups.
+
+    Examples
+    --------
+
+    >>> a = np.array([[1.], [2.]])
+    >>> b = np.array([[1.], [1.], [1.]])
+    >>> np.round(hankelize_outer(a, b), 12)
+    array([1. , 1.5, 1.5, 2. ])
+
+    """
+
+    a = np.asarray(a)
+    b = np.asarray(b)
+
+    m, r = a.shape[-2:]
+    n = b.shape[-2]
+    nd = m + n - 1
+
+    dtype = _float_dtype(np.result_type(a, b))
+    counts = antidiagonal_counts(m, n)
+
+    # leading dimensions of a and b are broadcast together
+
+    lead = np.broadcast_shapes(a.shape[:-2], b.shape[:-2])
+
+    if groups is not None:
+        shape = lead + (len(groups), nd)
+    elif combine:
+        shape = lead + (nd,)
+    else:
+        shape = lead + (0, nd)
+
+    if r == 0:
+        return np.zeros(shape, dtype=dtype)
+
+    nfft = next_fast_len(nd, real=True)
+
+    ab_hat = rfft(a, nfft, axis=-2) * rfft(b, nfft, axis=-2)
+
+    if groups is not None:
+        ab_hat = np.stack([ab_hat[..., list(idx)].sum(axis=-1)
+                           for idx in groups], axis=-2)
+        ts = irfft(ab_hat, nfft, axis=-1)[..., :nd] / counts
+    elif combine:
+        ts = irfft(ab_hat.sum(axis=-1), nfft, axis=-1)[..., :nd] / counts
+    else:
+        ts = irfft(ab_hat, nfft, axis=-2)[..., :nd, :] / counts[:, None]
+        ts = np.swapaxes(ts, -1, -2)
+
+    return ts.astype(dtype, copy=False)
+
+
+def hankelize2d(x, window, shape):
+    """Average the anti-diagonals of a Hankel-block-Hankel matrix
+
+    Inverse of `hankel2d_matrix` for matrices that are not exactly
+    Hankel-block-Hankel: element (t1, t2) of the field is the mean of the
+    elements of `x` indexing it. The 2d counts are separable, so the
+    averaging is done as two vectorized 1d `hankelize` passes, one per axis.
+
+    Parameters
+    ----------
+    x : array-like
+        Matrix of shape (Lx * Ly, Kx * Ky).
+    window : tuple of int
+        The window shape (Lx, Ly).
+    shape : tuple of int
+        The field shape (Nx, Ny).
+
+    Returns
+    -------
+    ts : np.ndarray
+        Field of shape (Nx, Ny).
+
+    Examples
+    --------
+
+    >>> f = np.arange(6.).reshape(2, 3)
+    >>> hankelize2d(hankel2d_matrix(f, (1, 2)), (1, 2), f.shape)
+    array([[0., 1., 2.],
+           [3., 4., 5.]])
+
+    """
+
+    x = np.asarray(x)
+
+    lx, ly = window
+    nx, ny = shape
+    kx, ky = nx - lx + 1, ny - ly + 1
+
+    # (Ly, Ky, Lx, Kx) averaged along x, then (Nx, Ly, Ky) along y
+
+    x = x.reshape(lx, ly, kx, ky).transpose(1, 3, 0, 2)
+    x = np.moveaxis(hankelize(x), -1, 0)
+
+    return hankelize(x)
+
+
+def hankelize2d_outer(a, b, combine=True):
+    """Average the anti-diagonals of rank-one Hankel-block-Hankel matrices
+
+    The 2d anti-diagonal sums of ``a_i b_i^T``, with `a_i` and `b_i` seen as
+    (Lx, Ly) and (Kx, Ky) arrays, are their 2d linear convolution. They are
+    computed with 2d FFTs without forming the matrices.
+
+    Parameters
+    ----------
+    a : array-like
+        Left factors, shape (Lx, Ly, r).
+    b : array-like
+        Right factors, shape (Kx, Ky, r).
+    combine : bool, optional
+        If True (default), return the diagonal average of the sum of the
+        rank-one matrices, else the diagonal average of each of them.
+
+    Returns
+    -------
+    ts : np.ndarray
+        Field of shape (Nx, Ny) if combine is True, else (r, Nx, Ny).
+
+    Examples
+    --------
+
+    >>> a = np.ones((1, 2, 1))
+    >>> b = np.arange(4.).reshape(2, 2, 1)
+    >>> np.round(hankelize2d_outer(a, b), 12)
+    array([[0. , 0.5, 1. ],
+           [2. , 2.5, 3. ]])
+
+    """
+
+    a = np.asarray(a)
+    b = np.asarray(b)
+
+    (lx, ly, r), (kx, ky) = a.shape, b.shape[:2]
+    nx, ny = lx + kx - 1, ly + ky - 1
+
+    dtype = _float_dtype(np.result_type(a, b))
+    counts = np.outer(antidiagonal_counts(lx, kx), antidiagonal_counts(ly, ky))
+
+    if r == 0:
+        return np.zeros((nx, ny) if combine else (0, nx, ny), dtype=dtype)
+
+    nfft = (next_fast_len(nx, real=True), next_fast_len(ny, real=True))
+
+    ab_hat = rfftn(a, nfft, axes=(0, 1)) * rfftn(b, nfft, axes=(0, 1))
+
+    if combine:
+        ts = irfftn(ab_hat.sum(axis=-1), nfft)[:nx, :ny] / counts
+    else:
+        ts = irfftn(ab_hat, nfft, axes=(0, 1))[:nx, :ny] / counts[..., None]
+        ts = np.moveaxis(ts, -1, 0)
+
+    return ts.astype(dtype, copy=False)
+
+
+def weighted_correlation(f, weights):
+    """Weighted correlation matrix of series
+
+    The matrix is obtained from the weighted Gram matrix
+    :math:`(W^{1/2} F)(W^{1/2} F)^T` computed with a single matrix product.
+
+    Parameters
+    ----------
+    f : array-like
+        Series as rows, shape (r, N).
+    weights : array-like
+        Weight of each index, shape (N,).
+
+    Returns
+    -------
+    wcorr : np.ndarray
+        Symmetric matrix of shape (r, r). Correlations with a null series
+        are set to 0.
+
+    Examples
+    --------
+
+    >>> f = np.array([[1., 0., -1.], [2., 0., -2.], [0., 1., 0.]])
+    >>> weighted_correlation(f, np.ones(3))
+    array([[1., 1., 0.],
+           [1., 1., 0.],
+           [0., 0., 1.]])
+
+    """
+
+    f = np.asarray(f)
+
+    g = f * np.sqrt(weights).astype(_float_dtype(f.dtype), copy=False)
+    g = g.reshape(len(g), -1)
+
+    gram = np.dot(g, g.T)
+
+    norms = np.sqrt(np.diag(gram))
+    norms[norms == 0] = np.inf
+
+    return gram / np.outer(norms, norms)
+
+
+# -------------------------------------------------------------------------------
+# Covariance
+
+def autocovariance(ts, maxlag):
+    """Lagged autocovariance of a time series computed with a FFT
+
+    The lagged product sums ``sum(ts[:n - d] * ts[d:])`` of all lags are
+    obtained in O(n log n) from the power spectrum and divided by the number
+    of products n - d.
+
+    Parameters
+    ----------
+    ts : array-like
+        One dimensional array holding the time series values.
+    maxlag : int
+        Number of lags, 1 <= maxlag <= len(ts).
+
+    Returns
+    -------
+    c : np.ndarray
+        Autocovariance of lags 0 to maxlag - 1.
+
+    Examples
+    --------
+
+    >>> np.round(autocovariance(np.array([1., 2., 3.]), 3), 12)
+    array([4.66666667, 4.        , 3.        ])
+
+    """
+
+    ts = np.asarray(ts)
+    n = len(ts)
+
+    if not 1 <= maxlag <= n:
+        raise ValueError('maxlag should be in range [1, {}], got {}.'.format(
+            n, maxlag))
+
+    dtype = _float_dtype(ts.dtype)
+
+    # zero padding to n + maxlag - 1 avoids circular aliasing of the lags
+
+    nfft = next_fast_len(n + maxlag - 1, real=True)
+    ts_hat = rfft(ts.astype(dtype, copy=False), nfft)
+
+    lagsum = irfft(ts_hat.real ** 2 + ts_hat.imag ** 2, nfft)[:maxlag]
+
+    return (lagsum / (n - np.arange(maxlag))).astype(dtype, copy=False)
+
+
+def hankel_gram(ts, window):
+    """Cross-product matrix X X^T of the Hankel trajectory matrix
+
+    The first row of X X^T is computed with a FFT. The other elements follow
+    from the recursion along the diagonals
+
+    .. math::
+
+        (XX^T)_{i+1, j+1} = (XX^T)_{i, j} + y_{i+K} y_{j+K} - y_i y_j
+
+    evaluated with cumulative sums, so that the cost is O(N log N + L^2)
+    instead of O(L^2 K).
+
+    Parameters
+    ----------
+    ts : array-like
+        One dimensional array holding the time series values.
+    window : int
+        The window length L, 1 <= window <= len(ts).
+
+    Returns
+    -------
+    c : np.ndarray
+        Symmetric matrix of shape (window, window).
+
+    Examples
+    --------
+
+    >>> ts = np.arange(5.)
+    >>> x = hankel_view(ts, 2)
+    >>> np.allclose(hankel_gram(ts, 2), x.dot(x.T))
+    True
+
+    """
+
+    ts = np.asarray(ts)
+    ts = ts.astype(_float_dtype(ts.dtype), copy=False)
+
+    n = len(ts)
+    l = window
+    k = n - l + 1
+
+    # first row, (X X^T)[0, d] = (X ts[:K])[d]
+
+    first = HankelOperator(ts, l).matvec(ts[:k])
+
+    if l == 1:
+        return first.reshape(1, 1)
+
+    # diagonal increments p[d, m] = y[m + K] y[m + K + d] - y[m] y[m + d],
+    # only m + d <= L - 2 is used, padding fills the other positions
+
+    tail = np.zeros(2 * l - 2, dtype=ts.dtype)
+    tail[:l - 1] = ts[k:]
+
+    head = np.zeros(2 * l - 2, dtype=ts.dtype)
+    head[:min(n, 2 * l - 2)] = ts[:2 * l - 2]
+
+    p = (tail[:l - 1] * sliding_window_view(tail, l - 1)[:l] -
+         head[:l - 1] * sliding_window_view(head, l - 1)[:l])
+
+    # cumulated increments cum[d, i] = sum(p[d, :i])
+
+    cum = np.zeros((l, l), dtype=ts.dtype)
+    np.cumsum(p, axis=1, out=cum[:, 1:])
+
+    # upper triangle (X X^T)[i, i + d] = first[d] + cum[d, i]
+
+    i, j = np.triu_indices(l)
+    d = j - i
+
+    c = np.zeros((l, l), dtype=ts.dtype)
+    c[i, j] = first[d] + cum[d, i]
+    c[j, i] = c[i, j]
+
+    return c
+
+
+# -------------------------------------------------------------------------------
+# Matrix-free operators
+
+class HankelOperator(LinearOperator):
+    """Matrix-free Hankel trajectory matrix of a time series
+
+    Represent the (`window`, `K`) trajectory matrix ``X[i, j] = ts[i + j]``
+    without storing it. Products ``X @ v`` and ``X.T @ u`` are correlations
+    of the time series with the vector and are computed with FFTs in
+    O(N log N), the transform of the time series being computed once.
+
+    Parameters
+    ----------
+    ts : array-like
+        One dimensional array holding the time series values.
+    window : int
+        The window length, 1 <= window <= len(ts).
+
+    Examples
+    --------
+
+    >>> ts = np.arange(5.)
+    >>> op = HankelOperator(ts, 3)
+    >>> op.matvec(np.array([1., 0., -1.]))
+    array([-2., -2., -2.])
+
+    """
+
+    def __init__(self, ts, window):
+
+        ts = np.asarray(ts)
+        dtype = _float_dtype(ts.dtype)
+
+        # validate arguments and get the trajectory shape
+
+        shape = hankel_view(ts, window).shape
+
+        super(HankelOperator, self).__init__(dtype=dtype, shape=shape)
+
+        # Only the valid part of the linear convolution is ever needed, so
+        # that circular convolutions of length >= len(ts) are free of aliasing
+
+        self._n_ts = len(ts)
+        self._nfft = next_fast_len(self._n_ts, real=True)
+        self._ts_hat = rfft(ts.astype(dtype, copy=False), self._nfft)
+
+    def _correlate(self, x, m):
+        """Correlate the time series with the rows of x, keep valid part
+
+        x has shape (m, p), the output has shape (len(ts) - m + 1, p).
+        """
+
+        x_hat = rfft(x[::-1], self._nfft, axis=0)
+        y = irfft(self._ts_hat[:, None] * x_hat, self._nfft, axis=0)
+
+        return y[m - 1:self._n_ts].astype(self.dtype, copy=False)
+
+    def _matmat(self, x):
+        return self._correlate(np.asarray(x), self.shape[1])
+
+    def _rmatmat(self, x):
+        return self._correlate(np.asarray(x), self.shape[0])
+
+    def _matvec(self, x):
+        return self._matmat(np.reshape(x, (-1, 1))).ravel()
+
+    def _rmatvec(self, x):
+        return self._rmatmat(np.reshape(x, (-1, 1))).ravel()
+
+
+class BlockHankelOperator(LinearOperator):
+    """Matrix-free block Hankel trajectory matrix of multichannel series
+
+    Represent the (`window`, `C` * `K`) trajectory matrix
+    ``[X_1 | X_2 | ... | X_C]`` of `C` channels, ``X_c`` being the Hankel
+    trajectory matrix of channel c, without storing it. Products are
+    correlations computed with FFTs in O(C N log N), the transforms of the
+    channels being computed once.
+
+    Parameters
+    ----------
+    ts : array-like
+        Two dimensional array of shape (N, C) holding the channels as
+        columns.
+    window : int
+        The window length, 1 <= window <= N.
+
+    Examples
+    --------
+
+    >>> ts = np.arange(10.).reshape(2, 5).T
+    >>> op = BlockHankelOperator(ts, 3)
+    >>> op.shape
+    (3, 6)
+    >>> np.round(op.matvec(np.ones(6)), 12)
+    array([21., 27., 33.])
+
+    """
+
+    def __init__(self, ts, window):
+
+        ts = np.asarray(ts)
+
+        if ts.ndim != 2:
+            raise ValueError('Argument \'ts\' should be 2 dimensional.')
+
+        n, nch = ts.shape
+        dtype = _float_dtype(ts.dtype)
+
+        # validate arguments and get the trajectory shape of a channel
+
+        m, k = hankel_view(ts[:, 0], window).shape
+
+        super(BlockHankelOperator, self).__init__(dtype=dtype,
+                                                  shape=(m, nch * k))
+
+        self._n_ts = n
+        self._n_channels = nch
+        self._k = k
+        self._nfft = next_fast_len(n, real=True)
+        self._ts_hat = rfft(ts.astype(dtype, copy=False), self._nfft, axis=0)
+
+    def _matmat(self, x):
+
+        # sum of the channel correlations, done in the frequency domain
+
+        x = np.asarray(x).reshape(self._n_channels, self._k, -1)
+
+        x_hat = rfft(x[:, ::-1], self._nfft, axis=1)
+        y = irfft(np.einsum('fc,cfp->fp', self._ts_hat, x_hat), self._nfft,
+                  axis=0)
+
+        return y[self._k - 1:self._n_ts].astype(self.dtype, copy=False)
+
+    def _rmatmat(self, x):
+
+        x = np.asarray(x)
+        m = self.shape[0]
+
+        x_hat = rfft(x[::-1], self._nfft, axis=0)
+        y = irfft(self._ts_hat.T[:, :, None] * x_hat, self._nfft, axis=1)
+        y = y[:, m - 1:self._n_ts]
+
+        return y.reshape(-1, x.shape[1]).astype(self.dtype, copy=False)
+
+    def _matvec(self, x):
+        return self._matmat(np.reshape(x, (-1, 1))).ravel()
+
+    def _rmatvec(self, x):
+        return self._rmatmat(np.reshape(x, (-1, 1))).ravel()
+
+
+class HankelBlockHankelOperator(LinearOperator):
+    """Matrix-free Hankel-block-Hankel trajectory matrix of a 2d field
+
+    Represent the (`Lx` * `Ly`, `Kx` * `Ky`) trajectory matrix of
+    `hankel2d_matrix` without storing it. Products are 2d correlations of
+    the field with the vectors seen as 2d arrays, computed with 2d FFTs in
+    O(Nx Ny log(Nx Ny)), the transform of the field being computed once.
+
+    Parameters
+    ----------
+    ts : array-like
+        Two dimensional array holding the field values.
+    window : tuple of int
+        The window shape (Lx, Ly).
+
+    Examples
+    --------
+
+    >>> f = np.arange(6.).reshape(2, 3)
+    >>> op = HankelBlockHankelOperator(f, (1, 2))
+    >>> np.round(op.matvec(np.array([1., 0., 0., 0.])), 12)
+    array([0., 1.])
+
+    """
+
+    def __init__(self, ts, window):
+
+        ts = np.asarray(ts)
+        dtype = _float_dtype(ts.dtype)
+
+        lx, ly = check_window2d(ts, window)
+        nx, ny = ts.shape
+        kx, ky = nx - lx + 1, ny - ly + 1
+
+        super(HankelBlockHankelOperator, self).__init__(
+            dtype=dtype, shape=(lx * ly, kx * ky))
+
+        # circular correlations of size >= (Nx, Ny) are free of aliasing on
+        # their valid part
+
+        self._window = (lx, ly)
+        self._k = (kx, ky)
+        self._n_ts = (nx, ny)
+        self._nfft = (next_fast_len(nx, real=True),
+                      next_fast_len(ny, real=True))
+        self._ts_hat = rfftn(ts.astype(dtype, copy=False), self._nfft)
+
+    def _correlate(self, x, m):
+        """Correlate the field with the 2d arrays x[:, :, p], keep valid part
+
+        x has shape (mx, my, p), the output has shape
+        ((Nx - mx + 1) * (Ny - my + 1), p).
+        """
+
+        (nx, ny), (mx, my) = self._n_ts, m
+
+        x_hat = rfftn(x[::-1, ::-1], self._nfft, axes=(0, 1))
+        y = irfftn(self._ts_hat[..., None] * x_hat, self._nfft, axes=(0, 1))
+        y = y[mx - 1:nx, my - 1:ny]
+
+        return y.reshape(-1, x.shape[-1]).astype(self.dtype, copy=False)
+
+    def _matmat(self, x):
+        x = np.asarray(x).reshape(self._k + (-1,))
+        return self._correlate(x, self._k)
+
+    def _rmatmat(self, x):
+        x = np.asarray(x).reshape(self._window + (-1,))
+        return self._correlate(x, self._window)
+
+    def _matvec(self, x):
+        return self._matmat(np.reshape(x, (-1, 1))).ravel()
+
+    def _rmatvec(self, x):
+        return self._rmatmat(np.reshape(x, (-1, 1))).ravel()
+
+
+class DeflatedOperator(LinearOperator):
+    """Linear operator deflated from known left singular vectors
+
+    Represent :math:`(I - U U^T) A` for orthonormal columns :math:`U`. If
+    :math:`U` holds the leading left singular vectors of :math:`A`, the
+    leading singular triplets of the deflated operator are the next ones of
+    :math:`A`, so that a truncated decomposition can be extended without
+    computing again the known triplets.
+
+    Parameters
+    ----------
+    a : LinearOperator
+        The operator to deflate.
+    u : array-like
+        Orthonormal columns of shape (a.shape[0], r).
+
+    Examples
+    --------
+
+    >>> from scipy.sparse.linalg import aslinearoperator
+    >>> op = DeflatedOperator(aslinearoperator(np.diag([3., 2.])),
+    ...                       np.array([[1.], [0.]]))
+    >>> op.matvec(np.ones(2))
+    array([0., 2.])
+
+    """
+
+    def __init__(self, a, u):
+
+        super(DeflatedOperator, self).__init__(dtype=a.dtype, shape=a.shape)
+
+        self._a = a
+        self._u = np.asarray(u)
+
+    def _project(self, y):
+        """Project the columns of y on the orthogonal complement of U"""
+        return y - np.dot(self._u, np.dot(self._u.T, y))
+
+    def _matmat(self, x):
+        return self._project(self._a.matmat(np.asarray(x)))
+
+    def _rmatmat(self, x):
+        return self._a.rmatmat(self._project(np.asarray(x)))
+
+    def _matvec(self, x):
+        return self._matmat(np.reshape(x, (-1, 1))).ravel()
+
+    def _rmatvec(self, x):
+        return self._rmatmat(np.reshape(x, (-1, 1))).ravel()
+
+
+class ToeplitzOperator(LinearOperator):
+    """Matrix-free symmetric Toeplitz matrix
+
+    Represent the (`k`, `k`) matrix ``C[i, j] = c[abs(i - j)]`` without
+    storing it. Products are computed in O(k log k) with FFTs by embedding
+    the matrix in a circulant matrix of size >= 2k - 1.
+
+    Parameters
+    ----------
+    c : array-like
+        First column of the matrix, shape (k,).
+
+    Examples
+    --------
+
+    >>> op = ToeplitzOperator(np.array([2., 1., 0.]))
+    >>> np.round(op.matvec(np.ones(3)), 12)
+    array([3., 4., 3.])
+
+    """
+
+    def __init__(self, c):
+
+        c = np.asarray(c)
+        k = len(c)
+        dtype = _float_dtype(c.dtype)
+
+        super(ToeplitzOperator, self).__init__(dtype=dtype, shape=(k, k))
+
+        # first column of the circulant embedding: c, zeros, reversed c[1:]
+
+        self._nfft = next_fast_len(2 * k - 1, real=True)
+
+        col = np.zeros(self._nfft, dtype=dtype)
+        col[:k] = c
+        col[self._nfft - k + 1:] = c[:0:-1]
+
+        self._col_hat = rfft(col)
+
+    def _matmat(self, x):
+
+        x = np.asarray(x)
+
+        x_hat = rfft(x, self._nfft, axis=0)
+        y = irfft(self._col_hat[:, None] * x_hat, self._nfft, axis=0)
+
+        return y[:self.shape[0]].astype(self.dtype, copy=False)
+
+    def _matvec(self, x):
+        return self._matmat(np.reshape(x, (-1, 1))).ravel()
+
+    # the matrix is symmetric
+
+    _rmatmat = _matmat
+    _rmatvec = _matvec
+
+
+# -------------------------------------------------------------------------------
+# Forecasting
+
+def lrr_coefficients(u):
+    """Coefficients of the linear recurrence relation of a signal subspace
+
+    For orthonormal columns :math:`U` of shape (L, r), with :math:`\\pi` the
+    last row and :math:`\\nabla` the L - 1 first rows, the coefficients
+    :math:`R = \\nabla \\pi / (1 - \\nu^2)`, :math:`\\nu^2 = \\|\\pi\\|^2`,
+    define the recurrence ``y[t] = R @ y[t - L + 1:t]`` satisfied by the
+    series whose lag vectors lie in the span of :math:`U`.
+
+    Parameters
+    ----------
+    u : array-like
+        Orthonormal columns, shape (..., L, r). Zero columns are allowed.
+
+    Returns
+    -------
+    r : np.ndarray
+        Coefficients of shape (..., L - 1), applied to the L - 1 last values
+        in chronological order.
+
+    Examples
+    --------
+
+    >>> t = np.arange(3.)
+    >>> u = np.linalg.qr(np.array([np.cos(t), np.sin(t)]).T)[0]
+    >>> np.round(lrr_coefficients(u), 12)
+    array([-1.        ,  1.08060461])
+
+    """
+
+    u = np.asarray(u)
+
+    pi = u[..., -1, :]
+    nabla = u[..., :-1, :]
+
+    nu2 = np.sum(pi ** 2, axis=-1)
+
+    if np.any(nu2 >= 1. - 1e-12):
+        raise ValueError('The last coordinate vector lies in the subspace, '
+                         'no linear recurrence relation can be derived.')
+
+    return np.matmul(nabla, pi[..., None])[..., 0] / (1. - nu2)[..., None]
+
+
+def linear_orbit(a, x, n):
+    """Return the orbit of vectors under a linear map
+
+    The iterates ``a^k x``, k < `n`, are computed by repeated doubling: the
+    known iterates are multiplied by the largest computed power of `a`, so
+    that only O(log n) stacked matrix products are needed.
+
+    Parameters
+    ----------
+    a : array-like
+        Square matrices of shape (..., d, d).
+    x : array-like
+        Initial vectors of shape (..., d).
+    n : int
+        Number of iterates.
+
+    Returns
+    -------
+    orbit : np.ndarray
+        Iterates of shape (..., n, d).
+
+    Examples
+    --------
+
+    >>> linear_orbit(np.array([[2., 0.], [0., 3.]]), np.ones(2), 4)
+    array([[ 1.,  1.],
+           [ 2.,  3.],
+           [ 4.,  9.],
+           [ 8., 27.]])
+
+    """
+
+    a = np.asarray(a)
+
+    orbit = np.asarray(x)[..., None]
+    power = a
+
+    while orbit.shape[-1] < n:
+        orbit = np.concatenate([orbit, np.matmul(power, orbit)], axis=-1)
+        power = np.matmul(power, power)
+
+    return np.swapaxes(orbit[..., :n], -1, -2)
+
+
+# -------------------------------------------------------------------------------
+# Solvers
+
+def randomized_svd(a, n_components, n_oversamples=10, n_iter='auto',
+                   power_iteration_normalizer='auto', random_state=None,
+                   q0=None):
+    """Randomized SVD of a matrix or a linear operator
+
+    Port of `sklearn.utils.extmath.randomized_svd` that only requires
+    products with `a` and its transpose, so that it applies to any
+    `scipy.sparse.linalg.LinearOperator`. Parameters have the same meaning
+    as in sklearn. Signs are resolved with `svd_flip`.
+
+    The range finder can be warm-started with `q0`, an initial block of
+    shape (N, p) approximately spanning the leading right singular
+    subspace, e.g. ``a.T @ u`` for approximate left singular vectors `u`.
+    Columns beyond p, up to n_components + n_oversamples, are random. Fewer
+    power iterations are then needed.
+
+    Returns
+    -------
+    u : np.ndarray
+        Left singular vectors as columns, shape (M, n_components).
+    s : np.ndarray
+        Singular values in decreasing order.
+    vt : np.ndarray
+        Right singular vectors as rows, shape (n_components, N).
+
+    References
+    ----------
+
+    Halko, et al., 2009 "Finding structure with randomness: Stochastic
+    algorithms for constructing approximate matrix decompositions"
+    http://arxiv.org/abs/arXiv:0909.4061
+
+    """
+
+    random_state = check_random_state(random_state)
+
+    m, n = a.shape
+    size = n_components + n_oversamples
+
+    if n_iter == 'auto':
+        n_iter = 7 if n_components < .1 * min(m, n) else 4
+
+    if power_iteration_normalizer == 'auto':
+        power_iteration_normalizer = 'none' if n_iter <= 2 else 'LU'
+
+    # randomized range finder
+
+    q = random_state.normal(size=(n, size)).astype(a.dtype, copy=False)
+
+    if q0 is not None:
+        q0 = np.asarray(q0).reshape(n, -1)[:, :size]
+        q[:, :q0.shape[1]] = q0
+
+    for _ in range(n_iter):
+        q = _normalize(a.matmat(q), power_iteration_normalizer)
+        q = _normalize(a.rmatmat(q), power_iteration_normalizer)
+
+    q, _ = qr(a.matmat(q), mode='economic')
+
+    # project a on the range and decompose the small matrix
+
+    b = a.rmatmat(q).T
+
+    uhat, s, vt = svd(b, full_matrices=False)
+
+    u = np.dot(q, uhat)
+
+    u, vt = svd_flip(u, vt)
+
+    return u[:, :n_components], s[:n_components], vt[:n_components, :]
+
+
+def _normalize(x, method):
+    """Normalize the power iterations of the randomized range finder"""
+
+    if method == 'LU':
+        x, _ = lu(x, permute_l=True)
+    elif method == 'QR':
+        x, _ = qr(x, mode='economic')
+
+    return x
+
+
+def eigh_to_svd(w, u):
+    """Convert the eigendecomposition of a symmetric matrix to a SVD
+
+    The singular values of a symmetric matrix are the absolute values of its
+    eigenvalues, left singular vectors are its eigenvectors and right
+    singular vectors are the eigenvectors multiplied by the eigenvalue signs.
+    The output is sorted by decreasing singular values and signs are
+    resolved with `svd_flip`, as for the SVD wrappers.
+
+    Parameters
+    ----------
+    w : array-like
+        Eigenvalues, shape (r,).
+    u : array-like
+        Eigenvectors as columns, shape (k, r).
+
+    Returns
+    -------
+    u : np.ndarray
+        Left singular vectors as columns, shape (k, r).
+    s : np.ndarray
+        Singular values in decreasing order.
+    vt : np.ndarray
+        Right singular vectors as rows, shape (r, k).
+
+    """
+
+    order = np.argsort(-np.abs(w), kind='stable')
+
+    w = np.asarray(w)[order]
+    u = np.asarray(u)[:, order]
+
+    vt = (u * np.where(w < 0, -1., 1.).astype(u.dtype)).T
+
+    u, vt = svd_flip(u, vt)
+
+    return u, np.abs(w), vt
+
+
+def svd_append_columns(u, s, c):
+    """Update the left factors of a SVD when columns are appended
+
+    Given the (possibly truncated) SVD :math:`X \\approx U S V^T`, return the
+    left singular vectors and singular values of :math:`[X, C]` with the
+    incremental update of Brand (2006), keeping the rank of the input. The
+    right singular vectors are not needed nor updated. The cost is
+    O(M r p + (r + p)^3) for r components and p new columns, independent of
+    the number of columns of X.
+
+    Parameters
+    ----------
+    u : array-like
+        Left singular vectors as columns, shape (M, r).
+    s : array-like
+        Singular values, shape (r,).
+    c : array-like
+        Appended columns, shape (M, p).
+
+    Returns
+    -------
+    u : np.ndarray
+        Updated left singular vectors, shape (M, r).
+    s : np.ndarray
+        Updated singular values, shape (r,).
+
+    References
+    ----------
+
+    Brand, Matthew. "Fast low-rank modifications of the thin singular value
+    decomposition." Linear Algebra and its Applications 415.1 (2006): 20-30.
+
+    """
+
+    u = np.asarray(u)
+    s = np.asarray(s)
+    c = np.asarray(c, dtype=u.dtype)
+
+    r = len(s)
+    p = c.shape[1]
+
+    # components of the new columns in and orthogonal to span(U)
+
+    m = np.dot(u.T, c)
+    q, rc = qr(c - np.dot(u, m), mode='economic')
+
+    # SVD of the small (r + p, r + p) middle matrix
+
+    k = np.zeros((r + q.shape[1], r + p), dtype=u.dtype)
+    k[:r, :r] = np.diag(s)
+    k[:r, r:] = m
+    k[r:, r:] = rc
+
+    uk, sk, _ = svd(k, full_matrices=False)
+
+    u = np.dot(np.hstack([u, q]), uk[:, :r])
+
+    # same sign convention as svd_flip
+
+    signs = np.sign(u[np.argmax(np.abs(u), axis=0), np.arange(r)])
+    signs[signs == 0] = 1.
+
+    return u * signs, sk[:r]
+
+
+if __name__ == '__main__':
+    import doctest
+
+    doctest.testmod()
@@ -59,6 +59,10 @@ class PlotSSA(object):
 
     def _value_plot(self, n=50, ax=None, **pltkw):
 
+        # the computed values only, a lazy decomposition is not extended
+
+        n = min(n, self._n_components)
+
         # eigenvalues
         eigenvalues = self.svd[1]  # TODO: check if needed to raise power
 
@@ -137,6 +141,8 @@ class PlotSSA(object):
 
         """
 
+        self._ensure_components(n)
+
         u = self.svd[0]
         s = self.svd[1] ** 2  # TODO: check if power is needed
 
@@ -169,6 +175,8 @@ class PlotSSA(object):
 
         # TODO: check type pairs list of tuple of size 2
 
+        self._ensure_components(max(max(pair) for pair in pairs) + 1)
+
         u = self.svd[0]
         s = self.svd[1] ** 2  # TODO: check if power is needed
 
@@ -0,0 +1,125 @@
+"""Rolling-window Singular Spectrum Analysis
+
+"""
+
+import numpy as np
+import pandas as pd
+
+from vassal.ssa import ssa
+
+
+def rolling(ts, size, step=1, k=10, groups=None, kind='basic',
+            svdmethod='sparpack', warm_start=True, **kwargs):
+    """Decompose a time series over sliding windows
+
+    Generator yielding an SSA object for each window of `size` values,
+    windows being `step` values apart. Windows are views of the time series
+    and their trajectory matrices are strided views, so the trajectory
+    columns shared by overlapping windows are never copied.
+
+    With `warm_start`, the truncated solvers 'sparpack' and 'skrandom' start
+    from the subspace of the previous window, which is close to the new one
+    when windows overlap, see BaseSSA.warm_start_kwargs. Only 'skrandom'
+    benefits much: its range finder starts from the whole previous subspace
+    and runs a single power iteration, which cuts the products with the
+    trajectory operator about fourfold. ARPACK takes a single starting
+    vector and restarts until convergence, so 'sparpack' saves a few
+    percent of its products at most. Other SVD methods are run cold for
+    every window.
+
+    Parameters
+    ----------
+    ts : arraylike
+        One dimensional array-like object (np.array, list, pd.Series)
+        holding the time series values.
+    size : int
+        Number of values of each window.
+    step : int, optional
+        Number of values between the starts of two windows. Default is 1.
+    k : int, optional
+        Number of components computed by the truncated solvers. Default
+        is 10.
+    groups : dict, optional
+        User defined groups passed to the reconstruct method of each window.
+    kind : str, optional
+        Kind of SSA, see `vassal.ssa`. Default is 'basic'.
+    svdmethod : str, optional
+        SVD method, see `vassal.ssa`. Default is 'sparpack'.
+    warm_start : bool, optional
+        Whether to warm-start each decomposition from the previous window.
+        Default is True.
+    **kwargs
+        Arguments passed to the SSA class (e.g. window, usetype, dtype) or to
+        decompose (e.g. tol, n_oversamples, random_state).
+
+    Yields
+    ------
+    start : int
+        Position of the first value of the window in the time series.
+    ssaobject : BaseSSA
+        Decomposed SSA object of the window, reconstructed with `groups` if
+        provided.
+
+    Examples
+    --------
+
+    >>> np.random.seed(0)
+    >>> ts = np.sin(np.arange(1000) / 10.) + np.random.rand(1000)
+    >>> for start, myssa in rolling(ts, size=500, step=250, k=2):
+    ...     print(start, myssa.svd[1].round(1))
+    0 [126.7 126.2]
+    250 [124.7 124.2]
+    500 [125.3 124.7]
+
+    """
+
+    n = len(ts)
+
+    if not 1 <= size <= n:
+        raise ValueError('size should be in range [1, {}], got {}.'.format(
+            n, size))
+
+    if step < 1:
+        raise ValueError('step should be a positive integer.')
+
+    # split SSA class arguments from decompose arguments
+
+    initkw = {key: kwargs.pop(key) for key in ('window', 'usetype', 'dtype')
+              if key in kwargs}
+
+    truncated = svdmethod in ('sparpack', 'skrandom')
+
+    previous = None
+
+    for start in range(0, n - size + 1, step):
+
+        if isinstance(ts, pd.Series):
+            tswin = ts.iloc[start:start + size]
+        else:
+            tswin = np.asarray(ts)[start:start + size]
+
+        ssaobject = ssa(tswin, kind=kind, svdmethod=svdmethod, **initkw)
+
+        decomposekw = dict(kwargs)
+
+        if truncated:
+            decomposekw['k'] = k
+
+        if warm_start and truncated and previous is not None:
+            decomposekw.update(ssaobject.warm_start_kwargs(
+                previous, kwargs.get('n_iter')))
+
+        ssaobject.decompose(**decomposekw)
+
+        if groups:
+            ssaobject.reconstruct(groups)
+
+        previous = ssaobject.svd
+
+        yield start, ssaobject
+
+
+if __name__ == '__main__':
+    import doctest
+
+    doctest.testmod()
@@ -4,8 +4,27 @@
 import warnings
 
 import numpy as np
+from scipy.linalg import toeplitz
 
+from vassal import tracing
 from vassal.base import BaseSSA
+from vassal.dtypes import is_1darray_like, arraylike_to_nparray
+from vassal.linalg import (
+    BlockHankelOperator,
+    HankelBlockHankelOperator,
+    HankelOperator,
+    ToeplitzOperator,
+    antidiagonal_counts,
+    autocovariance,
+    check_window2d,
+    hankel2d_matrix,
+    hankel_gram,
+    hankel_view,
+    hankelize,
+    hankelize2d_outer,
+    hankelize_outer,
+    svd_append_columns)
+from vassal.forecast import ForecastSSA
 from vassal.plot import PlotSSA
 
 try:
@@ -23,11 +42,12 @@ def ssa(ts, kind='basic', svdmethod='nplapack', **kwargs):
     ----------
     kind : str
         String specifying the kind of SSA algorithm being used. Available
-        algorithm are the basic SSA, kind='basic', and the Toeplitz SSA,
-        kind='toeplitz'.
+        algorithm are the basic SSA, kind='basic', the Toeplitz SSA,
+        kind='toeplitz', the multichannel SSA, kind='multichannel', and the
+        2d SSA of arrays and images, kind='2d'.
     """
 
-    if not np.isfinite(ts).all():
+    if not np.all(np.isfinite(ts)):
         raise ValueError('Time series must not contain infs or NaNs')
 
     ssa_object = None
@@ -38,15 +58,21 @@ def ssa(ts, kind='basic', svdmethod='nplapack', **kwargs):
     elif kind == 'toeplitz':
         ssa_object = ToeplitzSSA(ts, svdmethod=svdmethod, **kwargs)
 
+    elif kind == 'multichannel':
+        ssa_object = MSSA(ts, svdmethod=svdmethod, **kwargs)
+
+    elif kind == '2d':
+        ssa_object = SSA2D(ts, svdmethod=svdmethod, **kwargs)
+
     return ssa_object
 
 
-class BasicSSA(BaseSSA, PlotSSA):
+class BasicSSA(BaseSSA, ForecastSSA, PlotSSA):
     """A class for basic Singular Spectrum Analysis 
     """
 
     def __init__(self, ts=None, window=None, svdmethod='nplapack',
-                 usetype=__TS_DEFAULT_TYPE__):
+                 usetype=__TS_DEFAULT_TYPE__, dtype=np.float64):
         """Basic Singular Spectrum Analysis
         
         Basic Singular Spectrum Analysis embed the times series into an Hankel
@@ -78,6 +104,10 @@ class BasicSSA(BaseSSA, PlotSSA):
             Lorem Ipsum.
         usetype : str, optionnal
             Lorem Ipsums
+        dtype : {np.float64, np.float32}, optional
+            Floating type of the series values, embedding, SVD and
+            reconstructions. float32 halves memory and speeds BLAS up when
+            its precision is enough. Default is np.float64.
 
 
         Examples
@@ -125,7 +155,7 @@ class BasicSSA(BaseSSA, PlotSSA):
         """
 
         super(BasicSSA, self).__init__(ts=ts, svdmethod=svdmethod,
-                                       usetype=usetype)
+                                       usetype=usetype, dtype=dtype)
 
         # define window length if none
 
@@ -138,57 +168,237 @@ class BasicSSA(BaseSSA, PlotSSA):
 
         self._k = self._n_ts - self.window + 1
 
+        # growable buffer holding self.ts, see self.append
+
+        self._tsbuffer = None
+
+    # --------------------------------------------------------
+    # Public methods
+
+    def append(self, values):
+        """Append new values to the time series and update the decomposition
+
+        Each appended value adds one column to the trajectory matrix. If the
+        series was decomposed, the left singular vectors and singular values
+        are updated with an incremental SVD of the new columns, keeping the
+        number of components, instead of decomposing the whole trajectory
+        matrix again. Right singular vectors are dropped, they can be
+        recovered with self.right_vectors.
+
+        Parameters
+        ----------
+        values : arraylike
+            One dimensional array-like object holding the new values. If the
+            time series has a pandas index that is neither a range nor a
+            DatetimeIndex with a frequency, values should be a pd.Series
+            holding the index of the new values.
+
+        Returns
+        -------
+        None
+
+        Examples
+        --------
+
+        >>> np.random.seed(0)
+        >>> myssa = BasicSSA(ts=np.random.rand(100), window=10)
+        >>> u, s, v = myssa.decompose()
+        >>> myssa.append(np.random.rand(5))
+        >>> len(myssa['ssa_reconstruction'])
+        105
+
+        """
+
+        if not is_1darray_like(values):
+            raise TypeError('Argument \'values\' should be 1 dimensional.')
+
+        newvalues = arraylike_to_nparray(values)
+
+        if not np.isrealobj(newvalues):
+            raise TypeError('Times series elements should be real numbers.')
+
+        if not np.isfinite(newvalues).all():
+            raise ValueError('Time series must not contain infs or NaNs')
+
+        newvalues = newvalues.astype(self.dtype, copy=False)
+
+        p = len(newvalues)
+
+        if p == 0:
+            return
+
+        # index is computed first as it may raise
+
+        tsindex = self._extended_index(values, p)
+
+        n = self._n_ts
+        w = self.window
+
+        ts = self._extended_series(newvalues)
+
+        # update the decomposition with the new trajectory columns, ie the
+        # lag vectors ending with the new values
+
+        if self.svd[1] is not None:
+            r = len(self.svd[1])
+            u = np.asarray(self.svd[0])[:, :r]
+            c = hankel_view(ts[n - w + 1:], w)
+            u, s = svd_append_columns(u, self.svd[1], c)
+            self.svd = [u, s, None]
+
+        # store attributes
+
+        self.ts = ts
+        self._tsindex = tsindex
+        self._n_ts = n + p
+        self._k = self._n_ts - w + 1
+
+    def tail(self, item, n=1):
+        """Return the last values of a group reconstruction
+
+        Only the trajectory columns containing the last `n` values are used,
+        so that the cost does not depend on the series length. This is
+        useful to refresh reconstructions after self.append.
+
+        Parameters
+        ----------
+        item : str
+            Group name, see self.groups.
+        n : int, optional
+            Number of values. Default is 1.
+
+        Returns
+        -------
+        ts : np.array or pd.Series
+            The `n` last values of the reconstructed group.
+
+        """
+
+        grpidx = self._group_index(item)
+
+        nts = self._n_ts
+
+        if not 1 <= n <= nts:
+            raise ValueError('n should be in range [1, {}], got {}.'.format(
+                nts, n))
+
+        if grpidx is None:
+
+            ts = self.ts[-n:]
+
+        else:
+
+            if isinstance(grpidx, int):
+                grpidx = [grpidx]
+
+            w = self.window
+
+            # the trajectory columns from j0 hold all the elements of the
+            # anti-diagonals of the n last values
+
+            j0 = max(0, nts - n - w + 1)
+            x = hankel_view(self.ts[j0:], w)
+
+            u = np.asarray(self.svd[0])[:, list(grpidx)]
+            m, ncol = x.shape
+
+            sums = hankelize_outer(u, np.dot(x.T, u)) * \
+                antidiagonal_counts(m, ncol)
+
+            ts = sums[-n:] / self._hankel_weights()[-n:]
+
+        if self.usetype == 'pdseries':
+            ts = pd.Series(ts, name=self._tsname, index=self._tsindex[-n:])
+
+        return ts
+
     # --------------------------------------------------------
     # Private methods
 
+    def _extended_series(self, values):
+        """Return the time series extended with values
+
+        The series is stored at the beginning of a buffer whose capacity is
+        doubled when full, so that appending costs O(1) amortized.
+        """
+
+        n = self._n_ts
+        p = len(values)
+
+        buf = self._tsbuffer
+        dtype = np.result_type(self.ts, values)
+
+        if (buf is None or self.ts.base is not buf or buf.dtype != dtype or
+                len(buf) < n + p):
+            buf = np.empty(2 * (n + p), dtype=dtype)
+            buf[:n] = self.ts
+            self._tsbuffer = buf
+
+        buf[n:n + p] = values
+
+        return buf[:n + p]
+
+    @tracing.traced('embed')
     def _embedseries(self):
         """Embed a time series into a L-trajectory matrix
         
+        The trajectory matrix is a read-only strided view of the time series
+        built once per (ts, window) pair. Solvers needing a contiguous buffer
+        must copy it.
+        
         Returns
         -------
-        x : np.matrix
+        x : np.ndarray
             the trajectory matrix of size (window, k)
         
         """
 
         ts = self.ts
         w = self.window
-        k = self._k
-
-        x = np.zeros(shape=(w, k))
 
-        for i in range(k):
-            x[:, i] = ts[i:i + w]
+        x = self._cached('embedding', (ts, w), lambda: hankel_view(ts, w))
 
-        return np.matrix(x)
+        return x
 
     def _svdmatrix(self):
         return self._embedseries()
 
-    def _reconstruct_group(self, idx):
+    def _embedoperator(self):
+        """Return the trajectory matrix as a FFT based linear operator"""
 
-        u, s, v = self.svd
+        ts = self.ts
+        w = self.window
 
-        x = self._embedseries()
+        return self._cached('operator', (ts, w),
+                            lambda: HankelOperator(ts, w))
 
-        m, n = x.shape
+    def _svdoperator(self):
+        return self._embedoperator()
+
+    def _crossproduct_matrix(self):
+        """Return X X^T computed from FFT based lagged products"""
+        return hankel_gram(self.ts, self.window)
 
-        x_grp = np.matrix(np.zeros(shape=(m, n)))
+    def _hankel_weights(self):
+        """Number of elements of each anti-diagonal of the trajectory matrix"""
+        return antidiagonal_counts(self.window, self._n_ts - self.window + 1)
 
-        if isinstance(idx, int):
-            idx = [idx]
+    def _reconstruct_components(self, idx, combine=True):
+        """Reconstruct the time series of eigentriples
 
-        for i in idx:
-            s_i = np.sqrt(
-                s[i])  # TODO: check if I really need to do the square root !!
-            u_i = u[:, i]  # eigenvector i corresponding to si
-            v_i = x.T * u_i / s_i
-            x_i = s_i * u_i * v_i.T
-            x_grp += x_i
+        The elementary matrix of eigentriple i is the projection
+        u_i u_i^T X = u_i w_i^T with w_i = X^T u_i. It is never formed: w_i is
+        computed with the trajectory operator and the diagonal averages of
+        the rank-one matrices are convolutions of u_i and w_i.
+        """
+
+        u = np.asarray(self.svd[0])[:, list(idx)]
 
-        # anti diagonal averaging
+        w = self._embedoperator().rmatmat(u)
 
-        ts = self._hankelmatrix_to_ts(x_grp)
+        with tracing.stage(self, 'hankelize', (u, w)):
+            ts = hankelize_outer(u, w, combine=combine)
+            tracing.annotate(output=ts)
 
         return ts
 
@@ -198,7 +408,7 @@ class BasicSSA(BaseSSA, PlotSSA):
         
         Parameters
         ----------
-        x : np.matrix
+        x : np.ndarray
 
         Returns
         -------
@@ -207,19 +417,16 @@ class BasicSSA(BaseSSA, PlotSSA):
 
         """
 
-        ts = [np.mean(x[::-1, :].diagonal(i)) for i in
-              range(-x.shape[0] + 1, x.shape[1])]
+        return hankelize(np.asarray(x))
 
-        return np.array(ts)
 
-
-class ToeplitzSSA(BaseSSA, PlotSSA):
+class ToeplitzSSA(BaseSSA, ForecastSSA, PlotSSA):
 
     def __init__(self, ts=None, window=None, svdmethod='nplapack',
-                 usetype=__TS_DEFAULT_TYPE__):
+                 usetype=__TS_DEFAULT_TYPE__, dtype=np.float64):
 
         super(ToeplitzSSA, self).__init__(ts=ts, svdmethod=svdmethod,
-                                       usetype=usetype)
+                                       usetype=usetype, dtype=dtype)
 
         # define window length if none
 
@@ -228,67 +435,109 @@ class ToeplitzSSA(BaseSSA, PlotSSA):
 
         self.window = window
 
+    @property
+    def _SVD_METHODS_MAP(self):
+        """Map the SVD methods to their wrappers
+
+        The lag-covariance matrix is symmetric, so the symmetric
+        eigensolvers 'eigh' and 'eigh_topk' are available in addition to
+        the methods of every SSA class.
+        """
+
+        svdmap = super(ToeplitzSSA, self)._SVD_METHODS_MAP
+        svdmap.update({'eigh': self._eigh_wrapper,
+                       'eigh_topk': self._eigh_topk_wrapper})
+
+        return svdmap
+
+    @tracing.traced('embed')
     def _embedseries(self):
         """Embed a time series into a N-K-trajectory matrix
 
+        The trajectory matrix is a read-only strided view of the time series
+        padded with k - 1 zeros, built once per (ts, window) pair.
+
         Returns
         -------
-        x : np.matrix
-            the trajectory matrix of size (window, k)
+        x : np.ndarray
+            the trajectory matrix of size (n, window)
 
         """
 
-        ts = self.ts
-        k = self.window
+        padded = self._paddedseries()
         n = self._n_ts
 
-        x = np.zeros(shape=(n, k))
+        x = self._cached('embedding', (padded, n),
+                         lambda: hankel_view(padded, n))
 
-        for i in range(k):
-            x[:n-i, i] = ts[i:]
+        return x
+
+    def _embedoperator(self):
+        """Return the trajectory matrix as a FFT based linear operator"""
+
+        padded = self._paddedseries()
+        n = self._n_ts
+
+        return self._cached('operator', (padded, n),
+                            lambda: HankelOperator(padded, n))
+
+    def _paddedseries(self):
+        """Return the time series padded with window - 1 zeros"""
+
+        ts = self.ts
+        k = self.window
 
-        return np.matrix(x)
+        return self._cached(
+            'padded', (ts, k),
+            lambda: np.concatenate([ts, np.zeros(k - 1, dtype=ts.dtype)]))
 
     def _svdmatrix(self):
-        return self._covariance_matrix(self._embedseries())
+        return self._covariance_matrix()
 
-    def _covariance_matrix(self, x):
+    def _svdoperator(self):
+        """Return the lagged covariance matrix as a matrix-free operator
+
+        Truncated solvers never allocate the (window, window) matrix.
+        """
+
+        c = self._autocovariance()
+
+        return self._cached('covoperator', (c,),
+                            lambda: ToeplitzOperator(c))
+
+    def _covariance_matrix(self):
         """Compute the lagged covariance matrix of the trajectory matrix"""
-        k = self.window
-        x = np.array(x[:,0])
-        n = len(x)
-        cx = np.ones((k,k)) * np.sum(x*x)/n
+        return toeplitz(self._autocovariance())
 
-        for i in range (k):
-            for j in range(k):
-                dt = np.abs(i-j)
-                if i != j:
-                    cx[i, j] = np.sum(x[:-dt]*x[dt:])/(n -dt)
-        return np.matrix(cx)
+    def _autocovariance(self):
+        """Return the autocovariance of the window lags"""
 
-    def _reconstruct_group(self, idx):
+        ts = self.ts
+        k = self.window
 
-        u, s, v = self.svd
+        return self._cached('autocovariance', (ts, k),
+                            lambda: autocovariance(ts, k))
 
-        x = self._embedseries()
-        m, n = x.shape
+    def _hankel_weights(self):
+        """Number of elements of each anti-diagonal of the trajectory matrix"""
+        return antidiagonal_counts(self._n_ts, self.window)[:self._n_ts]
 
-        x_grp = np.matrix(np.zeros(shape=(m, n)))
+    def _reconstruct_components(self, idx, combine=True):
+        """Reconstruct the time series of eigentriples
 
-        if isinstance(idx, int):
-            idx = [idx]
+        The elementary matrix of eigentriple i is X u_i u_i^T, diagonal
+        averaged as the convolution of X u_i and u_i without being formed.
+        """
+
+        u = np.asarray(self.svd[0])[:, list(idx)]
 
-        for i in idx:
-            s_i = np.sqrt(
-                s[i])
-            u_i = u[:, i]  # eigenvector i corresponding to si
-            v_i = np.dot(x, u_i) / s_i
-            x_i = s_i * u_i * v_i.T
-            x_grp += x_i.T
+        a = self._embedoperator().matmat(u)
 
-        # anti diagonal averaging
+        # keep the n first values, the k - 1 last ones average the padding
 
-        ts = self._hankelmatrix_to_ts(x_grp)
+        with tracing.stage(self, 'hankelize', (a, u)):
+            ts = hankelize_outer(a, u, combine=combine)[..., :self._n_ts]
+            tracing.annotate(output=ts)
 
         return ts
 
@@ -298,7 +547,7 @@ class ToeplitzSSA(BaseSSA, PlotSSA):
 
         Parameters
         ----------
-        x : np.matrix
+        x : np.ndarray
 
         Returns
         -------
@@ -308,11 +557,331 @@ class ToeplitzSSA(BaseSSA, PlotSSA):
         """
         m, n = x.shape
 
-        ts = [np.mean(x[::-1, :].diagonal(i)) for i in
-              range(-m + 1, n)]
+        # keep the n first values, the n - 1 last ones average the padding
+
+        return hankelize(np.asarray(x))[:m]
+
+
+class _TwoDimensionalSSA(BaseSSA, PlotSSA):
+    """Common methods of SSA classes analyzing two dimensional arrays
+
+    Reconstructions have the shape of the input array and are returned as
+    pd.DataFrame if usetype is 'pdseries', keeping the index and the columns
+    of a pd.DataFrame input.
+    """
+
+    # --------------------------------------------------------
+    # Public methods
+
+    def to_frame(self):
+        """Return DataFrame with all signals, columns being (group, column)
+        """
+
+        if self.svd[1] is not None:
+            self._elementary_components()
+
+        frames = {name: pd.DataFrame(np.asarray(self[name]),
+                                     index=self._tsindex,
+                                     columns=self._tsname)
+                  for name in self.groups.keys()}
+
+        return pd.concat(frames, axis=1)
+
+    # --------------------------------------------------------
+    # Private methods
+
+    def _ts_to_array(self, ts):
+        """Check that the time series is two dimensional, return its values
+        """
+
+        tsarr = np.array(ts, dtype=None)
+
+        if tsarr.ndim != 2:
+            raise TypeError('Arguments \'ts\' should be 2 dimensional.')
+
+        return tsarr
+
+    def _format_output_ts(self, ts):
+
+        # if usetype == pdseries, conversion to pd.DataFrame type
 
-        return np.array(ts)[:-(n-1)]
+        if self.usetype == 'pdseries':
+            ts = pd.DataFrame(ts, index=self._tsindex, columns=self._tsname)
 
+        return ts
+
+
+class MSSA(_TwoDimensionalSSA):
+    """A class for multichannel Singular Spectrum Analysis
+    """
+
+    def __init__(self, ts=None, window=None, svdmethod='nplapack',
+                 usetype=__TS_DEFAULT_TYPE__, dtype=np.float64):
+        """Multichannel Singular Spectrum Analysis
+
+        The C channels of length N are embedded with the same window L and
+        their Hankel trajectory matrices are stacked horizontally into the
+        block trajectory matrix :math:`X = [X_1 | X_2 | ... | X_C]` of shape
+        :math:`(L, CK)`. Left singular vectors are common to all channels,
+        and each eigentriple reconstructs every channel.
+
+        The block trajectory matrix is only materialized by the dense
+        solvers. 'sparpack' and 'skrandom' use a matrix-free operator whose
+        products are FFT based correlations, and reconstructions of all the
+        channels are computed in batch.
+
+        Parameters
+        ----------
+        ts : arraylike
+            Two dimensional array-like object (np.array, pd.DataFrame) of
+            shape (N, C) holding the channels as columns. The index and the
+            columns of a pd.DataFrame are kept.
+        window : int, optionnal
+            The window parameter, N // 2 by default.
+        svdmethod : str, optionnal
+            The SVD method used by self.decompose.
+        usetype : str, optionnal
+            'pdseries' to return reconstructions as pd.DataFrame, 'nparray'
+            to return np.array of shape (N, C).
+        dtype : {np.float64, np.float32}, optional
+            Floating type of the series values, embedding, SVD and
+            reconstructions. float32 halves memory and speeds BLAS up when
+            its precision is enough. Default is np.float64.
+
+        Examples
+        --------
+
+        >>> np.random.seed(0)
+        >>> t = np.arange(200)
+        >>> ts = np.sin(t[:, None] / 10. + np.arange(3)) + np.random.rand(200, 3)
+        >>> myssa = MSSA(ts, window=50, svdmethod='sparpack')
+        >>> u, s, v = myssa.decompose(k=5)
+        >>> myssa.reconstruct({'signal': [0, 1, 2]})
+        >>> myssa['signal'].shape
+        (200, 3)
+
+        """
+
+        super(MSSA, self).__init__(ts=ts, svdmethod=svdmethod,
+                                   usetype=usetype, dtype=dtype)
+
+        # define window length if none
+
+        if window is None:
+            window = self._n_ts // 2
+
+        self.window = window
+
+        # define number of channels and of trajectory vectors per channel
+
+        self._n_channels = self.ts.shape[1]
+        self._k = self._n_ts - self.window + 1
+
+    # --------------------------------------------------------
+    # Private methods
+
+    @tracing.traced('embed')
+    def _embedseries(self):
+        """Embed the channels into the block trajectory matrix
+
+        Returns
+        -------
+        x : np.ndarray
+            the trajectory matrix of size (window, n_channels * k)
+
+        """
+
+        ts = self.ts
+        w = self.window
+
+        x = self._cached('embedding', (ts, w), lambda: np.hstack(
+            [hankel_view(ts[:, c], w) for c in range(ts.shape[1])]))
+
+        return x
+
+    def _svdmatrix(self):
+        return self._embedseries()
+
+    def _embedoperator(self):
+        """Return the block trajectory matrix as a FFT based operator"""
+
+        ts = self.ts
+        w = self.window
+
+        return self._cached('operator', (ts, w),
+                            lambda: BlockHankelOperator(ts, w))
+
+    def _svdoperator(self):
+        return self._embedoperator()
+
+    def _crossproduct_matrix(self):
+        """Return X X^T as the sum of the channel lagged products"""
+        return sum(hankel_gram(self.ts[:, c], self.window)
+                   for c in range(self._n_channels))
+
+    def _hankel_weights(self):
+        """Number of elements of each anti-diagonal of the trajectory matrix
+
+        Weights have shape (N, 1) and broadcast over the channels.
+        """
+        return antidiagonal_counts(self.window, self._k)[:, None]
+
+    def _reconstruct_components(self, idx, combine=True):
+        """Reconstruct the channels of eigentriples
+
+        The elementary matrix of eigentriple i is u_i u_i^T X, the block of
+        channel c being u_i w_ic^T with w_ic = X_c^T u_i. The diagonal
+        averages of all the channels are computed in one batched pass.
+
+        Returns an array of shape (N, C) if combine is True, (r, N, C)
+        otherwise.
+        """
+
+        u = np.asarray(self.svd[0])[:, list(idx)]
+
+        w = self._embedoperator().rmatmat(u)
+        w = w.reshape(self._n_channels, self._k, len(idx))
+
+        with tracing.stage(self, 'hankelize', (u, w)):
+            ts = np.moveaxis(hankelize_outer(u, w, combine=combine), 0, -1)
+            tracing.annotate(output=ts)
+
+        return ts
+
+class SSA2D(_TwoDimensionalSSA):
+    """A class for 2d Singular Spectrum Analysis of arrays and images
+    """
+
+    def __init__(self, ts=None, window=None, svdmethod='nplapack',
+                 usetype=__TS_DEFAULT_TYPE__, dtype=np.float64):
+        """2d Singular Spectrum Analysis
+
+        A field :math:`F` of shape :math:`(N_x, N_y)` is embedded with a 2d
+        window :math:`(L_x, L_y)` into the Hankel-block-Hankel trajectory
+        matrix :math:`X` of shape :math:`(L_x L_y, K_x K_y)` whose columns
+        are the flattened :math:`(L_x, L_y)` sub-arrays of :math:`F`.
+
+        The trajectory matrix is only materialized by the dense solvers.
+        'sparpack' and 'skrandom' use a matrix-free operator whose products
+        are 2d FFT correlations, and components are diagonal averaged as 2d
+        convolutions, so that large fields are analyzed in O(Nx Ny) memory.
+
+        Parameters
+        ----------
+        ts : arraylike
+            Two dimensional array-like object (np.array, pd.DataFrame)
+            holding the field values. The index and the columns of a
+            pd.DataFrame are kept.
+        window : tuple of int, optionnal
+            The window shape (Lx, Ly), (Nx // 2, Ny // 2) by default.
+        svdmethod : str, optionnal
+            The SVD method used by self.decompose.
+        usetype : str, optionnal
+            'pdseries' to return reconstructions as pd.DataFrame, 'nparray'
+            to return np.array of shape (Nx, Ny).
+        dtype : {np.float64, np.float32}, optional
+            Floating type of the series values, embedding, SVD and
+            reconstructions. float32 halves memory and speeds BLAS up when
+            its precision is enough. Default is np.float64.
+
+        Examples
+        --------
+
+        >>> np.random.seed(0)
+        >>> x, y = np.meshgrid(np.arange(60), np.arange(40), indexing='ij')
+        >>> field = np.sin(x / 5.) * np.cos(y / 7.) + np.random.rand(60, 40)
+        >>> myssa = SSA2D(field, window=(10, 10), svdmethod='sparpack')
+        >>> u, s, v = myssa.decompose(k=6)
+        >>> myssa.reconstruct({'signal': [0, 1, 2, 3]})
+        >>> myssa['signal'].shape
+        (60, 40)
+
+        """
+
+        super(SSA2D, self).__init__(ts=ts, svdmethod=svdmethod,
+                                    usetype=usetype, dtype=dtype)
+
+        # define window shape if none
+
+        nx, ny = self.ts.shape
+
+        if window is None:
+            window = (nx // 2, ny // 2)
+
+        self.window = check_window2d(self.ts, window)
+
+        # define number of trajectory vectors along each axis
+
+        self._k = (nx - self.window[0] + 1, ny - self.window[1] + 1)
+
+    # --------------------------------------------------------
+    # Private methods
+
+    @tracing.traced('embed')
+    def _embedseries(self):
+        """Embed the field into the Hankel-block-Hankel trajectory matrix
+
+        Returns
+        -------
+        x : np.ndarray
+            the trajectory matrix of size (Lx * Ly, Kx * Ky)
+
+        """
+
+        ts = self.ts
+        w = self.window
+
+        x = self._cached('embedding', (ts, w),
+                         lambda: hankel2d_matrix(ts, w))
+
+        return x
+
+    def _svdmatrix(self):
+        return self._embedseries()
+
+    def _embedoperator(self):
+        """Return the trajectory matrix as a 2d FFT based linear operator"""
+
+        ts = self.ts
+        w = self.window
+
+        return self._cached('operator', (ts, w),
+                            lambda: HankelBlockHankelOperator(ts, w))
+
+    def _svdoperator(self):
+        return self._embedoperator()
+
+    def _hankel_weights(self):
+        """Number of times each field element appears in the trajectory"""
+
+        (lx, ly), (kx, ky) = self.window, self._k
+
+        return np.outer(antidiagonal_counts(lx, kx),
+                        antidiagonal_counts(ly, ky))
+
+    def _reconstruct_components(self, idx, combine=True):
+        """Reconstruct the fields of eigentriples
+
+        The elementary matrix of eigentriple i is u_i w_i^T with
+        w_i = X^T u_i. With u_i and w_i seen as (Lx, Ly) and (Kx, Ky) arrays,
+        its 2d diagonal average is their 2d convolution divided by the
+        counts, computed with 2d FFTs.
+
+        Returns an array of shape (Nx, Ny) if combine is True, (r, Nx, Ny)
+        otherwise.
+        """
+
+        u = np.asarray(self.svd[0])[:, list(idx)]
+
+        w = self._embedoperator().rmatmat(u)
+
+        with tracing.stage(self, 'hankelize', (u, w)):
+            ts = hankelize2d_outer(u.reshape(self.window + (len(idx),)),
+                                   w.reshape(self._k + (len(idx),)),
+                                   combine=combine)
+            tracing.annotate(output=ts)
+
+        return ts
 
 
 if __name__ == '__main__':
@@ -2,6 +2,7 @@ import vassal
 import unittest
 import numpy as np
 import pandas as pd
+import matplotlib.pyplot as plt
 
 
 class TestBasicSSA_nplapack(unittest.TestCase):
@@ -64,5 +65,400 @@ class TestBasicSSA_skrandom(unittest.TestCase):
         np.testing.assert_allclose(x,y, atol=1e-2)
 
 
+class TestBasicSSA_eigen(unittest.TestCase):
+
+    def setUp(self):
+        np.random.seed(0)
+        npts = np.random.rand(100)
+        self.ssa_np = vassal.ssa(npts, svdmethod='eigen', window=20)
+        self.u, self.s, self.v = self.ssa_np.decompose()
+        self.ssa_ref = vassal.ssa(npts, window=20)
+        self.ssa_ref.decompose()
+
+    def test_eigen_recomposition(self):
+        x = self.ssa_np['ssa_original'].values
+        y = self.ssa_np['ssa_reconstruction'].values
+        np.testing.assert_allclose(x, y)
+
+    def test_eigen_singular_values(self):
+        self.assertIsNone(self.v)
+        np.testing.assert_allclose(self.s, self.ssa_ref.svd[1])
+
+    def test_eigen_right_vectors(self):
+        v = self.ssa_np.right_vectors(3)
+        v_ref = np.asarray(self.ssa_ref.svd[2])[:3]
+        np.testing.assert_allclose(np.abs(v), np.abs(v_ref), atol=1e-8)
+
+
+class TestBasicSSA_append(unittest.TestCase):
+
+    def setUp(self):
+        np.random.seed(0)
+        t = np.arange(600)
+        self.npts = np.sin(t / 10.) + 0.1 * np.random.rand(600)
+        self.ssa_np = vassal.ssa(self.npts[:500], window=40,
+                                 svdmethod='sparpack')
+        self.ssa_np.decompose(k=4)
+        for i in range(500, 600, 10):
+            self.ssa_np.append(self.npts[i:i + 10])
+        self.ssa_ref = vassal.ssa(self.npts, window=40,
+                                  svdmethod='sparpack')
+        self.ssa_ref.decompose(k=4)
+
+    def test_append_series(self):
+        np.testing.assert_array_equal(self.ssa_np['ssa_original'].values,
+                                      self.npts)
+        self.assertEqual(len(self.ssa_np['ssa_original'].index), 600)
+
+    def test_append_decomposition(self):
+        np.testing.assert_allclose(self.ssa_np.svd[1][:2],
+                                   self.ssa_ref.svd[1][:2], rtol=1e-6)
+        x = self.ssa_np['ssa_reconstruction'].values
+        y = self.ssa_ref['ssa_reconstruction'].values
+        np.testing.assert_allclose(x, y, atol=1e-2)
+
+    def test_tail(self):
+        x = self.ssa_np.tail('ssa_reconstruction', 5)
+        y = self.ssa_np['ssa_reconstruction']
+        np.testing.assert_allclose(x.values, y.values[-5:])
+        np.testing.assert_array_equal(x.index, y.index[-5:])
+
+
+class TestBasicSSA_embedding(unittest.TestCase):
+
+    def setUp(self):
+        np.random.seed(0)
+        self.npts = np.random.rand(100)
+        self.ssa_np = vassal.ssa(self.npts, window=30)
+
+    def test_embedding_values(self):
+        x = self.ssa_np._embedseries()
+        self.assertEqual(x.shape, (30, 71))
+        for i in range(71):
+            np.testing.assert_array_equal(np.asarray(x)[:, i],
+                                          self.npts[i:i + 30])
+
+    def test_embedding_is_readonly_view(self):
+        x = np.asarray(self.ssa_np._embedseries())
+        self.assertFalse(x.flags.writeable)
+        self.assertTrue(np.shares_memory(x, self.ssa_np.ts))
+
+    def test_embedding_is_cached(self):
+        x1 = self.ssa_np._embedseries()
+        x2 = self.ssa_np._embedseries()
+        self.assertIs(x1.base, x2.base)
+        self.ssa_np.window = 20
+        self.assertEqual(self.ssa_np._embedseries().shape[0], 20)
+
+
+class TestBasicSSA_elementary(unittest.TestCase):
+
+    def setUp(self):
+        np.random.seed(0)
+        npts = np.random.rand(100)
+        self.ssa_np = vassal.ssa(npts, window=20)
+        self.ssa_np.decompose(elementary=True)
+        self.ssa_np.reconstruct({'pair': [1, 2]})
+
+    def test_elementary_shape(self):
+        elementary = self.ssa_np._elementary_components()
+        self.assertEqual(elementary.shape, (20, 100))
+
+    def test_elementary_is_cached(self):
+        e1 = self.ssa_np._elementary_components()
+        e2 = self.ssa_np._elementary_components()
+        self.assertIs(e1, e2)
+
+    def test_group_from_elementary(self):
+        x = self.ssa_np['pair'].values
+        y = self.ssa_np._reconstruct_components([1, 2])
+        np.testing.assert_allclose(x, y)
+
+    def test_cache_invalidated_by_decompose(self):
+        e1 = self.ssa_np._elementary_components()
+        self.ssa_np.decompose()
+        self.assertIsNot(e1, self.ssa_np._elementary_components())
+
+
+class TestBasicSSA_wcorr(unittest.TestCase):
+
+    def setUp(self):
+        np.random.seed(0)
+        t = np.arange(200)
+        npts = np.sin(2 * np.pi * t / 12.) + np.random.rand(200)
+        self.ssa_np = vassal.ssa(npts, window=24)
+        self.ssa_np.decompose()
+
+    def _reference(self, idx):
+        nts, l = 200, 24
+        k = nts - l + 1
+        w = np.array([min(i + 1, l, k, nts - i) for i in range(nts)])
+        f = [self.ssa_np._reconstruct_group(i) for i in idx]
+        rho = np.zeros((len(idx), len(idx)))
+        for i, fi in enumerate(f):
+            for j, fj in enumerate(f):
+                rho[i, j] = np.sum(w * fi * fj) / np.sqrt(
+                    np.sum(w * fi ** 2) * np.sum(w * fj ** 2))
+        return rho
+
+    def test_wcorr_values(self):
+        np.testing.assert_allclose(self.ssa_np.wcorr(5), self._reference(
+            range(5)), atol=1e-12)
+
+    def test_wcorr_subset(self):
+        np.testing.assert_allclose(self.ssa_np.wcorr([3, 0, 7]),
+                                   self._reference([3, 0, 7]), atol=1e-12)
+
+    def test_wcorr_full(self):
+        wcorr = self.ssa_np.wcorr()
+        self.assertEqual(wcorr.shape, (24, 24))
+        np.testing.assert_allclose(np.diag(wcorr), 1.)
+        np.testing.assert_allclose(wcorr, wcorr.T)
+
+    def test_wcorr_out_of_range(self):
+        with self.assertRaises(IndexError):
+            self.ssa_np.wcorr([30])
+
+
+class TestBasicSSA_lazy(unittest.TestCase):
+
+    def setUp(self):
+        np.random.seed(0)
+        t = np.arange(500)
+        self.npts = np.sin(t / 9.) + np.random.rand(500)
+        self.ssa_np = vassal.ssa(self.npts, window=100, svdmethod='sparpack')
+        self.ssa_np.decompose(lazy=True, k=4)
+        self.ssa_ref = vassal.ssa(self.npts, window=100)
+        self.ssa_ref.decompose()
+
+    def test_initial(self):
+        self.assertEqual(len(self.ssa_np.svd[1]), 4)
+
+    def test_reconstruct_extends(self):
+        self.ssa_np.reconstruct({'high': [2, 11]})
+        self.assertEqual(len(self.ssa_np.svd[1]), 12)
+        np.testing.assert_allclose(self.ssa_np.svd[1],
+                                   self.ssa_ref.svd[1][:12])
+        self.ssa_ref.reconstruct({'high': [2, 11]})
+        np.testing.assert_allclose(self.ssa_np['high'].values,
+                                   self.ssa_ref['high'].values, atol=1e-10)
+
+    def test_wcorr_extends(self):
+        self.assertEqual(self.ssa_np.wcorr(6).shape, (6, 6))
+        self.assertEqual(len(self.ssa_np.svd[1]), 8)
+        u = np.asarray(self.ssa_np.svd[0])
+        np.testing.assert_allclose(u.T.dot(u), np.eye(8), atol=1e-10)
+
+    def test_right_vectors_extends(self):
+        v = self.ssa_np.right_vectors([5])
+        v_ref = np.asarray(self.ssa_ref.svd[2])[[5]]
+        np.testing.assert_allclose(np.abs(v), np.abs(v_ref), atol=1e-8)
+
+    def test_value_plot_not_extends(self):
+        fig, ax = self.ssa_np.plot('values')
+        plt.close(fig)
+        self.assertEqual(len(self.ssa_np.svd[1]), 4)
+        self.assertEqual(len(ax.lines[0].get_ydata()), 4)
+
+    def test_skrandom(self):
+        myssa = vassal.ssa(self.npts, window=100, svdmethod='skrandom')
+        myssa.decompose(lazy=True, random_state=0, n_iter=10)
+        self.assertEqual(len(myssa.svd[1]), 10)
+        myssa.reconstruct({'a': 15})
+        np.testing.assert_allclose(myssa.svd[1][:3], self.ssa_ref.svd[1][:3],
+                                   rtol=1e-6)
+
+    def test_not_lazy(self):
+        myssa = vassal.ssa(self.npts, window=100, svdmethod='sparpack')
+        myssa.decompose(k=4)
+        with self.assertRaises(IndexError):
+            myssa.reconstruct({'high': 5})
+        with self.assertRaises(ValueError):
+            self.ssa_ref.decompose(lazy=True)
+
+
+class TestBasicSSA_forecast(unittest.TestCase):
+
+    def setUp(self):
+        np.random.seed(0)
+        t = np.arange(300)
+        self.npts = np.sin(t / 7.) + 0.01 * t + 0.3 * np.random.rand(300)
+        self.ssa_np = vassal.ssa(self.npts, window=40, usetype='nparray')
+        self.ssa_np.decompose()
+        self.ssa_np.reconstruct({'signal': [0, 1, 2], 'trend': 0})
+
+    def _lrr(self, idx):
+        u = np.asarray(self.ssa_np.svd[0])[:, idx]
+        pi, nabla = u[-1], u[:-1]
+        return nabla, pi.dot(pi), nabla.dot(pi) / (1 - pi.dot(pi))
+
+    def _recurrent(self, idx, steps):
+        __, __, r = self._lrr(idx)
+        y = list(self.ssa_np._reconstruct_group(idx))
+        for __ in range(steps):
+            y.append(r.dot(y[-39:]))
+        return np.array(y[-steps:])
+
+    def _vector(self, idx, steps):
+        nabla, nu2, r = self._lrr(idx)
+        proj = nabla.dot(nabla.T) + (1 - nu2) * np.outer(r, r)
+        y = self.ssa_np._reconstruct_group(idx)
+        z = [y[i:i + 40] for i in range(261)]
+        for __ in range(steps + 39):
+            z.append(np.append(proj.dot(z[-1][1:]), r.dot(z[-1][1:])))
+        return vassal.ssa(np.zeros(10))._hankelmatrix_to_ts(
+            np.array(z).T)[300:300 + steps]
+
+    def test_recurrent(self):
+        for steps in (1, 39, 100):
+            f = self.ssa_np.forecast(steps, ['signal', 'trend'])
+            self.assertEqual(f.shape, (steps, 2))
+            np.testing.assert_allclose(f[:, 0], self._recurrent([0, 1, 2],
+                                                                steps))
+            np.testing.assert_allclose(f[:, 1], self._recurrent([0], steps))
+
+    def test_vector(self):
+        for steps in (1, 100):
+            f = self.ssa_np.forecast(steps, 'signal', method='vector')
+            np.testing.assert_allclose(f, self._vector([0, 1, 2], steps),
+                                       rtol=1e-10)
+
+    def test_lrr_cached(self):
+        self.ssa_np.forecast(10)
+        lrr = self.ssa_np._cache['lrr'][1]
+        self.ssa_np.forecast(20)
+        self.assertIs(self.ssa_np._cache['lrr'][1], lrr)
+
+    def test_pandas_index(self):
+        pdts = pd.Series(self.npts, index=pd.date_range(
+            '2000-01-01', periods=300, freq='D'))
+        myssa = vassal.ssa(pdts, window=40)
+        myssa.decompose()
+        myssa.reconstruct({'signal': [0, 1, 2]})
+        f = myssa.forecast(5)
+        self.assertEqual(list(f.columns), ['signal'])
+        self.assertEqual(f.index[0], pd.Timestamp('2000-10-27'))
+
+    def test_errors(self):
+        with self.assertRaises(ValueError):
+            self.ssa_np.forecast(5, 'ssa_original')
+        with self.assertRaises(ValueError):
+            self.ssa_np.forecast(5, method='unknown')
+        with self.assertRaises(ValueError):
+            self.ssa_np.forecast(5, 'ssa_reconstruction')
+        with self.assertRaises(vassal.base.ResolutionOrderError):
+            vassal.ssa(self.npts).forecast(5)
+
+
+class TestBasicSSA_dtype(unittest.TestCase):
+
+    def setUp(self):
+        np.random.seed(0)
+        t = np.arange(500)
+        self.npts = np.sin(t / 5.) + t / 100. + 0.1 * np.random.rand(500)
+
+    def test_ndarray_outputs(self):
+        myssa = vassal.ssa(self.npts, window=50)
+        u, s, v = myssa.decompose()
+        for x in (u, v, myssa._embedseries()):
+            self.assertIs(type(x), np.ndarray)
+        self.assertEqual(myssa.ts.dtype, np.float64)
+
+    def test_float32(self):
+        ssa32 = vassal.ssa(self.npts, window=50, usetype='nparray',
+                           dtype=np.float32)
+        ssa64 = vassal.ssa(self.npts, window=50, usetype='nparray')
+        for svdmethod in ('nplapack', 'sparpack', 'eigen'):
+            ssa32.svdmethod = ssa64.svdmethod = svdmethod
+            kwargs = {'k': 4} if svdmethod == 'sparpack' else {}
+            u, s, v = ssa32.decompose(**kwargs)
+            ssa64.decompose(**kwargs)
+            self.assertEqual(u.dtype, np.float32)
+            self.assertEqual(s.dtype, np.float32)
+            np.testing.assert_allclose(s[:4], ssa64.svd[1][:4], rtol=1e-4)
+            ssa32.reconstruct({'signal': [0, 1, 2, 3]})
+            ssa64.reconstruct({'signal': [0, 1, 2, 3]})
+            self.assertEqual(ssa32['signal'].dtype, np.float32)
+            np.testing.assert_allclose(ssa32['signal'], ssa64['signal'],
+                                       atol=1e-4)
+            self.assertEqual(ssa32.wcorr(4).dtype, np.float32)
+        self.assertEqual(ssa32.forecast(5, 'signal').dtype, np.float32)
+
+    def test_invalid_dtype(self):
+        with self.assertRaises(ValueError):
+            vassal.ssa(self.npts, dtype=np.int64)
+
+
+class TestBasicSSA_budget(unittest.TestCase):
+
+    def setUp(self):
+        np.random.seed(0)
+        self.npts = np.random.rand(2000)
+
+    def test_plan(self):
+        myssa = vassal.ssa(self.npts, window=100)
+        plan = myssa.plan()
+        self.assertIsNone(myssa.svd[1])
+        self.assertEqual(plan['shape'], (100, 1901))
+        self.assertTrue(plan['full_matrices'])
+        self.assertGreater(plan['memory'], 8 * 1901 ** 2)
+        self.assertGreater(plan['flops'], 0)
+        myssa.decompose()
+        self.assertEqual(plan['stored'],
+                         sum(x.nbytes for x in myssa.svd))
+        sparse = vassal.ssa(self.npts, window=100, svdmethod='sparpack')
+        self.assertLess(sparse.plan(k=5)['memory'], plan['memory'])
+
+    def test_downgrade(self):
+        myssa = vassal.ssa(self.npts, window=100)
+        u, s, v = myssa.decompose(budget=10 ** 7)
+        self.assertEqual(v.shape, (100, 1901))
+        reference = vassal.ssa(self.npts, window=100)
+        reference.decompose()
+        np.testing.assert_allclose(s, reference.svd[1])
+
+    def test_over_budget(self):
+        myssa = vassal.ssa(self.npts, window=100)
+        with self.assertRaises(vassal.base.MemoryBudgetError):
+            myssa.decompose(budget=10 ** 6)
+        self.assertIsNone(myssa.svd[1])
+        sparse = vassal.ssa(self.npts, window=100, svdmethod='sparpack')
+        sparse.decompose(k=5, budget=10 ** 6)
+        self.assertEqual(len(sparse.svd[1]), 5)
+
+    def test_drop_right_vectors(self):
+        myssa = vassal.ssa(self.npts, window=100)
+        u, s, v = myssa.decompose(full_matrices=False, keep_right=False)
+        self.assertIsNone(v)
+        self.assertEqual(myssa.plan(full_matrices=False,
+                                    keep_right=False)['stored'],
+                         u.nbytes + s.nbytes)
+        reference = vassal.ssa(self.npts, window=100)
+        reference.decompose(full_matrices=False)
+        # signs of singular vectors are arbitrary
+        np.testing.assert_allclose(np.abs(myssa.right_vectors(3)),
+                                   np.abs(reference.svd[2][:3]), atol=1e-8)
+        np.testing.assert_allclose(s, reference.svd[1])
+
+    def test_right_vectors_not_computed(self):
+        myssa = vassal.ssa(self.npts, window=100)
+        plan = myssa.plan(keep_right=False)
+        self.assertFalse(plan['full_matrices'])
+        self.assertLess(plan['memory'], 8 * 1901 ** 2)
+        self.assertLess(plan['memory'], myssa.plan(budget=10 ** 7)['memory'])
+        # economy factors when the matrix has more rows than columns
+        myssa = vassal.ssa(self.npts, window=1900)
+        plan = myssa.plan(keep_right=False)
+        self.assertFalse(plan['full_matrices'])
+        self.assertLess(plan['memory'], 8 * 1900 ** 2)
+        u, s, v = myssa.decompose(keep_right=False)
+        self.assertIsNone(v)
+        self.assertEqual(u.shape, (1900, 101))
+        # the budget accounts for the right vectors not computed
+        myssa = vassal.ssa(self.npts, window=100)
+        u, s, v = myssa.decompose(budget=10 ** 6, keep_right=False)
+        self.assertEqual(len(s), 100)
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,115 @@
+import vassal
+import unittest
+import numpy as np
+
+from unittest import mock
+
+from vassal.base import BaseSSA
+
+
+class TestBatch(unittest.TestCase):
+
+    def setUp(self):
+        np.random.seed(0)
+        self.x = np.random.rand(6, 100)
+        self.groups = {'first': 0, 'pair': [1, 2]}
+
+    def _reference(self, ts):
+        ssaobject = vassal.ssa(ts, window=20)
+        ssaobject.decompose()
+        ssaobject.reconstruct(self.groups)
+        return ssaobject
+
+    def _check(self, result, series):
+        for i, ts in enumerate(series):
+            ref = self._reference(ts)
+            np.testing.assert_allclose(result.singular_values[i, :20],
+                                       ref.svd[1])
+            for j, name in enumerate(result.groups):
+                np.testing.assert_allclose(result.reconstructions[i][j],
+                                           ref[name].values, atol=1e-12)
+
+    def test_sequential(self):
+        result = vassal.batch(self.x, groups=self.groups, n_jobs=1,
+                              window=20)
+        self.assertEqual(result.reconstructions.shape, (6, 4, 100))
+        self.assertEqual(result.errors, {})
+        self._check(result, self.x)
+
+    def test_no_elementary_components(self):
+        with mock.patch.object(BaseSSA, '_elementary_components',
+                               side_effect=AssertionError):
+            result = vassal.batch(self.x, groups=self.groups, n_jobs=1,
+                                  window=20)
+        self.assertEqual(result.errors, {})
+        self._check(result, self.x)
+
+    def test_pool(self):
+        result = vassal.batch(self.x, groups=self.groups, n_jobs=2,
+                              window=20)
+        self.assertEqual(result.errors, {})
+        self._check(result, self.x)
+
+    def test_ragged(self):
+        series = [self.x[0], self.x[1, :80], self.x[2, :60]]
+        result = vassal.batch(iter(series), groups=self.groups, n_jobs=2,
+                              window=20)
+        self.assertEqual([r.shape for r in result.reconstructions],
+                         [(4, 100), (4, 80), (4, 60)])
+        self._check(result, series)
+
+    def test_failure(self):
+        x = self.x.copy()
+        x[3, 10] = np.nan
+        result = vassal.batch(x, groups=self.groups, n_jobs=2, window=20)
+        self.assertEqual(list(result.errors), [3])
+        self.assertTrue(np.isnan(result.reconstructions[3]).all())
+        self.assertTrue(np.isnan(result.singular_values[3]).all())
+        np.testing.assert_allclose(result.reconstructions[4, 0], x[4],
+                                   atol=1e-12)
+
+
+class TestBatchStacked(unittest.TestCase):
+
+    def setUp(self):
+        np.random.seed(0)
+        t = np.arange(120)
+        self.x = np.sin(t / 5.) + np.random.rand(5, 120)
+        self.groups = {'first': 0, 'pair': [1, 2]}
+
+    def _compare(self, kind, window):
+        stacked = vassal.batch(self.x, kind=kind, groups=self.groups,
+                               mode='stacked', window=window)
+        pool = vassal.batch(self.x, kind=kind, groups=self.groups,
+                            n_jobs=1, window=window)
+        np.testing.assert_allclose(stacked.singular_values,
+                                   pool.singular_values)
+        np.testing.assert_allclose(stacked.reconstructions,
+                                   pool.reconstructions, atol=1e-10)
+        self.assertEqual(stacked.groups, pool.groups)
+
+    def test_basic(self):
+        self._compare('basic', 30)
+
+    def test_basic_large_window(self):
+        self._compare('basic', 100)
+
+    def test_toeplitz(self):
+        self._compare('toeplitz', 30)
+
+    def test_failure(self):
+        x = self.x.copy()
+        x[1, 5] = np.inf
+        result = vassal.batch(x, mode='stacked', window=30)
+        self.assertEqual(list(result.errors), [1])
+        self.assertTrue(np.isnan(result.reconstructions[1]).all())
+        np.testing.assert_allclose(result.reconstructions[:, 0][[0, 2, 3, 4]],
+                                   x[[0, 2, 3, 4]])
+
+    def test_unequal_lengths(self):
+        with self.assertRaises(ValueError):
+            vassal.batch([self.x[0], self.x[1, :100]], mode='stacked')
+
+
+if __name__ == '__main__':
+    unittest.main()
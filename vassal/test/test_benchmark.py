@@ -0,0 +1,77 @@
+import json
+import os
+import tempfile
+import unittest
+
+from vassal import cache as svdcache
+from vassal.devutil import benchmark
+
+
+class TestBenchmark(unittest.TestCase):
+
+    def setUp(self):
+        self.results = benchmark.run(lengths=[100], windows=[0.2], repeat=1)
+
+    def test_grid(self):
+        entries = self.results['results']
+        self.assertEqual({entry['kind'] for entry in entries},
+                         {'basic', 'toeplitz'})
+        stages = {entry['stage'] for entry in entries}
+        for stage in ['_embedseries', 'svd:nplapack', 'svd:sparpack',
+                      '_reconstruct_group', '_hankelmatrix_to_ts', 'wcorr',
+                      'to_frame']:
+            self.assertIn(stage, stages)
+        self.assertNotIn('svd:auto', stages)
+        self.assertEqual([entry for entry in entries if 'error' in entry], [])
+        basic = {entry['stage'] for entry in entries
+                 if entry['kind'] == 'basic'}
+        self.assertNotIn('svd:eigh', basic)
+        self.assertIn('svd:eigh', stages)
+        for entry in entries:
+            self.assertEqual(entry['window'], 20)
+            self.assertTrue('error' in entry or entry['median'] >= 0)
+
+    def test_bypasses_cache(self):
+        cache = svdcache.enable()
+        try:
+            benchmark.run(lengths=[100], windows=[0.2], repeat=2,
+                          stages=['svd:nplapack', 'wcorr'])
+        finally:
+            svdcache.disable()
+        self.assertEqual(cache.hits + cache.misses, 0)
+
+    def test_hankelize_beats_reference(self):
+        results = benchmark.run(lengths=[2000], windows=[0.5],
+                                kinds=['basic'], repeat=3,
+                                stages=['_hankelmatrix_to_ts',
+                                        '_hankelmatrix_to_ts:reference'])
+        times = {entry['stage']: entry['min']
+                 for entry in results['results']}
+        self.assertLess(times['_hankelmatrix_to_ts'],
+                        times['_hankelmatrix_to_ts:reference'])
+
+    def test_compare(self):
+        before = self.results
+        after = json.loads(json.dumps(before))
+        after['results'][0]['median'] = 10 * (before['results'][0]['median']
+                                              + 1)
+        rows = benchmark.compare(before, after)
+        self.assertTrue(rows[0]['regression'])
+        self.assertFalse(any(row['regression'] for row in rows[1:]))
+
+    def test_main(self):
+        handle, path = tempfile.mkstemp(suffix='.json')
+        os.close(handle)
+        try:
+            benchmark.main(['run', '-o', path, '--lengths', '60',
+                            '--kinds', 'basic', '--stages', 'wcorr',
+                            '--repeat', '1'])
+            with open(path) as output:
+                self.assertEqual(len(json.load(output)['results']), 2)
+            self.assertEqual(benchmark.main(['compare', path, path]), 0)
+        finally:
+            os.remove(path)
+
+
+if __name__ == '__main__':
+    unittest.main()
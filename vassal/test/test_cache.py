@@ -0,0 +1,150 @@
+import shutil
+import tempfile
+import unittest
+import numpy as np
+
+from vassal import cache as svdcache
+from vassal import costmodel
+from vassal.cache import DecompositionCache
+from vassal.ssa import BasicSSA, ToeplitzSSA
+
+
+class TestDecompositionCache(unittest.TestCase):
+
+    def setUp(self):
+        self.ts = np.random.RandomState(0).rand(200)
+        self.cache = DecompositionCache()
+
+    def tearDown(self):
+        svdcache.disable()
+
+    def test_hit_restores_decomposition(self):
+        ssa1 = BasicSSA(self.ts, window=20)
+        svd1 = ssa1.decompose(cache=self.cache)
+        ssa2 = BasicSSA(self.ts.copy(), window=20)
+        svd2 = ssa2.decompose(cache=self.cache)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+        for x1, x2 in zip(svd1, svd2):
+            np.testing.assert_array_equal(x1, x2)
+        self.assertFalse(svd2[0].flags.writeable)
+        np.testing.assert_allclose(ssa2._reconstruct_group(list(range(20))),
+                                   self.ts)
+
+    def test_cached_arrays_are_copies(self):
+        ssa1 = BasicSSA(self.ts, window=20)
+        svd1 = ssa1.decompose(cache=self.cache)
+        svd1[1][0] = -1
+        svd2 = BasicSSA(self.ts, window=20).decompose(cache=self.cache)
+        self.assertNotEqual(svd2[1][0], -1)
+
+    def test_key_depends_on_parameters(self):
+        BasicSSA(self.ts, window=20).decompose(cache=self.cache)
+        BasicSSA(self.ts, window=30).decompose(cache=self.cache)
+        BasicSSA(self.ts, window=20,
+                 svdmethod='splapack').decompose(cache=self.cache)
+        ToeplitzSSA(self.ts, window=20).decompose(cache=self.cache)
+        BasicSSA(self.ts + 1, window=20).decompose(cache=self.cache)
+        BasicSSA(self.ts, window=20, svdmethod='sparpack').decompose(
+            k=3, cache=self.cache)
+        BasicSSA(self.ts, window=20, svdmethod='sparpack').decompose(
+            k=4, cache=self.cache)
+        self.assertEqual((self.cache.hits, self.cache.misses), (0, 7))
+        self.assertEqual(len(self.cache), 7)
+
+    def test_uncacheable_arguments(self):
+        for __ in range(2):
+            ssaobject = BasicSSA(self.ts, window=20, svdmethod='skrandom')
+            ssaobject.decompose(k=3, random_state=np.random.RandomState(0),
+                                cache=self.cache)
+        self.assertEqual(self.cache.stats()['entries'], 0)
+        self.assertEqual((self.cache.hits, self.cache.misses), (0, 0))
+
+    def test_lru_eviction(self):
+        ssaobject = BasicSSA(self.ts, window=20)
+        nbytes = sum(x.nbytes for x in ssaobject.decompose())
+        cache = DecompositionCache(max_bytes=2 * nbytes)
+        for offset in range(3):
+            BasicSSA(self.ts + offset, window=20).decompose(cache=cache)
+        self.assertEqual(len(cache), 2)
+        self.assertLessEqual(cache.nbytes, 2 * nbytes)
+        BasicSSA(self.ts, window=20).decompose(cache=cache)
+        BasicSSA(self.ts + 2, window=20).decompose(cache=cache)
+        self.assertEqual((cache.hits, cache.misses), (1, 4))
+
+    def test_disk_tier(self):
+        directory = tempfile.mkdtemp()
+        try:
+            cache = DecompositionCache(directory=directory)
+            svd1 = BasicSSA(self.ts, window=20).decompose(cache=cache)
+            cache = DecompositionCache(directory=directory)
+            ssaobject = BasicSSA(self.ts, window=20)
+            svd2 = ssaobject.decompose(cache=cache)
+            self.assertEqual(cache.stats()['disk_hits'], 1)
+            self.assertIsInstance(svd2[0], np.memmap)
+            for x1, x2 in zip(svd1, svd2):
+                np.testing.assert_array_equal(x1, x2)
+            cache.clear(disk=True)
+            BasicSSA(self.ts, window=20).decompose(cache=cache)
+            self.assertEqual(cache.misses, 1)
+        finally:
+            shutil.rmtree(directory)
+
+    def test_default_cache(self):
+        cache = svdcache.enable()
+        self.assertIs(svdcache.get_default(), cache)
+        BasicSSA(self.ts, window=20).decompose()
+        BasicSSA(self.ts, window=20).decompose()
+        BasicSSA(self.ts, window=20).decompose(cache=False)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        svdcache.disable()
+        self.assertIsNone(svdcache.get_default())
+
+    def test_auto_plan_restored(self):
+        # fixed coefficients, the cost model is not calibrated
+        costmodel._COEFFICIENTS[costmodel._machine_key()] = {
+            method: (1e-9, 0.) for method in
+            costmodel.DENSE_METHODS + costmodel.TRUNCATED_METHODS}
+        try:
+            ssa1 = BasicSSA(self.ts, window=20, svdmethod='auto')
+            ssa1.decompose(cache=self.cache)
+            ssa2 = BasicSSA(self.ts, window=20, svdmethod='auto')
+            ssa2.decompose(cache=self.cache)
+        finally:
+            costmodel._COEFFICIENTS.clear()
+        self.assertEqual(self.cache.hits, 1)
+        self.assertEqual(ssa2.svdplan, ssa1.svdplan)
+        self.assertEqual(ssa2._svdsolver, ssa1._svdsolver)
+
+    def test_auto_plan_restored_from_disk(self):
+        directory = tempfile.mkdtemp()
+        costmodel._COEFFICIENTS[costmodel._machine_key()] = {
+            method: (1e-9, 0.) for method in
+            costmodel.DENSE_METHODS + costmodel.TRUNCATED_METHODS}
+        try:
+            ssa1 = BasicSSA(self.ts, window=20, svdmethod='auto')
+            ssa1.decompose(cache=DecompositionCache(directory=directory))
+            cache = DecompositionCache(directory=directory)
+            ssa2 = BasicSSA(self.ts, window=20, svdmethod='auto')
+            ssa2.decompose(cache=cache)
+        finally:
+            costmodel._COEFFICIENTS.clear()
+            shutil.rmtree(directory)
+        self.assertEqual(cache.disk_hits, 1)
+        self.assertEqual(ssa2.svdplan, ssa1.svdplan)
+        self.assertIsInstance(ssa2.svdplan['shape'], tuple)
+
+    def test_unseeded_randomized_not_cached(self):
+        for _ in range(2):
+            BasicSSA(self.ts, window=20, svdmethod='skrandom').decompose(
+                5, cache=self.cache)
+        self.assertEqual((self.cache.hits, len(self.cache)), (0, 0))
+        for _ in range(2):
+            BasicSSA(self.ts, window=20, svdmethod='skrandom').decompose(
+                5, 10, 'auto', 'auto', 0, cache=self.cache)
+            BasicSSA(self.ts, window=20, svdmethod='skrandom').decompose(
+                5, random_state=0, cache=self.cache)
+        self.assertEqual((self.cache.hits, len(self.cache)), (2, 2))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+import vassal
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+
+from vassal import cache as svdcache
+from vassal import costmodel
+
+
+class TestCostModel(unittest.TestCase):
+
+    def setUp(self):
+        self.cachedir = tempfile.mkdtemp()
+        self.environ = os.environ.get('VASSAL_CACHE_DIR')
+        os.environ['VASSAL_CACHE_DIR'] = self.cachedir
+        costmodel._COEFFICIENTS.clear()
+
+    def tearDown(self):
+        if self.environ is None:
+            del os.environ['VASSAL_CACHE_DIR']
+        else:
+            os.environ['VASSAL_CACHE_DIR'] = self.environ
+        costmodel._COEFFICIENTS.clear()
+        shutil.rmtree(self.cachedir)
+
+    def pin_coefficients(self):
+        # fixed coefficients, the selection does not depend on the host
+        costmodel._COEFFICIENTS[costmodel._machine_key()] = {
+            method: (1e-9, 0.) for method in
+            costmodel.DENSE_METHODS + costmodel.TRUNCATED_METHODS}
+
+    def test_calibration_cached_on_disk(self):
+        coefficients = costmodel.coefficients()
+        self.assertTrue(os.path.exists(costmodel.cost_model_path()))
+        costmodel._COEFFICIENTS.clear()
+        self.assertEqual(costmodel.coefficients(), coefficients)
+
+    def test_calibration_bypasses_cache(self):
+        cache = svdcache.enable()
+        try:
+            coefficients = costmodel.calibrate()
+        finally:
+            svdcache.disable()
+        self.assertEqual(cache.hits + cache.misses, 0)
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(set(coefficients),
+                         set(costmodel.DENSE_METHODS +
+                             costmodel.TRUNCATED_METHODS))
+
+    def test_plan(self):
+        self.pin_coefficients()
+        plan = costmodel.plan((1000, 4001), k=10)
+        self.assertEqual(plan['svdmethod'], 'sparpack')
+        self.assertEqual(set(plan['estimates']),
+                         set(costmodel.DENSE_METHODS +
+                             costmodel.TRUNCATED_METHODS))
+        plan = costmodel.plan((1000, 4001))
+        self.assertEqual(plan['svdmethod'], 'nplapack')
+
+    def test_budget(self):
+        self.pin_coefficients()
+        plan = costmodel.plan((100, 401), k=10, methods=['nplapack',
+                                                         'sparpack'],
+                              budget=costmodel.memory('sparpack', (100, 401),
+                                                      10))
+        self.assertEqual(plan['svdmethod'], 'sparpack')
+
+    def test_auto(self):
+        self.pin_coefficients()
+        np.random.seed(0)
+        t = np.arange(300)
+        npts = np.sin(t / 5.) + t / 100. + 0.01 * np.random.rand(300)
+        ssa_auto = vassal.ssa(npts, svdmethod='auto', window=50)
+        ssa_auto.decompose(k=5, random_state=0)
+        ssa_ref = vassal.ssa(npts, window=50)
+        ssa_ref.decompose()
+        self.assertEqual(ssa_auto.svdplan['svdmethod'], 'sparpack')
+        self.assertEqual(ssa_auto.svdplan['k'], 5)
+        self.assertGreater(ssa_auto.svdplan['cost'], 0)
+        self.assertEqual(len(ssa_auto.svd[1]), 5)
+        np.testing.assert_allclose(ssa_auto.svd[1][:2], ssa_ref.svd[1][:2],
+                                   rtol=1e-6)
+
+    def test_auto_full(self):
+        self.pin_coefficients()
+        ssa_auto = vassal.ssa(np.random.rand(100), svdmethod='auto')
+        ssa_auto.decompose()
+        self.assertIn(ssa_auto.svdplan['svdmethod'], costmodel.DENSE_METHODS)
+        x = ssa_auto['ssa_original'].values
+        y = ssa_auto['ssa_reconstruction'].values
+        np.testing.assert_allclose(x, y)
+
+
+if __name__ == '__main__':
+    unittest.main()
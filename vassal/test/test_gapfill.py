@@ -0,0 +1,62 @@
+import vassal
+import unittest
+import warnings
+import numpy as np
+import pandas as pd
+
+
+class TestGapfill(unittest.TestCase):
+
+    def setUp(self):
+        t = np.arange(600)
+        self.npts = np.sin(t / 10.) + 0.5 * np.sin(t / 4.)
+        self.gaps = self.npts.copy()
+        self.gaps[[50, 51, 52, 200, 350, 351, 500]] = np.nan
+        self.gaps[400:420] = np.inf
+
+    def test_sparpack(self):
+        filled, ssaobject = vassal.gapfill(self.gaps, components=4,
+                                           window=60)
+        np.testing.assert_allclose(filled, self.npts, atol=1e-4)
+        np.testing.assert_array_equal(ssaobject.ts, filled)
+        self.assertEqual(len(ssaobject.svd[1]), 4)
+
+    def test_skrandom(self):
+        filled, __ = vassal.gapfill(self.gaps, components=4, window=60,
+                                    svdmethod='skrandom', random_state=0)
+        np.testing.assert_allclose(filled, self.npts, atol=1e-4)
+
+    def test_observed_unchanged(self):
+        filled, __ = vassal.gapfill(self.gaps, components=[0, 1], window=60)
+        observed = np.isfinite(self.gaps)
+        np.testing.assert_array_equal(filled[observed], self.gaps[observed])
+
+    def test_pandas(self):
+        pdts = pd.Series(self.gaps, index=np.arange(600) + 100, name='x')
+        filled, ssaobject = vassal.gapfill(pdts, components=4, window=60)
+        self.assertTrue(filled.index.equals(pdts.index))
+        self.assertEqual(filled.name, 'x')
+        self.assertTrue(ssaobject['ssa_original'].index.equals(pdts.index))
+
+    def test_no_gap(self):
+        filled, ssaobject = vassal.gapfill(self.npts, components=4, window=60)
+        np.testing.assert_array_equal(filled, self.npts)
+
+    def test_not_converged(self):
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always')
+            vassal.gapfill(self.gaps, components=4, window=60, max_iter=1)
+        self.assertTrue(any(issubclass(w.category, RuntimeWarning)
+                            for w in caught))
+
+    def test_errors(self):
+        with self.assertRaises(ValueError):
+            vassal.gapfill(self.gaps, svdmethod='nplapack')
+        with self.assertRaises(ValueError):
+            vassal.gapfill(np.full(10, np.nan))
+        with self.assertRaises(ValueError):
+            vassal.ssa(self.gaps)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+import unittest
+import numpy as np
+from scipy.linalg import toeplitz
+
+from vassal.linalg import (
+    HankelOperator,
+    ToeplitzOperator,
+    autocovariance,
+    hankel_view,
+    hankelize,
+    hankelize_outer,
+    randomized_svd)
+
+
+class TestHankelOperator(unittest.TestCase):
+
+    def setUp(self):
+        np.random.seed(0)
+        self.ts = np.random.rand(101)
+        self.x = np.array(hankel_view(self.ts, 37))
+        self.op = HankelOperator(self.ts, 37)
+
+    def test_shape(self):
+        self.assertEqual(self.op.shape, self.x.shape)
+
+    def test_matvec(self):
+        v = np.random.rand(self.x.shape[1])
+        np.testing.assert_allclose(self.op.matvec(v), self.x.dot(v))
+
+    def test_rmatvec(self):
+        u = np.random.rand(self.x.shape[0])
+        np.testing.assert_allclose(self.op.rmatvec(u), self.x.T.dot(u))
+
+    def test_matmat(self):
+        v = np.random.rand(self.x.shape[1], 4)
+        np.testing.assert_allclose(self.op.matmat(v), self.x.dot(v))
+        u = np.random.rand(self.x.shape[0], 4)
+        np.testing.assert_allclose(self.op.rmatmat(u), self.x.T.dot(u))
+
+
+class TestToeplitz(unittest.TestCase):
+
+    def setUp(self):
+        np.random.seed(0)
+        self.ts = np.random.rand(101)
+
+    def test_autocovariance(self):
+        n = len(self.ts)
+        ref = [np.sum(self.ts[:n - d] * self.ts[d:]) / (n - d)
+               for d in range(30)]
+        np.testing.assert_allclose(autocovariance(self.ts, 30), ref)
+
+    def test_operator(self):
+        c = autocovariance(self.ts, 30)
+        dense = toeplitz(c)
+        op = ToeplitzOperator(c)
+        v = np.random.rand(30, 3)
+        np.testing.assert_allclose(op.matmat(v), dense.dot(v))
+        np.testing.assert_allclose(op.rmatvec(v[:, 0]), dense.dot(v[:, 0]))
+
+
+class TestRandomizedSVD(unittest.TestCase):
+
+    def test_singular_values(self):
+        np.random.seed(0)
+        ts = np.sin(np.arange(200) / 5.) + np.random.rand(200)
+        op = HankelOperator(ts, 50)
+        u, s, vt = randomized_svd(op, 3, random_state=0)
+        s_ref = np.linalg.svd(hankel_view(ts, 50), compute_uv=False)
+        np.testing.assert_allclose(s, s_ref[:3], rtol=1e-6)
+        self.assertEqual(u.shape, (50, 3))
+        self.assertEqual(vt.shape, (3, 151))
+
+
+class TestHankelize(unittest.TestCase):
+
+    def setUp(self):
+        np.random.seed(0)
+        self.x = np.random.rand(7, 11)
+
+    def _reference(self, x):
+        return np.array([np.mean(x[::-1, :].diagonal(i))
+                         for i in range(-x.shape[0] + 1, x.shape[1])])
+
+    def test_dense(self):
+        np.testing.assert_allclose(hankelize(self.x), self._reference(self.x))
+
+    def test_tall(self):
+        x = self.x.T.astype(np.float32)
+        ts = hankelize(x)
+        self.assertEqual(ts.dtype, np.float32)
+        np.testing.assert_allclose(ts, self._reference(x), rtol=1e-6)
+
+    def test_hankel_matrix(self):
+        ts = np.random.rand(30)
+        np.testing.assert_allclose(hankelize(hankel_view(ts, 12)), ts)
+
+    def test_batched(self):
+        xs = np.random.rand(2, 3, 7, 11)
+        ts = hankelize(xs)
+        self.assertEqual(ts.shape, (2, 3, 17))
+        np.testing.assert_allclose(ts[1, 2], self._reference(xs[1, 2]))
+
+    def test_outer(self):
+        a = np.random.rand(7, 3)
+        b = np.random.rand(11, 3)
+        np.testing.assert_allclose(hankelize_outer(a, b),
+                                   hankelize(a.dot(b.T)))
+        ts = hankelize_outer(a, b, combine=False)
+        self.assertEqual(ts.shape, (3, 17))
+        np.testing.assert_allclose(ts[1], hankelize(np.outer(a[:, 1],
+                                                             b[:, 1])))
+
+    def test_outer_groups(self):
+        a = np.random.rand(4, 7, 3)
+        b = np.random.rand(4, 11, 3)
+        ts = hankelize_outer(a, b, groups=[[0], [1, 2], []])
+        self.assertEqual(ts.shape, (4, 3, 17))
+        np.testing.assert_allclose(ts[:, 1], hankelize_outer(a[..., 1:],
+                                                             b[..., 1:]))
+        np.testing.assert_allclose(ts[:, 2], 0.)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import vassal
+import unittest
+import numpy as np
+import pandas as pd
+
+
+class TestMSSA(unittest.TestCase):
+
+    def setUp(self):
+        np.random.seed(0)
+        t = np.arange(150)[:, None]
+        self.npts = np.sin(t / 8. + np.arange(4)) + 0.2 * np.random.rand(150, 4)
+        self.ssa_np = vassal.ssa(self.npts, kind='multichannel', window=30)
+        self.ssa_np.decompose()
+
+    def test_recomposition(self):
+        x = self.ssa_np['ssa_original'].values
+        y = self.ssa_np['ssa_reconstruction'].values
+        np.testing.assert_allclose(x, y)
+
+    def test_groups(self):
+        self.ssa_np.reconstruct({'signal': [0, 1]})
+        x = self.ssa_np['signal'].values + self.ssa_np['ssa_residuals'].values
+        np.testing.assert_allclose(x, self.npts)
+
+    def test_reference(self):
+        # reconstruction from the dense block trajectory matrix
+        x = np.asarray(self.ssa_np._embedseries())
+        u = np.asarray(self.ssa_np.svd[0])[:, :2]
+        xr = u.dot(u.T).dot(x)
+        k = 150 - 30 + 1
+        for c in range(4):
+            block = xr[:, c * k:(c + 1) * k]
+            ref = vassal.ssa(np.zeros(150), window=30)._hankelmatrix_to_ts(
+                block)
+            np.testing.assert_allclose(self.ssa_np._reconstruct_group(
+                [0, 1])[:, c], ref, atol=1e-12)
+
+    def test_single_channel(self):
+        ts = self.npts[:, :1]
+        ssa_m = vassal.ssa(ts, kind='multichannel', window=30)
+        ssa_m.decompose()
+        ssa_b = vassal.ssa(ts[:, 0], window=30)
+        ssa_b.decompose()
+        np.testing.assert_allclose(ssa_m.svd[1], ssa_b.svd[1])
+        ssa_m.reconstruct({'pair': [0, 1]})
+        ssa_b.reconstruct({'pair': [0, 1]})
+        np.testing.assert_allclose(ssa_m['pair'].values[:, 0],
+                                   ssa_b['pair'].values, atol=1e-12)
+
+    def test_truncated_solvers(self):
+        for svdmethod, kw in [('sparpack', {}),
+                              ('skrandom', {'random_state': 0}),
+                              ('eigen', {})]:
+            ssa_t = vassal.ssa(self.npts, kind='multichannel', window=30,
+                               svdmethod=svdmethod)
+            ssa_t.decompose(**({'k': 5} if svdmethod != 'eigen' else {}),
+                            **kw)
+            np.testing.assert_allclose(ssa_t.svd[1][:2],
+                                       self.ssa_np.svd[1][:2], rtol=1e-6)
+
+    def test_dataframe(self):
+        df = pd.DataFrame(self.npts, columns=list('abcd'),
+                          index=pd.date_range('2000', periods=150))
+        ssa_df = vassal.ssa(df, kind='multichannel', window=30)
+        ssa_df.decompose()
+        ssa_df.reconstruct({'signal': [0, 1]})
+        self.assertEqual(list(ssa_df['signal'].columns), list('abcd'))
+        self.assertTrue(ssa_df['signal'].index.equals(df.index))
+        frame = ssa_df.to_frame()
+        self.assertEqual(frame.shape, (150, 16))
+        self.assertEqual(frame.columns[0], ('ssa_original', 'a'))
+
+    def test_wcorr(self):
+        wcorr = self.ssa_np.wcorr(6)
+        self.assertEqual(wcorr.shape, (6, 6))
+        np.testing.assert_allclose(np.diag(wcorr), 1.)
+
+    def test_forecast(self):
+        self.assertFalse(hasattr(self.ssa_np, 'forecast'))
+
+    def test_one_dimensional(self):
+        with self.assertRaises(TypeError):
+            vassal.ssa(self.npts[:, 0], kind='multichannel')
+
+
+if __name__ == '__main__':
+    unittest.main()
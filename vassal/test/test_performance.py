@@ -0,0 +1,85 @@
+import gc
+import unittest
+import numpy as np
+
+from vassal import tracing
+from vassal.devutil.performance import Timer, TimingResult
+from vassal.ssa import BasicSSA
+
+
+class TestTimer(unittest.TestCase):
+
+    def test_decorator(self):
+        calls = []
+
+        @Timer(repeat=4, warmup=2, loops=3)
+        def f(x):
+            calls.append(x)
+
+        result = f(1)
+        self.assertIsInstance(result, TimingResult)
+        self.assertEqual(result.name, 'f')
+        self.assertEqual(len(calls), 2 + 4 * 3)
+        self.assertEqual(result.repeat, 4)
+        self.assertLessEqual(result.min, result.median)
+        self.assertGreaterEqual(result.iqr, 0)
+        self.assertIsNone(result.peak_memory)
+
+    def test_calibration(self):
+        result = Timer(repeat=2, min_time=1e-3).timeit(sum, range(10))
+        self.assertGreater(result.loops, 1)
+        self.assertGreater(result.loops * result.median, 1e-4)
+
+    def test_setup(self):
+        objects = []
+
+        def setup():
+            objects.append([])
+            return objects[-1]
+
+        result = Timer(repeat=3, warmup=1).timeit(lambda x: x.append(1),
+                                                  setup=setup)
+        self.assertEqual(result.loops, 1)
+        self.assertEqual(objects, [[1]] * 4)
+
+    def test_memory_and_gc(self):
+        states = []
+
+        def f():
+            states.append(gc.isenabled())
+            return np.ones(10 ** 5)
+
+        timer = Timer(repeat=2, loops=1, disable_gc=True, trace_memory=True)
+        result = timer.timeit(f)
+        self.assertFalse(any(states[:3]))
+        self.assertTrue(gc.isenabled())
+        self.assertGreaterEqual(result.peak_memory, 8 * 10 ** 5)
+
+    def test_memory_in_traced_block(self):
+        with tracing.enabled(memory=True):
+            result = Timer(repeat=1, loops=1, trace_memory=True).timeit(
+                np.ones, 10 ** 5)
+            with Timer(trace_memory=True) as timer:
+                np.ones(10 ** 5)
+            self.assertTrue(tracing.tracemalloc.is_tracing())
+            ssaobject = BasicSSA(np.random.rand(200), window=50)
+            ssaobject.decompose()
+        self.assertGreaterEqual(result.peak_memory, 8 * 10 ** 5)
+        self.assertGreaterEqual(timer.result.peak_memory, 8 * 10 ** 5)
+        self.assertGreater(ssaobject.profile.summary().loc['svd', 'memory'],
+                           0)
+        self.assertFalse(tracing.tracemalloc.is_tracing())
+
+    def test_context_manager(self):
+        with Timer(disable_gc=True, name='block') as timer:
+            self.assertFalse(gc.isenabled())
+        self.assertTrue(gc.isenabled())
+        self.assertEqual(timer.result.name, 'block')
+        self.assertEqual(timer.result.repeat, 1)
+        self.assertEqual(set(timer.result.to_dict()),
+                         {'name', 'times', 'loops', 'warmup', 'peak_memory',
+                          'min', 'median', 'iqr'})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import vassal
+import unittest
+import numpy as np
+import pandas as pd
+
+from vassal import tracing
+
+
+class TestRolling(unittest.TestCase):
+
+    def setUp(self):
+        np.random.seed(0)
+        t = np.arange(1000)
+        self.npts = np.sin(2 * np.pi * t / 50.) + 0.1 * np.random.rand(1000)
+
+    def test_windows(self):
+        starts = [start for start, __ in
+                  vassal.rolling(self.npts, size=400, step=100, k=3)]
+        self.assertEqual(starts, [0, 100, 200, 300, 400, 500, 600])
+
+    def test_pandas_index(self):
+        pdts = pd.Series(self.npts, index=np.arange(1000) + 10)
+        start, ssaobject = next(vassal.rolling(pdts, size=400, step=100, k=3))
+        self.assertEqual(ssaobject['ssa_original'].index[0], 10)
+
+    def _compare(self, svdmethod, **kwargs):
+        warm = vassal.rolling(self.npts, size=400, step=20, k=3,
+                              svdmethod=svdmethod, window=100, **kwargs)
+        cold = vassal.rolling(self.npts, size=400, step=20, k=3,
+                              svdmethod=svdmethod, window=100,
+                              warm_start=False, **kwargs)
+        for (__, ssa_warm), (__, ssa_cold) in zip(warm, cold):
+            np.testing.assert_allclose(ssa_warm.svd[1][:2],
+                                       ssa_cold.svd[1][:2], rtol=1e-6)
+
+    def _products(self, svdmethod, warm_start, **kwargs):
+        with tracing.enabled():
+            objects = [ssaobject for __, ssaobject in vassal.rolling(
+                self.npts, size=400, step=20, k=3, svdmethod=svdmethod,
+                window=100, warm_start=warm_start, **kwargs)]
+        # the first window is decomposed cold in both cases
+        return sum(ssaobject.profile.summary().loc['svd', 'iterations']
+                   for ssaobject in objects[1:])
+
+    def test_warm_products(self):
+        self.assertLess(self._products('skrandom', True, random_state=0),
+                        self._products('skrandom', False, random_state=0) / 2)
+        self.assertLessEqual(self._products('sparpack', True),
+                             self._products('sparpack', False))
+
+    def test_warm_sparpack(self):
+        self._compare('sparpack')
+
+    def test_warm_skrandom(self):
+        self._compare('skrandom', random_state=0)
+
+    def test_warm_start_kwargs(self):
+        previous = vassal.ssa(self.npts, window=100, svdmethod='sparpack')
+        svd = previous.decompose(k=3)
+        ssaobject = vassal.ssa(self.npts[1:], window=100, svdmethod='sparpack')
+        self.assertEqual(set(ssaobject.warm_start_kwargs(svd)), {'v0'})
+        ssaobject = vassal.ssa(self.npts[1:], window=100, svdmethod='skrandom')
+        warmkw = ssaobject.warm_start_kwargs(svd)
+        self.assertEqual(warmkw['n_iter'], 1)
+        self.assertEqual(warmkw['q0'].shape, (900, 3))
+        ssaobject = vassal.ssa(self.npts[1:], window=100)
+        self.assertEqual(ssaobject.warm_start_kwargs(svd), {})
+
+    def test_groups(self):
+        groups = {'signal': [0, 1]}
+        for __, ssaobject in vassal.rolling(self.npts, size=400, step=300,
+                                            k=3, groups=groups):
+            self.assertEqual(len(ssaobject['signal']), 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import vassal
+import unittest
+import numpy as np
+import pandas as pd
+
+from vassal.linalg import hankel2d_matrix, hankelize2d
+
+
+class TestSSA2D(unittest.TestCase):
+
+    def setUp(self):
+        np.random.seed(0)
+        x, y = np.meshgrid(np.arange(30), np.arange(24), indexing='ij')
+        self.field = np.sin(x / 4.) * np.cos(y / 5.) + \
+            0.2 * np.random.rand(30, 24)
+        self.ssa_np = vassal.ssa(self.field, kind='2d', window=(6, 5))
+        self.ssa_np.decompose()
+
+    def test_recomposition(self):
+        x = self.ssa_np['ssa_original'].values
+        y = self.ssa_np['ssa_reconstruction'].values
+        np.testing.assert_allclose(x, y)
+
+    def test_reference(self):
+        x = hankel2d_matrix(self.field, (6, 5))
+        u = np.asarray(self.ssa_np.svd[0])[:, :3]
+        ref = hankelize2d(u.dot(u.T).dot(x), (6, 5), self.field.shape)
+        np.testing.assert_allclose(self.ssa_np._reconstruct_group([0, 1, 2]),
+                                   ref, atol=1e-12)
+
+    def test_truncated_solvers(self):
+        for svdmethod, kw in [('sparpack', {}),
+                              ('skrandom', {'random_state': 0})]:
+            ssa_t = vassal.ssa(self.field, kind='2d', window=(6, 5),
+                               svdmethod=svdmethod)
+            ssa_t.decompose(k=4, **kw)
+            np.testing.assert_allclose(ssa_t.svd[1][:2],
+                                       self.ssa_np.svd[1][:2], rtol=1e-6)
+
+    def test_wcorr(self):
+        wcorr = self.ssa_np.wcorr(5)
+        self.assertEqual(wcorr.shape, (5, 5))
+        np.testing.assert_allclose(np.diag(wcorr), 1.)
+
+    def test_dataframe(self):
+        df = pd.DataFrame(self.field, columns=np.arange(24) * 0.5)
+        ssa_df = vassal.ssa(df, kind='2d', window=(6, 5))
+        ssa_df.decompose()
+        ssa_df.reconstruct({'trend': 0})
+        self.assertTrue(ssa_df['trend'].columns.equals(df.columns))
+        self.assertEqual(ssa_df.to_frame().shape, (30, 24 * 4))
+
+    def test_window(self):
+        self.assertEqual(vassal.ssa(self.field, kind='2d').window, (15, 12))
+        with self.assertRaises(ValueError):
+            vassal.ssa(self.field, kind='2d', window=(31, 5))
+        with self.assertRaises(ValueError):
+            vassal.ssa(self.field, kind='2d', window=6)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -63,5 +63,44 @@ class TestBasicSSA_skrandom(unittest.TestCase):
         y = self.ssa_np['ssa_reconstruction'].values
         np.testing.assert_allclose(x,y, atol=1e-7)
 
+class TestToeplitzSSA_eigh(unittest.TestCase):
+
+    def setUp(self):
+        np.random.seed(0)
+        self.npts = np.random.rand(100)
+
+    def test_eigh_recomposition(self):
+        ssa_np = vassal.ssa(self.npts, svdmethod='eigh', kind='toeplitz')
+        ssa_np.decompose()
+        x = ssa_np['ssa_original'].values
+        y = ssa_np['ssa_reconstruction'].values
+        np.testing.assert_allclose(x, y)
+
+    def test_eigh_matches_lapack(self):
+        ssa_eigh = vassal.ssa(self.npts, svdmethod='eigh', kind='toeplitz')
+        ssa_lapack = vassal.ssa(self.npts, kind='toeplitz')
+        u1, s1, v1 = ssa_eigh.decompose()
+        u2, s2, v2 = ssa_lapack.decompose()
+        np.testing.assert_allclose(s1, s2, atol=1e-10)
+        np.testing.assert_allclose(np.abs(u1[:, :3]), np.abs(u2[:, :3]),
+                                   atol=1e-8)
+
+    def test_eigh_topk(self):
+        ssa_np = vassal.ssa(self.npts, svdmethod='eigh_topk', kind='toeplitz')
+        u, s, v = ssa_np.decompose(k=5)
+        ssa_lapack = vassal.ssa(self.npts, kind='toeplitz')
+        s_ref = ssa_lapack.decompose()[1]
+        self.assertEqual(u.shape, (50, 5))
+        np.testing.assert_allclose(s, s_ref[:5], atol=1e-10)
+
+    def test_eigh_basic_rejected(self):
+        for method in ('eigh', 'eigh_topk'):
+            with self.assertRaises(ValueError):
+                vassal.ssa(self.npts, svdmethod=method)
+            with self.assertRaises(ValueError):
+                vassal.ssa(self.npts.reshape(50, 2), kind='multichannel',
+                           svdmethod=method)
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,137 @@
+import unittest
+import numpy as np
+
+from vassal import tracing
+from vassal.ssa import BasicSSA, ToeplitzSSA
+
+
+class TestTracing(unittest.TestCase):
+
+    def setUp(self):
+        np.random.seed(0)
+        self.ts = np.sin(np.arange(300) / 5.) + 0.1 * np.random.rand(300)
+        self.events = []
+        tracing.register(self.events.append)
+
+    def tearDown(self):
+        if self.events.append in tracing._CALLBACKS:
+            tracing.unregister(self.events.append)
+
+    def test_events(self):
+        ssaobject = BasicSSA(self.ts, window=50, usetype='nparray')
+        ssaobject.decompose(full_matrices=False)
+        ssaobject.reconstruct({'sine': [0, 1]})
+        ssaobject['sine']
+        ssaobject.wcorr(4)
+        stages = [(event.stage, event.phase) for event in self.events]
+        self.assertEqual(stages, [
+            ('validate', 'start'), ('validate', 'stop'),
+            ('svd', 'start'), ('embed', 'start'), ('embed', 'stop'),
+            ('svd', 'stop'),
+            ('reconstruct', 'start'), ('hankelize', 'start'),
+            ('hankelize', 'stop'), ('reconstruct', 'stop'),
+            ('wcorr', 'start'), ('hankelize', 'start'),
+            ('hankelize', 'stop'), ('wcorr', 'stop')])
+        svd = self.events[5]
+        self.assertEqual(svd.shapes, [(50, 50), (50,), (50, 251)])
+        self.assertEqual(svd.info['svdmethod'], 'nplapack')
+        self.assertGreater(svd.duration, 0)
+        self.assertIs(svd.ssa, ssaobject)
+
+    def test_iterations(self):
+        for svdmethod in ['sparpack', 'skrandom']:
+            ssaobject = ToeplitzSSA(self.ts, window=50, svdmethod=svdmethod)
+            ssaobject.decompose(k=3)
+            self.assertGreater(self.events[-1].iterations, 0)
+
+    def test_lazy_extension(self):
+        ssaobject = BasicSSA(self.ts, window=50, svdmethod='sparpack')
+        ssaobject.decompose(k=2, lazy=True)
+        ssaobject.reconstruct({'noise': [5]})
+        extend = [event for event in self.events
+                  if event.stage == 'svd_extend' and event.phase == 'stop']
+        self.assertEqual(len(extend), 1)
+        self.assertGreater(extend[0].iterations, 0)
+
+    def test_profile(self):
+        ssaobject = BasicSSA(self.ts, window=50)
+        ssaobject.decompose()
+        ssaobject.to_frame()
+        summary = ssaobject.profile.summary()
+        self.assertEqual(summary.loc['svd', 'calls'], 1)
+        self.assertEqual(summary.loc['reconstruct', 'calls'], 1)
+        self.assertEqual(summary.loc['hankelize', 'calls'], 1)
+        table = ssaobject.profile.to_frame()
+        self.assertEqual(len(table), len(ssaobject.profile))
+        self.assertIn('svdmethod', table.columns)
+        self.assertIsNone(ssaobject.profile.events[0].ssa)
+
+    def test_profile_bounded(self):
+        ssaobject = BasicSSA(self.ts, window=50)
+        ssaobject.profile = tracing.Profile(maxlen=3)
+        ssaobject.decompose()
+        for __ in range(5):
+            ssaobject._reconstruct_components([0, 1])
+        self.assertEqual(len(ssaobject.profile), 3)
+        summary = ssaobject.profile.summary()
+        self.assertEqual(summary.loc['hankelize', 'calls'], 5)
+        self.assertEqual(summary.loc['svd', 'calls'], 1)
+
+    def test_hankelize_stage(self):
+        ssaobject = BasicSSA(self.ts, window=50)
+        ssaobject.decompose()
+        ssaobject._reconstruct_components([0, 1, 2])
+        hankelize = self.events[-1]
+        self.assertEqual(hankelize.stage, 'hankelize')
+        # the stage receives the factors, the projection is done before
+        self.assertEqual(hankelize.shapes, [(300,)])
+        start = [event for event in self.events
+                 if event.stage == 'hankelize' and event.phase == 'start']
+        self.assertEqual(start[-1].shapes, [(50, 3), (251, 3)])
+
+    def test_error(self):
+        with self.assertRaises(TypeError):
+            BasicSSA(self.ts + 1j)
+        self.assertIn('TypeError', self.events[-1].info['error'])
+        self.assertEqual(tracing._stack(), [])
+
+    def test_memory(self):
+        tracing.unregister(self.events.append)
+        with tracing.enabled(memory=True):
+            ssaobject = BasicSSA(self.ts, window=150)
+            ssaobject.decompose()
+        self.assertFalse(tracing.is_enabled())
+        summary = ssaobject.profile.summary()
+        # the svd stage includes the nested embedding
+        self.assertGreaterEqual(summary.loc['svd', 'memory'],
+                                summary.loc['embed', 'memory'])
+        self.assertGreater(summary.loc['svd', 'memory'], 150 * 151 * 8)
+
+    def test_explicitly_enabled(self):
+        tracing.unregister(self.events.append)
+        tracing.enable(memory=True)
+        try:
+            callback = self.events.append
+            tracing.register(callback)
+            tracing.unregister(callback)
+            self.assertTrue(tracing.is_enabled())
+            self.assertTrue(tracing.tracemalloc.is_tracing())
+        finally:
+            tracing.disable()
+        with tracing.enabled():
+            tracing.register(callback)
+            tracing.unregister(callback)
+            self.assertTrue(tracing.is_enabled())
+        self.assertFalse(tracing.is_enabled())
+
+    def test_disabled(self):
+        tracing.unregister(self.events.append)
+        ssaobject = BasicSSA(self.ts)
+        ssaobject.decompose()
+        self.assertEqual(len(ssaobject.profile), 0)
+        self.assertEqual(len(ssaobject.profile.summary()), 0)
+        self.assertEqual(self.events, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,534 @@
+"""Tracing of the stages of Singular Spectrum Analysis
+
+The stages of the SSA objects emit start and stop events to the registered
+callbacks and accumulate a profile on each object:
+
+* 'validate': checks and conversion of the input series,
+* 'embed': embedding of the series in the trajectory matrix,
+* 'svd': decomposition with the SVD method, 'svd_extend' for the extensions
+  of lazy decompositions,
+* 'reconstruct': reconstruction of a group of eigentriples,
+* 'hankelize': diagonal averaging of the elementary matrices,
+* 'wcorr': weighted correlation matrix.
+
+Tracing is disabled by default and then costs a flag lookup per stage. It
+is enabled by `enable`, by the `enabled` context manager or by registering
+a callback. Stop events carry the duration, the shapes and bytes of the
+output arrays, the peak memory allocated during the stage if memory tracing
+is on, and the solver iterations of the truncated SVD methods, counted as
+the products with the trajectory operator.
+
+Examples
+--------
+
+>>> from vassal.ssa import BasicSSA
+>>> events = []
+>>> register(events.append)
+>>> myssa = BasicSSA(np.random.rand(100), window=10, svdmethod='sparpack')
+>>> svd = myssa.decompose(k=3)
+>>> unregister(events.append)
+>>> [(event.stage, event.phase) for event in events[-2:]]
+[('svd', 'start'), ('svd', 'stop')]
+>>> events[-1].iterations > 0
+True
+>>> list(myssa.profile.summary().index)
+['validate', 'svd']
+
+"""
+
+import functools
+import threading
+import time
+import tracemalloc
+from collections import deque, namedtuple
+
+import numpy as np
+import pandas as pd
+from scipy.sparse.linalg import LinearOperator
+
+TraceEvent = namedtuple('TraceEvent', ['stage', 'phase', 'ssa', 'duration',
+                                       'shapes', 'nbytes', 'memory',
+                                       'iterations', 'info'])
+TraceEvent.__doc__ = """Start or stop event of a traced stage
+
+stage : str
+    Name of the stage.
+phase : str
+    'start' or 'stop'.
+ssa : BaseSSA
+    The SSA object.
+duration : float or None
+    Duration of the stage in seconds, None at start.
+shapes : list of tuple
+    Shapes of the array arguments at start, of the output arrays at stop.
+nbytes : int
+    Bytes of the arrays of `shapes`.
+memory : int or None
+    Peak memory allocated during the stage in bytes, None at start or if
+    memory tracing is off.
+iterations : int or None
+    Products with the operator of a truncated SVD method, None otherwise.
+info : dict
+    Other details, e.g. the 'svdmethod' or the 'error' raised by the stage.
+"""
+
+# Global state, the flag is read by every traced stage
+
+_ENABLED = False
+_TRACE_MEMORY = False
+_STARTED_TRACEMALLOC = False
+_CALLBACKS = []
+
+# Whether tracing was enabled by registering a callback, and not explicitly
+
+_ENABLED_BY_CALLBACKS = False
+
+# Active stages of each thread, the innermost last
+
+_LOCAL = threading.local()
+
+
+def enable(memory=False):
+    """Enable tracing
+
+    Parameters
+    ----------
+    memory : bool, optional
+        Trace the peak memory of each stage with tracemalloc, which slows
+        allocations down. Default is False.
+
+    """
+
+    global _ENABLED, _TRACE_MEMORY, _STARTED_TRACEMALLOC
+    global _ENABLED_BY_CALLBACKS
+
+    _ENABLED = True
+    _ENABLED_BY_CALLBACKS = False
+
+    if memory and not _TRACE_MEMORY:
+        _TRACE_MEMORY = True
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _STARTED_TRACEMALLOC = True
+
+
+def disable():
+    """Disable tracing, registered callbacks are kept"""
+
+    global _ENABLED, _TRACE_MEMORY, _STARTED_TRACEMALLOC
+    global _ENABLED_BY_CALLBACKS
+
+    _ENABLED = False
+    _TRACE_MEMORY = False
+    _ENABLED_BY_CALLBACKS = False
+
+    if _STARTED_TRACEMALLOC:
+        tracemalloc.stop()
+        _STARTED_TRACEMALLOC = False
+
+
+def is_enabled():
+    """Return whether tracing is enabled"""
+    return _ENABLED
+
+
+class enabled(object):
+    """Context manager enabling tracing in a block
+
+    Examples
+    --------
+
+    >>> from vassal.ssa import BasicSSA
+    >>> with enabled(memory=True):
+    ...     myssa = BasicSSA(np.random.rand(100), usetype='nparray')
+    ...     svd = myssa.decompose()
+    >>> print(myssa.profile.summary().loc['svd', 'memory'] > 0)
+    True
+
+    """
+
+    def __init__(self, memory=False):
+        self.memory = memory
+        self._previous = None
+
+    def __enter__(self):
+        self._previous = (_ENABLED, _TRACE_MEMORY, _ENABLED_BY_CALLBACKS)
+        enable(self.memory)
+        return self
+
+    def __exit__(self, *exc_info):
+        global _ENABLED_BY_CALLBACKS
+        wasenabled, wastracing, bycallbacks = self._previous
+        if not wasenabled:
+            disable()
+        elif not wastracing and self.memory:
+            disable()
+            enable()
+        _ENABLED_BY_CALLBACKS = bycallbacks
+        return False
+
+
+def register(callback):
+    """Register a callback of the trace events and enable tracing
+
+    Parameters
+    ----------
+    callback : callable
+        Function called with each TraceEvent.
+
+    """
+
+    global _ENABLED_BY_CALLBACKS
+
+    wasenabled = _ENABLED
+
+    _CALLBACKS.append(callback)
+
+    if not wasenabled:
+        enable(_TRACE_MEMORY)
+        _ENABLED_BY_CALLBACKS = True
+
+
+def unregister(callback):
+    """Unregister a callback
+
+    Tracing is disabled with the last callback if registering enabled it,
+    tracing enabled explicitly stays on.
+    """
+
+    _CALLBACKS.remove(callback)
+
+    if not _CALLBACKS and _ENABLED_BY_CALLBACKS:
+        disable()
+
+
+def _stack():
+    """Return the active stages of the current thread"""
+
+    stack = getattr(_LOCAL, 'stack', None)
+
+    if stack is None:
+        stack = _LOCAL.stack = []
+
+    return stack
+
+
+def _arrays(value):
+    """Return the arrays of a value, nested in lists and tuples"""
+
+    if isinstance(value, (list, tuple)):
+        return [x for item in value for x in _arrays(item)]
+
+    if isinstance(value, (np.ndarray, pd.Series, pd.DataFrame)):
+        return [value]
+
+    return []
+
+
+def _emit(event):
+    for callback in list(_CALLBACKS):
+        callback(event)
+
+
+class _Stage(object):
+    """Active traced stage, measuring its duration and memory"""
+
+    __slots__ = ('ssa', 'name', 'info', 'output', 'iterations', 'start',
+                 'memory0', 'peak')
+
+    def __init__(self, ssa, name, info):
+        self.ssa = ssa
+        self.name = name
+        self.info = info
+        self.output = None
+        self.iterations = None
+        self.memory0 = None
+        self.peak = None
+
+    def __enter__(self):
+
+        _stack().append(self)
+
+        if _TRACE_MEMORY:
+            self.memory0 = tracemalloc.get_traced_memory()[0]
+            self.peak = self.memory0
+            tracemalloc.reset_peak()
+
+        self.start = time.perf_counter()
+
+        return self
+
+    def __exit__(self, exc_type, error, traceback):
+
+        duration = time.perf_counter() - self.start
+
+        stack = _stack()
+        stack.pop()
+
+        memory = None
+
+        if self.memory0 is not None and _TRACE_MEMORY:
+
+            # nested stages reset the peak, theirs are propagated up
+
+            peak = max(tracemalloc.get_traced_memory()[1], self.peak)
+            memory = peak - self.memory0
+
+            if stack and stack[-1].peak is not None:
+                stack[-1].peak = max(stack[-1].peak, peak)
+
+        arrays = _arrays(self.output)
+        info = self.info
+
+        if error is not None:
+            info['error'] = '{}: {}'.format(exc_type.__name__, error)
+
+        event = TraceEvent(self.name, 'stop', self.ssa, duration,
+                           [x.shape for x in arrays],
+                           int(sum(x.nbytes for x in arrays)), memory,
+                           self.iterations, info)
+
+        profile = getattr(self.ssa, 'profile', None)
+
+        if profile is not None:
+            profile.add(event)
+
+        _emit(event)
+
+        return False
+
+
+class _NullStage(object):
+    """Stage of disabled tracing, doing nothing"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+def stage(ssa, name, args=(), **info):
+    """Return a context manager tracing a block as a stage
+
+    A start event is emitted on entering the block and a stop event on
+    leaving it. The output arrays of the stage are set with annotate.
+
+    Parameters
+    ----------
+    ssa : BaseSSA
+        The SSA object, whose profile records the stage.
+    name : str
+        Name of the stage.
+    args : sequence, optional
+        Arguments of the stage, the shapes of arrays are reported.
+    **info
+        Details of the events.
+
+    """
+
+    if not _ENABLED:
+        return _NULL_STAGE
+
+    arrays = _arrays(list(args))
+
+    _emit(TraceEvent(name, 'start', ssa, None, [x.shape for x in arrays],
+                     int(sum(x.nbytes for x in arrays)), None, None,
+                     dict(info)))
+
+    return _Stage(ssa, name, info)
+
+
+def traced(name):
+    """Decorate a method of SSA objects to trace it as a stage
+
+    Parameters
+    ----------
+    name : str
+        Name of the stage.
+
+    """
+
+    def decorator(method):
+
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+
+            if not _ENABLED:
+                return method(self, *args, **kwargs)
+
+            with stage(self, name, args) as active:
+                active.output = method(self, *args, **kwargs)
+
+            return active.output
+
+        return wrapper
+
+    return decorator
+
+
+def annotate(**info):
+    """Add details to the innermost active stage
+
+    The 'iterations' and 'output' keywords set the iterations and the
+    output arrays of the stop event, other keywords are added to its info.
+    """
+
+    if not _ENABLED:
+        return
+
+    stack = _stack()
+
+    if not stack:
+        return
+
+    active = stack[-1]
+
+    if 'iterations' in info:
+        active.iterations = info.pop('iterations')
+
+    if 'output' in info:
+        active.output = info.pop('output')
+
+    active.info.update(info)
+
+
+def counting(a):
+    """Wrap an operator to count its products if tracing is enabled
+
+    Returns `a` itself if tracing is disabled, else a CountingOperator.
+    """
+
+    if not _ENABLED:
+        return a
+
+    return CountingOperator(a)
+
+
+class CountingOperator(LinearOperator):
+    """Linear operator counting the products with another operator
+
+    The `products` attribute counts the calls of matvec and matmat, one per
+    Lanczos iteration of ARPACK and per power iteration of the randomized
+    SVD.
+    """
+
+    def __init__(self, a):
+        super(CountingOperator, self).__init__(dtype=a.dtype, shape=a.shape)
+        self.a = a
+        self.products = 0
+
+    def _matvec(self, x):
+        self.products += 1
+        return self.a.matvec(x)
+
+    def _rmatvec(self, x):
+        return self.a.rmatvec(x)
+
+    def _matmat(self, x):
+        self.products += 1
+        return self.a.matmat(x)
+
+    def _rmatmat(self, x):
+        return self.a.rmatmat(x)
+
+
+class Profile(object):
+    """Stop events of the traced stages of an SSA object
+
+    The last `maxlen` stop events are kept, so that the profile of a long
+    lived object is bounded, while the summary aggregates all of them.
+
+    Parameters
+    ----------
+    maxlen : int or None, optional
+        Number of stop events kept, MAXLEN by default. If None, all of them
+        are kept.
+
+    Attributes
+    ----------
+    events : collections.deque of TraceEvent
+        Last stop events, in order.
+
+    """
+
+    MAXLEN = 1000
+
+    _COLUMNS = ['stage', 'duration', 'shapes', 'nbytes', 'memory',
+                'iterations']
+
+    def __init__(self, maxlen=MAXLEN):
+        self.events = deque(maxlen=maxlen)
+        self._totals = {}
+
+    def __len__(self):
+        return len(self.events)
+
+    def add(self, event):
+
+        # the SSA object is dropped, it holds the profile
+
+        self.events.append(event._replace(ssa=None))
+
+        # calls, total and max durations, bytes, max memory and iterations
+
+        totals = self._totals.setdefault(event.stage,
+                                         [0, 0., 0., 0, None, None])
+
+        totals[0] += 1
+        totals[1] += event.duration
+        totals[2] = max(totals[2], event.duration)
+        totals[3] += event.nbytes
+
+        if event.memory is not None:
+            totals[4] = max(totals[4] or 0, event.memory)
+
+        if event.iterations is not None:
+            totals[5] = (totals[5] or 0) + event.iterations
+
+    def clear(self):
+        self.events.clear()
+        self._totals = {}
+
+    def to_frame(self):
+        """Return one row per kept stage call, with the details as columns"""
+
+        rows = [dict({column: getattr(event, column)
+                      for column in self._COLUMNS}, **event.info)
+                for event in self.events]
+
+        return pd.DataFrame(rows, columns=None if rows else self._COLUMNS)
+
+    def summary(self):
+        """Return the calls, total, mean and max durations of each stage
+
+        Memory is the maximum peak of the stage calls and iterations their
+        sum, NaN if not traced. All the calls are summarized, including
+        those whose events are no longer kept.
+        """
+
+        columns = ['calls', 'total', 'mean', 'max', 'nbytes', 'memory',
+                   'iterations']
+
+        rows = [(calls, total, total / calls, longest, nbytes,
+                 np.nan if memory is None else memory,
+                 np.nan if iterations is None else iterations)
+                for calls, total, longest, nbytes, memory, iterations
+                in self._totals.values()]
+
+        summary = pd.DataFrame(rows, columns=columns,
+                               index=pd.Index(list(self._totals),
+                                              name='stage'))
+
+        return summary
+
+
+if __name__ == '__main__':
+    import doctest
+
+    doctest.testmod()